@@ -26,6 +26,11 @@ class KilnClient:
         resp.raise_for_status()
         return resp.json()["setpoint"]
 
+    async def get_dynamic_setpoint(self) -> float:
+        resp = await self.client.get("/dynamic-setpoint")
+        resp.raise_for_status()
+        return resp.json()["dynamic_setpoint"]
+
     async def get_output1(self) -> float:
         resp = await self.client.get("/output/1")
         resp.raise_for_status()
@@ -36,6 +41,11 @@ class KilnClient:
         resp.raise_for_status()
         return resp.json()["output_2"]
 
+    async def get_ct_current(self) -> float:
+        resp = await self.client.get("/ct-current")
+        resp.raise_for_status()
+        return resp.json()["ct_current"]
+
     async def set_run_stop(self, run: bool) -> str:
         resp = await self.client.post("/run", json={"run": run})
         resp.raise_for_status()
@@ -138,6 +148,26 @@ class KilnClient:
         resp.raise_for_status()
         return resp.json()
 
+    async def get_status_snapshot(self) -> Dict[str, Any]:
+        resp = await self.client.get("/status/snapshot")
+        resp.raise_for_status()
+        return resp.json()
+
+    async def trace_status(self) -> Dict[str, Any]:
+        resp = await self.client.get("/bus/trace")
+        resp.raise_for_status()
+        return resp.json()
+
+    async def start_trace(self) -> Dict[str, Any]:
+        resp = await self.client.post("/bus/trace/start")
+        resp.raise_for_status()
+        return resp.json()
+
+    async def stop_trace(self) -> Dict[str, Any]:
+        resp = await self.client.post("/bus/trace/stop")
+        resp.raise_for_status()
+        return resp.json()
+
     async def get_run_status(self) -> int:
         resp = await self.client.get("/run")
         resp.raise_for_status()
@@ -190,6 +220,30 @@ class KilnClient:
         resp.raise_for_status()
         return resp.json()
 
+    async def get_cycles(self, pattern_id: int) -> int:
+        resp = await self.client.get(f"/pattern/{pattern_id}/cycles")
+        resp.raise_for_status()
+        return resp.json()["cycles"]
+
+    async def set_cycles(self, pattern_id: int, value: int) -> Dict[str, Any]:
+        resp = await self.client.post(
+            f"/pattern/{pattern_id}/cycles", json={"value": value}
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    async def get_link(self, pattern_id: int) -> int:
+        resp = await self.client.get(f"/pattern/{pattern_id}/link")
+        resp.raise_for_status()
+        return resp.json()["link"]
+
+    async def set_link(self, pattern_id: int, value: int) -> Dict[str, Any]:
+        resp = await self.client.post(
+            f"/pattern/{pattern_id}/link", json={"value": value}
+        )
+        resp.raise_for_status()
+        return resp.json()
+
     # Generic Settings
     async def get_all_settings(self) -> Dict[str, Any]:
         resp = await self.client.get("/settings/all")
@@ -207,6 +261,15 @@ class KilnClient:
         resp.raise_for_status()
         return resp.json()
 
+    async def set_settings(
+        self, values: Dict[str, Any], verify: bool = False
+    ) -> Dict[str, Any]:
+        resp = await self.client.post(
+            "/settings", params={"verify": verify}, json={"values": values}
+        )
+        resp.raise_for_status()
+        return resp.json()
+
     async def set_system_alarm(self, value: int) -> Dict[str, Any]:
         resp = await self.client.post("/alarm/system", json={"value": value})
         resp.raise_for_status()
@@ -0,0 +1,247 @@
+# src/bus_worker.py
+"""Bus worker: the one process that owns the serial port.
+
+It samples the controller (monitor and recorder), runs the profile runner
+and the Modbus gateway, writes every recorded sample and the newest acquired
+one into the shared SampleRing, and executes Delta2 calls and commands sent
+by the HTTP workers (see bus.BusClient). Its event hub is the only one that
+logs events and calls webhooks; it relays events, anomalies, the local fleet
+state and the recording state to every HTTP worker that subscribes. Run it
+next to a multi-worker server, with the same secret:
+
+    export KILN_BUS_ADDRESS=/run/kiln/bus.sock KILN_BUS_AUTHKEY=$(openssl rand -hex 16)
+    python -m src.bus_worker &
+    uvicorn src.main:app --workers 4
+"""
+
+import os
+
+# Before core.kiln is imported: this process opens the serial port itself
+os.environ["KILN_BUS_ROLE"] = "worker"
+
+import asyncio
+import queue
+import signal
+import threading
+from multiprocessing.connection import Listener
+from typing import Set
+
+from .core.bus import SampleRing
+from .core.config import (
+    BUS_AUTHKEY,
+    BUS_POLL_INTERVAL,
+    BUS_RELAY_QUEUE,
+    BUS_WORKER_ADDRESS,
+)
+from .core.delta_2 import Delta2
+from .core.detectors import detectors
+from .core.eta import eta
+from .core.events import event_hub
+from .core.fleet import fleet
+from .core.kiln import kiln
+from .core.modbus_gateway import gateway
+from .core.profile_runner import runner
+from .core.profiler import profiler
+from .routers import monitoring
+
+
+async def _profile(action: str, *args):
+    if action == "start":
+        await runner.start(kiln, *args)
+    elif action == "stop":
+        await runner.stop()
+    elif action in ("pause", "resume", "skip"):
+        getattr(runner, action)()
+    elif action != "status":
+        raise ValueError(f"Unknown profile action: {action}")
+    return runner.status()
+
+
+async def _gateway():
+    return gateway.status()
+
+
+async def _profiler(action: str, *args):
+    if action not in ("start", "stop", "status", "export"):
+        raise ValueError(f"Unknown profiler action: {action}")
+    return getattr(profiler, action)(*args)
+
+
+async def _publish(event: dict):
+    event_hub.publish(event)
+
+
+async def _invalidate_program():
+    eta.invalidate_program()
+
+
+async def _webhooks(action: str, *args):
+    if action == "add":
+        return event_hub.webhooks[event_hub.add_webhook(*args)]
+    if action == "remove":
+        return event_hub.remove_webhook(*args)
+    if action != "list":
+        raise ValueError(f"Unknown webhooks action: {action}")
+    return list(event_hub.webhooks.values())
+
+
+# Commands run on the worker's event loop
+COMMANDS = {
+    "start_recording": lambda period=None: monitoring.start_recording(
+        period, kiln=kiln
+    ),
+    "stop_recording": monitoring.stop_recording,
+    "status": monitoring.get_status,
+    "eta": monitoring.get_eta,
+    "profile": _profile,
+    "gateway": _gateway,
+    "profiler": _profiler,
+    "publish": _publish,
+    "invalidate_program": _invalidate_program,
+    "webhooks": _webhooks,
+}
+
+# Relay queues of the subscribed HTTP workers; only touched on the event loop
+_subscribers: Set[queue.Queue] = set()
+
+
+def _push(message: tuple):
+    for q in _subscribers:
+        if q.full():
+            try:
+                q.get_nowait()  # a slow HTTP worker loses the oldest message
+            except queue.Empty:
+                pass
+        q.put_nowait(message)
+
+
+async def _subscribe(q: queue.Queue):
+    # Start from the current state, then follow
+    q.put_nowait(("state", monitoring.recording_state()))
+    q.put_nowait(("fleet", fleet.snapshot(local_only=True)))
+    for event in detectors.events:
+        q.put_nowait(("anomaly", event))
+    _subscribers.add(q)
+
+
+def _stream(conn, loop: asyncio.AbstractEventLoop):
+    q: queue.Queue = queue.Queue(BUS_RELAY_QUEUE)
+    asyncio.run_coroutine_threadsafe(_subscribe(q), loop).result()
+    try:
+        while True:
+            conn.send(q.get())
+    except OSError:
+        pass  # the HTTP worker went away
+    finally:
+        loop.call_soon_threadsafe(_subscribers.discard, q)
+
+
+async def _relay(kind: str, subscribe):
+    with subscribe() as messages:
+        while True:
+            _push((kind, await messages.get()))
+
+
+async def _relay_state():
+    sent = None
+    while True:
+        state = monitoring.recording_state()
+        if state != sent:
+            _push(("state", state))
+            sent = state
+        await asyncio.sleep(BUS_POLL_INTERVAL)
+
+
+def _serve(conn, loop: asyncio.AbstractEventLoop):
+    with conn:
+        while True:
+            try:
+                kind, name, args, kwargs = conn.recv()
+            except (EOFError, OSError):
+                return
+            if kind == "subscribe":
+                return _stream(conn, loop)
+            try:
+                if kind == "call":
+                    if name.startswith("_") or not callable(
+                        getattr(Delta2, name, None)
+                    ):
+                        raise AttributeError(f"Delta2 has no method {name}")
+                    # Delta2 serialises bus access itself
+                    result = getattr(kiln, name)(*args, **kwargs)
+                elif kind == "command":
+                    result = asyncio.run_coroutine_threadsafe(
+                        COMMANDS[name](*args, **kwargs), loop
+                    ).result()
+                else:
+                    raise ValueError(f"Unknown request kind: {kind}")
+                conn.send(("ok", result))
+            except Exception as e:
+                conn.send(("error", e))
+
+
+def _accept(listener: Listener, loop: asyncio.AbstractEventLoop):
+    while True:
+        try:
+            conn = listener.accept()
+        except OSError:
+            return  # listener closed
+        threading.Thread(target=_serve, args=(conn, loop), daemon=True).start()
+
+
+async def serve(address: str = BUS_WORKER_ADDRESS, authkey: bytes = BUS_AUTHKEY):
+    if not address:
+        raise SystemExit("Set KILN_BUS_ADDRESS to the socket to listen on")
+    if not authkey:
+        raise SystemExit(
+            "Set KILN_BUS_AUTHKEY to a secret shared with the HTTP workers"
+        )
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    if os.path.exists(address):
+        os.unlink(address)  # left by a previous run
+    ring = SampleRing.create()
+    listener = Listener(address, authkey=authkey)
+    threading.Thread(target=_accept, args=(listener, loop), daemon=True).start()
+    print(f"Bus worker listening on {address}, ring of {ring.capacity} samples.")
+    monitoring.start_monitor(kiln)
+    await runner.recover(kiln)
+    await gateway.start(kiln)
+
+    async def publish():
+        with monitoring.samples.subscribe() as samples:
+            while True:
+                ring.append(await samples.get())
+
+    async def publish_latest():
+        with monitoring.acquired.subscribe() as latest:
+            while True:
+                ring.set_latest(await latest.get())
+
+    tasks = [
+        asyncio.create_task(publish()),
+        asyncio.create_task(publish_latest()),
+        asyncio.create_task(_relay("event", event_hub.broadcaster.subscribe)),
+        asyncio.create_task(_relay("anomaly", monitoring.anomalies.subscribe)),
+        asyncio.create_task(_relay("fleet", fleet.subscribe)),
+        asyncio.create_task(_relay_state()),
+    ]
+    try:
+        await stop.wait()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        listener.close()
+        await gateway.stop()
+        await monitoring.shutdown_monitoring()
+        await runner.shutdown()
+        ring.close()
+        print("Bus worker stopped.")
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
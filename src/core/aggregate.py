@@ -0,0 +1,204 @@
+# src/core/aggregate.py
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+TIME_COLUMN = "time_passed"
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: str) -> float:
+    """'90' / '90s' / '10m' / '1h' -> seconds."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*", value)
+    if not match:
+        raise ValueError(f"Invalid duration: {value!r}")
+    seconds = float(match.group(1)) * DURATION_UNITS[match.group(2) or "s"]
+    if seconds <= 0:
+        raise ValueError("Duration must be positive")
+    return seconds
+
+
+def _numeric(values: list) -> Optional[np.ndarray]:
+    try:
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+
+
+def _head(path: str, size: int = 256) -> bytes:
+    """First bytes of a file; a new recording starts with a new timestamp."""
+    with open(path, "rb") as f:
+        return f.read(size)
+
+
+class ColumnStore:
+    """Numeric columns of recording files, parsed once and extended as they grow.
+
+    An entry belongs to one file: when the path is replaced (archived and
+    recreated) or truncated and rewritten, the entry starts over.
+    """
+
+    def __init__(self, max_files: int = 8):
+        self.max_files = max_files
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def get(self, path: str):
+        """Return (version, columns). The version changes whenever rows are added."""
+        with self._lock:
+            entry = self._entries.get(path)
+            st = os.stat(path)
+            identity = (st.st_dev, st.st_ino, _head(path))
+            if (
+                entry is None
+                or entry["identity"] != identity
+                or st.st_size < entry["offset"]
+            ):
+                self._generation += 1
+                entry = {
+                    "identity": identity,
+                    "generation": self._generation,
+                    "offset": 0,
+                    "rows": 0,
+                    "columns": {},
+                }
+            if st.st_size > entry["offset"]:
+                self._extend(path, entry)
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_files:
+                self._entries.popitem(last=False)
+            return (path, entry["generation"], entry["offset"]), entry["columns"]
+
+    def _extend(self, path: str, entry: dict):
+        with open(path, "rb") as f:
+            f.seek(entry["offset"])
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # only complete lines
+        if end == 0:
+            return
+        rows = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+        entry["offset"] += end
+        if not rows:
+            return
+
+        # Build a new dict so snapshots handed out earlier stay consistent
+        columns = dict(entry["columns"])
+        keys = list(columns) + [k for k in rows[0] if k not in columns]
+        for row in rows[1:]:
+            keys.extend(k for k in row if k not in keys)
+        for key in keys:
+            new = _numeric([row.get(key) for row in rows])
+            if new is None:
+                continue  # not a numeric channel
+            old = columns.get(key)
+            if old is None:
+                old = np.full(entry["rows"], np.nan)
+            columns[key] = np.concatenate([old, new])
+        entry["rows"] += len(rows)
+        for key, col in columns.items():
+            if len(col) < entry["rows"]:
+                pad = np.full(entry["rows"] - len(col), np.nan)
+                columns[key] = np.concatenate([col, pad])
+        entry["columns"] = columns
+
+
+def _to_json(values: np.ndarray) -> list:
+    return [None if v != v else v for v in values.tolist()]
+
+
+def aggregate(
+    columns: Dict[str, np.ndarray],
+    bucket: float,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    channels: Optional[Sequence[str]] = None,
+) -> dict:
+    """min/max/mean/last per channel over fixed buckets of time_passed.
+
+    Buckets are aligned to multiples of `bucket` from the start of the recording.
+    NaN samples (e.g. timeouts) are ignored.
+    """
+    t = columns.get(TIME_COLUMN)
+    if t is None:
+        t = np.empty(0)
+    if channels is None:
+        channels = [c for c in columns if c != TIME_COLUMN]
+    unknown = [c for c in channels if c not in columns]
+    if unknown:
+        raise KeyError(f"Unknown channels: {', '.join(unknown)}")
+
+    lo = 0 if start is None else int(np.searchsorted(t, start, "left"))
+    hi = len(t) if end is None else int(np.searchsorted(t, end, "right"))
+    t = t[lo:hi]
+
+    result = {"bucket": bucket, "start": [], "count": [], "channels": {}}
+    if len(t) == 0:
+        result["channels"] = {
+            c: {"min": [], "max": [], "mean": [], "last": []} for c in channels
+        }
+        return result
+
+    index = np.floor(t / bucket).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+    positions = np.arange(len(t))
+    result["start"] = (index[starts] * bucket).tolist()
+    result["count"] = np.diff(np.r_[starts, len(t)]).tolist()
+
+    for name in channels:
+        values = columns[name][lo:hi]
+        valid = ~np.isnan(values)
+        counts = np.add.reduceat(valid.astype(np.int64), starts)
+        sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+        last_valid = np.maximum.reduceat(np.where(valid, positions, -1), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(counts > 0, sums / counts, np.nan)
+        result["channels"][name] = {
+            "min": _to_json(np.fmin.reduceat(values, starts)),
+            "max": _to_json(np.fmax.reduceat(values, starts)),
+            "mean": _to_json(mean),
+            "last": _to_json(np.where(last_valid >= 0, values[last_valid], np.nan)),
+        }
+    return result
+
+
+class AggregateCache:
+    """LRU of aggregate results, keyed by data version and query."""
+
+    def __init__(self, store: ColumnStore, max_entries: int = 64):
+        self.store = store
+        self.max_entries = max_entries
+        self._results: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def query(
+        self,
+        path: str,
+        bucket: float,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        channels: Optional[List[str]] = None,
+    ) -> dict:
+        version, columns = self.store.get(path)
+        key = (version, bucket, start, end, tuple(channels) if channels else None)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+
+        result = aggregate(columns, bucket, start, end, channels)
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return result
+
+
+# Global Aggregation Cache
+aggregates = AggregateCache(ColumnStore())
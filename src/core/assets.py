@@ -0,0 +1,156 @@
+# src/core/assets.py
+import gzip
+import hashlib
+import mimetypes
+import os
+from typing import Dict, Optional, Tuple
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+from .config import STATIC_DIR
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+)
+MIN_COMPRESS_SIZE = 512
+
+
+class Asset:
+    def __init__(self, path: str, content: bytes):
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.content = content
+        self.digest = hashlib.sha256(content).hexdigest()[:12]
+        self.etag = f'"{self.digest}"'
+        self.gzip: Optional[bytes] = None
+        self.br: Optional[bytes] = None
+
+    def compress(self, full_path: str):
+        """Load precompressed siblings (name.gz / name.br) or build them now."""
+        if len(self.content) < MIN_COMPRESS_SIZE or not self.media_type.startswith(
+            COMPRESSIBLE_TYPES
+        ):
+            return
+        self.gzip = _read_if_exists(full_path + ".gz") or gzip.compress(
+            self.content, compresslevel=9, mtime=0
+        )
+        self.br = _read_if_exists(full_path + ".br")
+        if self.br is None and brotli is not None:
+            self.br = brotli.compress(self.content, quality=11)
+
+    def select(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """The smallest variant the client accepts; `br;q=0` refuses brotli."""
+        accepted = _parse_accept_encoding(accept_encoding)
+        best, best_q = (self.content, None), 0.0
+        for body, encoding in ((self.br, "br"), (self.gzip, "gzip")):
+            if body is None:
+                continue
+            q = accepted.get(encoding, accepted.get("*", 0.0))
+            if q > best_q:
+                best, best_q = (body, encoding), q
+        return best
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Content codings of an Accept-Encoding header and their q-values."""
+    accepted = {}
+    for item in header.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def _read_if_exists(path: str) -> Optional[bytes]:
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class AssetManifest:
+    """Content-hashed names for everything under STATIC_DIR.
+
+    `js/app.js` is published as `js/app.<hash>.js`, so it can be cached forever.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.urls: Dict[str, str] = {}  # logical path -> hashed path
+        self.files: Dict[str, Asset] = {}  # hashed path -> asset
+        self.build()
+
+    def build(self):
+        self.urls.clear()
+        self.files.clear()
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith((".gz", ".br")):
+                    continue
+                full_path = os.path.join(root, name)
+                path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    asset = Asset(path, f.read())
+                asset.compress(full_path)
+
+                stem, ext = os.path.splitext(path)
+                hashed = f"{stem}.{asset.digest}{ext}"
+                self.urls[path] = hashed
+                self.files[hashed] = asset
+
+    def static_url(self, path: str) -> str:
+        hashed = self.urls.get(path)
+        if hashed is not None:
+            return f"/static/{hashed}"
+        return f"/static/{path}"
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """Serves hashed asset names from memory with immutable caching and
+    precompressed bodies; plain names fall back to revalidated file responses."""
+
+    def __init__(self, *, manifest: AssetManifest, **kwargs):
+        super().__init__(**kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope) -> Response:
+        asset = self.manifest.files.get(path)
+        if asset is None:
+            response = await super().get_response(path, scope)
+            response.headers.setdefault("Cache-Control", "no-cache")
+            return response
+
+        body, encoding = asset.select(Headers(scope=scope).get("accept-encoding", ""))
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+            "ETag": asset.etag,
+            "Vary": "Accept-Encoding",
+        }
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type=asset.media_type, headers=headers)
+
+
+# Global Asset Manifest
+assets = AssetManifest(STATIC_DIR)
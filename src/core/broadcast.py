@@ -0,0 +1,80 @@
+# src/core/broadcast.py
+import asyncio
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Iterator, Optional, Set
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+KEEP_ALIVE = 15.0  # seconds of silence before an SSE comment line
+
+
+class Broadcaster:
+    """Fan-out of live messages to any number of subscribers.
+
+    Each subscriber has a bounded queue; a slow consumer loses its oldest
+    messages instead of holding up the publisher.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._queues: Set[asyncio.Queue] = set()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._queues)
+
+    def publish(self, message: Any):
+        for queue in self._queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    @contextmanager
+    def subscribe(self) -> Iterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(self.maxsize)
+        self._queues.add(queue)
+        try:
+            yield queue
+        finally:
+            self._queues.discard(queue)
+
+
+def sse_response(
+    request: Request,
+    subscribe: Callable[[], ContextManager[asyncio.Queue]],
+    filter: Optional[Callable[[Any], bool]] = None,
+    event_id: bool = False,
+    min_interval: float = 0.0,
+) -> StreamingResponse:
+    """Server-sent events with the messages of a subscription, as JSON.
+
+    `filter` drops messages, `event_id` sends each message's "id" as the
+    event id, and `min_interval` spaces messages out (the subscription's
+    queue decides which are dropped meanwhile).
+    """
+
+    async def events():
+        with subscribe() as queue:
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=KEEP_ALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if filter is not None and not filter(message):
+                    continue
+                sent = time.monotonic()
+                data = json.dumps(message, separators=(",", ":"))
+                if event_id:
+                    yield f"id: {message['id']}\ndata: {data}\n\n"
+                else:
+                    yield f"data: {data}\n\n"
+                if min_interval:
+                    await asyncio.sleep(
+                        max(min_interval - (time.monotonic() - sent), 0)
+                    )
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -0,0 +1,293 @@
+# src/core/bus.py
+"""Pieces shared by the bus worker process and the HTTP workers.
+
+SampleRing is a ring of recorded samples in shared memory. It has a single
+writer (the bus worker). Readers never lock: every slot carries a sequence
+number that is odd while the slot is being written and encodes which lap of
+the ring the slot holds, so a reader can tell a torn or overwritten slot from
+a good one and retry. One more slot after the ring holds the newest acquired
+sample, recorded or not. A restarted worker creates a new ring under the same
+name, with a new generation in the header; readers re-attach to it.
+
+BusClient stands in for Delta2 in the HTTP workers. It forwards method calls
+to the bus worker over a local connection, and opens the connection on which
+the worker relays its events and state.
+"""
+
+import math
+import threading
+import time
+from datetime import datetime
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client, Connection
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from . import timing
+from .config import BUS_AUTHKEY, BUS_RING_NAME, BUS_RING_SIZE
+from .delta_2 import Delta2
+from .quality import SampleQuality
+
+# Numeric sample fields held in the ring, in slot order
+RING_FIELDS = (
+    "time_passed",
+    "timestamp",  # epoch seconds
+    "temperature",
+    "setpoint",
+    "dynamic_setpoint",
+    "pattern",
+    "step",
+    "step_time_left",
+    "output1",
+    "output2",
+    "ct_current",
+    "heat_rate",
+    "error_sv",
+    "error_dsv",
+    "quality",  # index into QUALITIES
+)
+INT_FIELDS = {"pattern", "step", "step_time_left"}
+QUALITIES = list(SampleQuality)
+HEADER = 5  # magic, capacity, fields, head, generation
+MAGIC = 0x4B494C4E  # "KILN"
+
+
+class SampleRing:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((HEADER,), dtype=np.uint64, buffer=shm.buf)
+        capacity = int(self.header[1]) if not owner else None
+        if owner:
+            capacity = (shm.size // 8 - HEADER) // (len(RING_FIELDS) + 1) - 1
+        self.capacity = capacity
+        # Slot `capacity` holds the newest acquired sample
+        self.seq = np.ndarray(
+            (capacity + 1,), dtype=np.uint64, buffer=shm.buf, offset=HEADER * 8
+        )
+        self.data = np.ndarray(
+            (capacity + 1, len(RING_FIELDS)),
+            dtype=np.float64,
+            buffer=shm.buf,
+            offset=(HEADER + capacity + 1) * 8,
+        )
+
+    @classmethod
+    def create(cls, name: str = BUS_RING_NAME, capacity: int = BUS_RING_SIZE):
+        size = (HEADER + (capacity + 1) * (len(RING_FIELDS) + 1)) * 8
+        try:
+            # Left behind by a worker that did not exit cleanly
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        shm = shared_memory.SharedMemory(name, create=True, size=size)
+        ring = cls(shm, owner=True)
+        ring.seq[:] = 0
+        ring.header[1] = ring.capacity
+        ring.header[2] = len(RING_FIELDS)
+        ring.header[3] = 0
+        ring.header[4] = time.time_ns()
+        ring.header[0] = MAGIC
+        return ring
+
+    @classmethod
+    def attach(cls, name: str = BUS_RING_NAME):
+        # track=False: the resource tracker of a reader must not unlink it
+        shm = shared_memory.SharedMemory(name, track=False)
+        header = np.ndarray((HEADER,), dtype=np.uint64, buffer=shm.buf)
+        if header[0] != MAGIC or header[2] != len(RING_FIELDS):
+            shm.close()
+            raise RuntimeError(f"Shared memory {name} is not a sample ring")
+        return cls(shm, owner=False)
+
+    @property
+    def head(self) -> int:
+        """Number of samples written so far."""
+        return int(self.header[3])
+
+    @property
+    def generation(self) -> int:
+        """Tells rings created under the same name apart."""
+        return int(self.header[4])
+
+    def append(self, sample: dict):
+        k = self.head
+        i = k % self.capacity
+        row = [_encode(name, sample.get(name)) for name in RING_FIELDS]
+        self.seq[i] = 2 * (k // self.capacity) + 1  # writing
+        self.data[i] = row
+        self.seq[i] = 2 * (k // self.capacity) + 2  # holds sample k
+        self.header[3] = k + 1
+
+    def read(self, since: int, limit: Optional[int] = None) -> Tuple[List[dict], int]:
+        """Samples with index >= since, oldest first, and the index to pass
+        next time. Samples already overwritten are skipped."""
+        head = self.head
+        start = max(since, head - self.capacity)
+        if limit is not None:
+            head = min(head, start + limit)
+        samples = []
+        for k in range(start, head):
+            i = k % self.capacity
+            expected = 2 * (k // self.capacity) + 2
+            for _ in range(3):
+                before = int(self.seq[i])
+                row = self.data[i].copy()
+                if before == expected and int(self.seq[i]) == before:
+                    samples.append(_decode(row))
+                    break
+                if before > expected:
+                    break  # overwritten by a later lap
+        return samples, head
+
+    def set_latest(self, sample: dict):
+        i = self.capacity
+        version = int(self.seq[i])
+        self.seq[i] = version + 1  # writing
+        self.data[i] = [_encode(name, sample.get(name)) for name in RING_FIELDS]
+        self.seq[i] = version + 2
+
+    def latest(self) -> Optional[dict]:
+        """The newest acquired sample, or None before the first one."""
+        i = self.capacity
+        while True:
+            before = int(self.seq[i])
+            if before == 0:
+                return None
+            row = self.data[i].copy()
+            if before % 2 == 0 and int(self.seq[i]) == before:
+                return _decode(row)
+
+    def close(self):
+        if not hasattr(self, "data"):
+            return  # closed already
+        # Views into the buffer must go before it can be closed
+        del self.header, self.seq, self.data
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __del__(self):
+        # A reader replaced by re-attaching releases its mapping
+        if not self.owner:
+            self.close()
+
+
+def _encode(name: str, value) -> float:
+    if value is None:
+        return math.nan
+    if name == "timestamp":
+        return datetime.fromisoformat(value).timestamp()
+    if name == "quality":
+        return float(QUALITIES.index(SampleQuality(value)))
+    return float(value)
+
+
+def _decode(row: np.ndarray) -> dict:
+    sample = {}
+    for name, value in zip(RING_FIELDS, row.tolist()):
+        if math.isnan(value):
+            sample[name] = None
+        elif name == "timestamp":
+            sample[name] = datetime.fromtimestamp(value).isoformat()
+        elif name == "quality":
+            sample[name] = QUALITIES[int(value)].value
+        elif name in INT_FIELDS:
+            sample[name] = int(value)
+        else:
+            sample[name] = value
+    return sample
+
+
+class BusError(Exception):
+    """The bus worker could not be reached."""
+
+
+class BusClient:
+    """Delta2's methods, executed by the bus worker process.
+
+    Each thread keeps its own connection, so calls from the thread pool run
+    concurrently up to the worker (which serialises bus access as before).
+    """
+
+    def __init__(
+        self, address: str, authkey: bytes = BUS_AUTHKEY, ring_name: str = BUS_RING_NAME
+    ):
+        if not authkey:
+            raise BusError("Set KILN_BUS_AUTHKEY to the bus worker's key")
+        self.address = address
+        self.authkey = authkey
+        self.ring_name = ring_name
+        self._local = threading.local()
+        self._ring: Optional[SampleRing] = None
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            try:
+                conn = self._local.conn = Client(self.address, authkey=self.authkey)
+            except OSError as e:
+                raise BusError(f"Bus worker at {self.address} unreachable: {e}")
+        return conn
+
+    def _request(self, kind: str, name: str, *args, **kwargs):
+        conn = self._conn()
+        start = time.perf_counter()
+        try:
+            conn.send((kind, name, args, kwargs))
+            status, result = conn.recv()
+        except (OSError, EOFError) as e:
+            self._local.conn = None  # reconnect on the next call
+            raise BusError(f"Bus worker connection lost: {e}")
+        finally:
+            timing.record("bus_call", time.perf_counter() - start)
+        if status == "error":
+            raise result
+        return result
+
+    def command(self, name: str, *args):
+        """Run one of the bus worker's commands (see src/bus_worker.py)."""
+        return self._request("command", name, *args)
+
+    def subscribe(self) -> Connection:
+        """A new connection on which the worker pushes (kind, message) pairs:
+        its events, anomalies, fleet snapshots and recording state."""
+        try:
+            conn = Client(self.address, authkey=self.authkey)
+            conn.send(("subscribe", None, (), {}))
+        except OSError as e:
+            raise BusError(f"Bus worker at {self.address} unreachable: {e}")
+        return conn
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or not callable(getattr(Delta2, name, None)):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            return self._request("call", name, *args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+    @property
+    def ring(self) -> SampleRing:
+        if self._ring is None:
+            self._ring = SampleRing.attach(self.ring_name)
+        return self._ring
+
+    def reattach(self) -> bool:
+        """Switch to the worker's current ring if it was created anew (the
+        worker restarted). Returns True if the ring changed."""
+        try:
+            ring = SampleRing.attach(self.ring_name)
+        except (FileNotFoundError, RuntimeError):
+            return False  # the worker is down; keep the ring we have
+        if self._ring is not None and ring.generation == self._ring.generation:
+            ring.close()
+            return False
+        # Readers still holding the old ring keep it mapped until they let go
+        self._ring = ring
+        return True
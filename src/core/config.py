@@ -10,9 +10,168 @@ SLAVE_ADDRESS = 1
 DEFAULT_PORT_NAME = "/dev/ttyUSB0"
 DEFAULT_BAUDRATE = 38400
 TIMEOUT = 0.3
+# Register writes wait this long (seconds) for newer values of the same register
+WRITE_COALESCE_WINDOW = 0.1
+# Configuration registers are served from the last read for this long (seconds)
+REGISTER_CACHE_MAX_AGE = 5.0
 
 # Monitoring Configuration
+# Sampling period in seconds, adjustable per recording within the limits below
+SAMPLE_PERIOD = 1.0
+MIN_SAMPLE_PERIOD = 0.25
+MAX_SAMPLE_PERIOD = 60.0
+# A failed read may repeat the last good value (flagged "stale") for this long
+SAMPLE_STALE_LIMIT = 5.0
+# Between recordings the controller is still sampled every MONITOR_PERIOD
+# seconds, so anomaly detectors keep watching an idle or unrecorded firing
+MONITOR_PERIOD = 5.0
+# Window of the rolling regression behind the heat_rate channel (seconds)
+HEAT_RATE_WINDOW = 300.0
 RECORDING_FILE = "recording.txt"
+# Finished recordings are archived here, one <session_id>.jsonl per firing
+RECORDINGS_DIR = os.path.join(BASE_DIR, "recordings")
+# Samples are written in groups: at most every RECORDING_COMMIT_INTERVAL seconds,
+# or as soon as RECORDING_BATCH_SIZE samples are pending. fsync runs at most
+# every RECORDING_FSYNC_INTERVAL seconds (0 = on every commit), which bounds
+# what a power loss can take.
+RECORDING_BATCH_SIZE = 100
+RECORDING_COMMIT_INTERVAL = 1.0
+RECORDING_FSYNC_INTERVAL = 5.0
+
+# Thermal model identification
+# Fitted models are stored per kiln name, so one file can serve several kilns
+KILN_NAME = "kiln"
+THERMAL_MODELS_FILE = os.path.join(BASE_DIR, "thermal_models.json")
+# Recordings are averaged into buckets of this many seconds before fitting
+THERMAL_FIT_STEP = 30.0
+# Longest dead time (seconds) searched between output and temperature response
+THERMAL_MAX_DEAD_TIME = 900.0
+# Used until a model has been fitted for KILN_NAME (see thermal.py for units)
+THERMAL_DEFAULT_MODEL = {
+    "model": "first_order_dead_time",
+    "heat_gain": 0.004,
+    "loss_rate": 0.0003,
+    "ambient": 20.0,
+    "dead_time": 120.0,
+}
+
+# Firing simulator
+SIMULATION_STEP = 1.0
+# Linked programs that loop are cut off after this many seconds
+SIMULATION_MAX_DURATION = 3 * 24 * 3600.0
+
+# PID tuning: candidates are scored on a ramp at TUNING_RAMP_RATE (deg/h) to
+# the target, then a hold of TUNING_HOLD seconds. Settled means within
+# TUNING_SETTLE_BAND degrees of the setpoint for the rest of the hold.
+TUNING_RAMP_RATE = 200.0
+TUNING_HOLD = 3600.0
+TUNING_SETTLE_BAND = 2.0
+# Cost = overshoot (deg) + settling time (min) + tracking RMS (deg), weighted
+TUNING_WEIGHTS = {"overshoot": 1.0, "settling": 0.1, "tracking": 1.0}
+
+# Host-side profile runner: SV is recomputed every PROFILE_TICK seconds and
+# progress saved every PROFILE_SAVE_INTERVAL seconds for restart recovery
+PROFILE_TICK = 1.0
+PROFILE_SAVE_INTERVAL = 30.0
+PROFILE_STATE_FILE = os.path.join(BASE_DIR, "profile_state.json")
+
+# Anomaly detectors (see detectors.py). A condition must hold DETECT_HOLD
+# seconds before it is raised.
+DETECT_HOLD = 300.0
+# PV moving less than this (deg) at 100 % output counts as flat
+DETECT_FLATLINE_BAND = 1.0
+# PV rising more than this (deg) at 0 % output, heat soak included
+DETECT_RISE_LIMIT = 15.0
+# Faster PV changes (deg/min) than any kiln can make
+DETECT_SPIKE_RATE = 100.0
+# Allowed PV distance from the dynamic set value (deg)
+DETECT_DIVERGENCE_BAND = 50.0
+# Lowest CT current (A) expected at 100 % output
+DETECT_CT_MIN_CURRENT = 1.0
+# Read the CT current (102DH) with every sample; disable without a CT input
+READ_CT_CURRENT = True
+
+# Status events (see events.py): read LED/alarm/event/RUN bits with every
+# sample and report their transitions
+STATUS_EVENTS = True
+# Webhook URLs that receive every event as a JSON POST
+EVENT_WEBHOOKS = []
+EVENT_WEBHOOK_TIMEOUT = 5.0
+# Events kept for GET /events and queued per webhook
+EVENT_HISTORY = 256
+# Every event is also appended to this SQLite log, at most EVENT_LOG_BATCH
+# rows per transaction
+EVENT_LOG_FILE = os.path.join(BASE_DIR, "events.sqlite3")
+EVENT_LOG_BATCH = 500
+
+# Fleet overview: other kiln servers to follow, name -> base URL. Each is
+# long-polled with FLEET_POLL_WAIT; unreachable ones are retried after
+# FLEET_PEER_RETRY seconds.
+FLEET_PEERS = {}
+FLEET_POLL_WAIT = 25.0
+FLEET_PEER_RETRY = 5.0
+# Minimum interval between /fleet/stream messages (seconds)
+FLEET_STREAM_INTERVAL = 1.0
+
+# Bus worker (see bus_worker.py). When KILN_BUS_ADDRESS is set, HTTP workers
+# do not open the serial port but forward to the bus worker listening there
+# (a Unix socket path), and read recorded samples from its shared ring.
+# KILN_BUS_AUTHKEY is required: a secret shared by the worker and the HTTP
+# workers (e.g. `openssl rand -hex 16`).
+BUS_WORKER_ADDRESS = os.environ.get("KILN_BUS_ADDRESS")
+BUS_AUTHKEY = os.environ.get("KILN_BUS_AUTHKEY", "").encode()
+BUS_RING_NAME = "kiln_samples"
+BUS_RING_SIZE = 86400  # samples, a day at 1 Hz
+# How often sample streams look for new samples in the ring (seconds)
+BUS_POLL_INTERVAL = 0.1
+# Events and state the bus worker relays to each HTTP worker: messages queued
+# per HTTP worker, and seconds between reconnects when the relay is lost
+BUS_RELAY_QUEUE = 1000
+BUS_RELAY_RETRY = 5.0
+# Newest samples older than this (seconds) are not served from shared memory:
+# the worker is down, or has restarted with a new ring
+BUS_SAMPLE_MAX_AGE = 2 * MONITOR_PERIOD
+
+# Bus traces (see trace.py). Set KILN_BUS_TRACE to a file to capture every
+# frame from startup; traces started over HTTP are written to TRACES_DIR.
+# With KILN_BUS_REPLAY set, the controller is replaced by a recorded trace,
+# answered BUS_REPLAY_SPEED times faster than recorded (0 = at once).
+TRACES_DIR = os.path.join(BASE_DIR, "traces")
+BUS_TRACE_FILE = os.environ.get("KILN_BUS_TRACE")
+BUS_REPLAY_FILE = os.environ.get("KILN_BUS_REPLAY")
+BUS_REPLAY_SPEED = float(os.environ.get("KILN_BUS_REPLAY_SPEED", "1.0"))
+
+# Modbus TCP gateway (see modbus_gateway.py): other tools reach the controller
+# through the service on this port (0 = off) instead of opening the serial
+# port. Each client address may put MODBUS_GATEWAY_RATE requests per second on
+# the bus, in bursts of up to MODBUS_GATEWAY_BURST. Reads of values younger
+# than MODBUS_GATEWAY_CACHE_AGE seconds are answered from cache and are free.
+# It listens on localhost; set KILN_MODBUS_HOST=0.0.0.0 to serve the LAN.
+MODBUS_GATEWAY_HOST = os.environ.get("KILN_MODBUS_HOST", "127.0.0.1")
+MODBUS_GATEWAY_PORT = int(os.environ.get("KILN_MODBUS_PORT", "0"))
+MODBUS_GATEWAY_RATE = 5.0
+MODBUS_GATEWAY_BURST = 10
+MODBUS_GATEWAY_CACHE_AGE = 1.0
+
+# Request timing (see timing.py): send the per-request breakdown as a
+# Server-Timing header, and keep the last TIMING_WINDOW requests per route
+# for /debug/timings
+SERVER_TIMING = True
+TIMING_WINDOW = 500
+
+# Admin endpoints (profiling) require this token, sent as
+# "Authorization: Bearer <token>"; they are disabled while it is unset
+ADMIN_TOKEN = os.environ.get("KILN_ADMIN_TOKEN")
+# Profiling sessions (see profiler.py) last at most PROFILER_MAX_SECONDS. The
+# stack sampler takes a sample every PROFILER_SAMPLE_INTERVAL seconds, less
+# often if that would cost more than PROFILER_MAX_OVERHEAD of a CPU core.
+# cProfile traces every call and its overhead has no bound (it can slow a busy
+# process several times over), so its sessions last at most
+# PROFILER_MAX_CPROFILE_SECONDS.
+PROFILER_MAX_SECONDS = 300.0
+PROFILER_MAX_CPROFILE_SECONDS = 30.0
+PROFILER_SAMPLE_INTERVAL = 0.01
+PROFILER_MAX_OVERHEAD = 0.02
 
 # For separate service mode (client-server communication)
 KILN_SERVER_URL = "http://localhost:8000"
@@ -1,7 +1,15 @@
+from contextlib import contextmanager
 from enum import IntEnum
 
 import minimalmodbus
 import threading
+import time
+
+from . import timing
+from .registers import BIT, REGISTER, RegisterCache, WriteBatch, plan_blocks
+from .scheduler import PriorityLock
+from .trace import TraceWriter, new_trace_path
+from .write_queue import WriteCoalescer
 
 
 class ControlMethod(IntEnum):
@@ -100,34 +108,235 @@ class Delta2(minimalmodbus.Instrument):
     # Pattern start addresses
     PATTERN_TEMP_START = 0x2000
     PATTERN_TIME_START = 0x2080
+    # Writes here change which parameter set 1009H-100BH address, so writes
+    # must not be coalesced across them
+    BARRIER_REGISTERS = frozenset({0x101C})
+    # Writes here change what (or in which scale) other registers read back:
+    # PID set selection, sensor type, temperature unit and decimal point
+    RESCALING_WRITES = frozenset(
+        {(REGISTER, 0x101C), (REGISTER, 0x1004), (BIT, 0x0811), (BIT, 0x0812)}
+    )
+
+    # Bits of get_status_snapshot()
+    STATUS_BITS = {
+        "event1": 0x080C,
+        "event2": 0x080D,
+        "system_alarm": 0x080E,
+        "at": 0x0813,
+        "run": 0x0814,
+    }
 
     def __init__(self, portname, slaveaddress):
         minimalmodbus.Instrument.__init__(self, portname, slaveaddress)
-        self.lock = threading.Lock()
+        self.lock = PriorityLock()  # bus access, service before gateway clients
+        self.writes = WriteCoalescer()
+        self.cache = RegisterCache()
+        self._local = threading.local()  # batch of verified_writes(), per thread
+        self.trace = None  # TraceWriter while a bus trace is captured
+
+    def _communicate(self, request, number_of_bytes_to_read):
+        trace = self.trace
+        response = b""  # recorded as unanswered if no response arrives
+        sent = time.monotonic()
+        try:
+            response = super()._communicate(request, number_of_bytes_to_read)
+            return response
+        finally:
+            received = time.monotonic()
+            timing.record("bus_io", received - sent)
+            if trace is not None:
+                trace.record(sent, received, request, response)
+
+    def start_trace(self, path=None):
+        """Capture every frame exchanged from now on (see trace.py)."""
+        with self.lock:
+            if self.trace is not None:
+                raise RuntimeError(f"Bus trace already running: {self.trace.path}")
+            self.trace = TraceWriter(path or new_trace_path())
+            return self.trace.status()
+
+    def stop_trace(self):
+        with self.lock:
+            trace, self.trace = self.trace, None
+        if trace is None:
+            raise RuntimeError("No bus trace running")
+        trace.close()
+        return trace.status()
+
+    def trace_status(self):
+        trace = self.trace
+        status = {"tracing": trace is not None}
+        if trace is not None:
+            status.update(trace.status())
+        if hasattr(self.serial, "status"):
+            status["replay"] = self.serial.status()
+        return status
 
     def read_register(
         self, registeraddress, number_of_decimals=0, functioncode=3, signed=False
     ):
+        if functioncode == 3:
+            raw = self.cache.get(REGISTER, registeraddress)
+            if raw is not None:
+                if signed and raw >= 0x8000:
+                    raw -= 0x10000
+                return raw / 10**number_of_decimals if number_of_decimals else raw
         with self.lock:
-            return super().read_register(
+            value = super().read_register(
                 registeraddress, number_of_decimals, functioncode, signed
             )
+        if functioncode == 3:
+            raw = round(value * 10**number_of_decimals) & 0xFFFF
+            self.cache.update(REGISTER, registeraddress, [raw])
+        return value
+
+    def read_registers(self, registeraddress, number_of_registers, functioncode=3):
+        """Always read from the device; refreshes the cache for the block."""
+        with self.lock:
+            values = super().read_registers(
+                registeraddress, number_of_registers, functioncode
+            )
+        if functioncode == 3:
+            self.cache.update(REGISTER, registeraddress, values)
+        return values
+
+    def _invalidate(self, kind, registeraddress):
+        if (kind, registeraddress) in self.RESCALING_WRITES:
+            self.cache.clear()
+        else:
+            self.cache.invalidate(kind, registeraddress)
+
+    def submit_write(
+        self, registeraddress, value, number_of_decimals=0, functioncode=6, signed=False
+    ):
+        """Queue a register write through the coalescer. Returns a Future that
+        resolves with the value written, which may come from a later call.
+        The write takes the bus at the caller's lock priority (that of the
+        last caller, when writes to the register are merged)."""
+        applied = round(value * 10**number_of_decimals) / 10**number_of_decimals
+        priority = self.lock.current()
+
+        def write():
+            with self.lock.priority(priority), self.lock:
+                super(Delta2, self).write_register(
+                    registeraddress, value, number_of_decimals, functioncode, signed
+                )
+            self._invalidate(REGISTER, registeraddress)
+
+        self._invalidate(REGISTER, registeraddress)
+        future = self.writes.submit(
+            (registeraddress, functioncode),
+            applied if number_of_decimals else int(applied),
+            write,
+            barrier=registeraddress in self.BARRIER_REGISTERS,
+        )
+        batch = getattr(self._local, "batch", None)
+        if batch is not None:
+            raw = round(value * 10**number_of_decimals) & 0xFFFF
+            batch.add(REGISTER, registeraddress, raw, future)
+        return future
 
     def write_register(
         self, registeraddress, value, number_of_decimals=0, functioncode=6, signed=False
     ):
-        with self.lock:
-            return super().write_register(
-                registeraddress, value, number_of_decimals, functioncode, signed
-            )
+        """Write and wait. Returns the value applied to the register.
+        Inside verified_writes() the write is only queued."""
+        future = self.submit_write(
+            registeraddress, value, number_of_decimals, functioncode, signed
+        )
+        if getattr(self._local, "batch", None) is not None:
+            applied = round(value * 10**number_of_decimals) / 10**number_of_decimals
+            return applied if number_of_decimals else int(applied)
+        return future.result()
 
     def read_bit(self, registeraddress, functioncode=2):
+        if functioncode == 2:
+            raw = self.cache.get(BIT, registeraddress)
+            if raw is not None:
+                return raw
         with self.lock:
-            return super().read_bit(registeraddress, functioncode)
+            value = super().read_bit(registeraddress, functioncode)
+        if functioncode == 2:
+            self.cache.update(BIT, registeraddress, [value])
+        return value
 
-    def write_bit(self, registeraddress, value, functioncode=5):
+    def read_bits(self, registeraddress, number_of_bits, functioncode=2):
+        """Always read from the device; refreshes the cache for the block."""
         with self.lock:
-            return super().write_bit(registeraddress, value, functioncode)
+            values = super().read_bits(registeraddress, number_of_bits, functioncode)
+        if functioncode == 2:
+            self.cache.update(BIT, registeraddress, values)
+        return values
+
+    def write_bit(self, registeraddress, value, functioncode=5):
+        batch = getattr(self._local, "batch", None)
+        if batch is not None:
+            # Register writes of the batch wait in the coalescer; they go out
+            # first, so the bus sees the writes in call order
+            batch.flush()
+            batch.add(BIT, registeraddress, int(bool(value)))
+        try:
+            with self.lock:
+                return super().write_bit(registeraddress, value, functioncode)
+        except Exception as e:
+            if batch is None:
+                raise
+            batch.writes[-1]["error"] = str(e)  # reported with the read-back
+        finally:
+            self._invalidate(BIT, registeraddress)
+
+    @contextmanager
+    def verified_writes(self):
+        """Collect the writes made in the block (from this thread), then read
+        back all affected registers and bits in as few block reads as possible.
+        Yields a WriteBatch; call batch.mark(name) after each field's writes.
+        batch.results holds, per field, whether every register kept its value.
+        Registers whose block read fails are reported as unverified. The
+        read-back also refreshes the register cache.
+        """
+        batch = WriteBatch()
+        self._local.batch = batch
+        try:
+            yield batch
+        finally:
+            self._local.batch = None
+
+        batch.flush()
+
+        readback = {}
+        for kind, read in ((REGISTER, self.read_registers), (BIT, self.read_bits)):
+            addresses = [w["address"] for w in batch.writes if w["kind"] == kind]
+            for start, count in plan_blocks(addresses):
+                try:
+                    values = read(start, count)
+                except (minimalmodbus.ModbusException, OSError) as e:
+                    for address in range(start, start + count):
+                        batch.unread[(kind, address)] = str(e)
+                    continue
+                for offset, value in enumerate(values):
+                    readback[(kind, start + offset)] = int(value)
+        batch.check(readback)
+
+    def apply_settings(self, calls, verify=False):
+        """Run setter calls, given as (field, method name, value), in order.
+        With verify, they are checked by one read-back (see verified_writes).
+        """
+        if not verify:
+            for _, method, value in calls:
+                getattr(self, method)(value)
+            return {"status": "ok", "fields": [field for field, _, _ in calls]}
+
+        with self.verified_writes() as batch:
+            for field, method, value in calls:
+                getattr(self, method)(value)
+                batch.mark(field)
+        if not batch.ok:
+            status = "mismatch"
+        elif not batch.verified:
+            status = "unverified"
+        else:
+            status = "ok"
+        return {"status": status, "fields": batch.results}
 
     # =========================================================================
     # 5. Address and Content of Data Register
@@ -142,9 +351,14 @@ class Delta2(minimalmodbus.Instrument):
         """Read Set point (SV). Unit is 0.1, deg C or deg F."""
         return self.read_register(0x1001, 1)
 
+    def get_pv_and_setpoint(self):
+        """Read PV and SV (1000H-1001H) in one transaction. Returns (pv, sv)."""
+        pv, sv = self.read_registers(0x1000, 2)
+        return pv / 10.0, sv / 10.0
+
     def set_setpoint(self, value):
         """Write Set point (SV). Unit is 0.1, deg C or deg F."""
-        self.write_register(0x1001, value, 1)
+        return self.write_register(0x1001, value, 1)
 
     def get_upper_limit_temp_range(self):
         """Read Upper-limit of temperature range."""
@@ -152,7 +366,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_upper_limit_temp_range(self, value):
         """Write Upper-limit of temperature range."""
-        self.write_register(0x1002, value, 1)
+        return self.write_register(0x1002, value, 1)
 
     def get_lower_limit_temp_range(self):
         """Read Lower-limit of temperature range."""
@@ -160,7 +374,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_lower_limit_temp_range(self, value):
         """Write Lower-limit of temperature range."""
-        self.write_register(0x1003, value, 1)
+        return self.write_register(0x1003, value, 1)
 
     def get_sensor_type(self):
         """Read Input temperature sensor type."""
@@ -168,7 +382,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_sensor_type(self, value):
         """Write Input temperature sensor type."""
-        self.write_register(0x1004, value)
+        return self.write_register(0x1004, value)
 
     def get_control_method(self):
         """Read Control method. 0: PID, 1: ON/OFF, 2: Manual tuning, 3: PID program control."""
@@ -176,7 +390,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_control_method(self, value):
         """Write Control method. 0: PID, 1: ON/OFF, 2: Manual tuning, 3: PID program control."""
-        self.write_register(0x1005, int(value))
+        return self.write_register(0x1005, int(value))
 
     def get_heating_cooling_selection(self):
         """Read Heating/Cooling selection. 0: Heating, 1: Cooling, 2: Heating/Cooling, 3: Cooling/Heating."""
@@ -184,7 +398,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_heating_cooling_selection(self, value):
         """Write Heating/Cooling selection. 0: Heating, 1: Cooling, 2: Heating/Cooling, 3: Cooling/Heating."""
-        self.write_register(0x1006, int(value))
+        return self.write_register(0x1006, int(value))
 
     def get_heating_cooling_cycle_1(self):
         """Read 1st group Heating/Cooling cycle. 0-99."""
@@ -192,7 +406,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_heating_cooling_cycle_1(self, value):
         """Write 1st group Heating/Cooling cycle. 0-99."""
-        self.write_register(0x1007, value)
+        return self.write_register(0x1007, value)
 
     def get_heating_cooling_cycle_2(self):
         """Read 2nd group Heating/Cooling cycle. 0-99."""
@@ -200,7 +414,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_heating_cooling_cycle_2(self, value):
         """Write 2nd group Heating/Cooling cycle. 0-99."""
-        self.write_register(0x1008, value)
+        return self.write_register(0x1008, value)
 
     def get_proportional_band(self):
         """Read PB Proportional band. 0.1 ~ 999.9."""
@@ -208,7 +422,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_proportional_band(self, value):
         """Write PB Proportional band. 0.1 ~ 999.9."""
-        self.write_register(0x1009, value, 1)
+        return self.write_register(0x1009, value, 1)
 
     def get_integral_time(self):
         """Read Ti Integral time. 0 ~ 9,999."""
@@ -222,7 +436,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_integral_time(self, value):
         """Write Ti Integral time. 0 ~ 9,999."""
-        self.write_register(0x100A, value, 1)
+        return self.write_register(0x100A, value, 1)
 
     def get_derivative_time(self):
         """Read Td Derivative time. 0 ~ 9,999."""
@@ -230,7 +444,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_derivative_time(self, value):
         """Write Td Derivative time. 0 ~ 9,999."""
-        self.write_register(0x100B, value, 1)
+        return self.write_register(0x100B, value, 1)
 
     def get_integration_default(self):
         """Read Integration default. 0 ~ 100%, unit is 0.1%."""
@@ -238,7 +452,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_integration_default(self, value):
         """Write Integration default. 0 ~ 100%, unit is 0.1%."""
-        self.write_register(0x100C, value, 1)
+        return self.write_register(0x100C, value, 1)
 
     def get_pd_control_offset(self):
         """Read PD control offset (when Ti=0). 0 ~ 100%, unit is 0.1%."""
@@ -246,7 +460,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_pd_control_offset(self, value):
         """Write PD control offset (when Ti=0). 0 ~ 100%, unit is 0.1%."""
-        self.write_register(0x100D, value, 1)
+        return self.write_register(0x100D, value, 1)
 
     def get_coef_setting(self):
         """Read COEF setting (Dual Loop). 0.01 ~ 99.99."""
@@ -254,7 +468,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_coef_setting(self, value):
         """Write COEF setting (Dual Loop). 0.01 ~ 99.99."""
-        self.write_register(0x100E, value, 2)
+        return self.write_register(0x100E, value, 2)
 
     def get_dead_band_setting(self):
         """Read Dead band setting (Dual Loop). -999 ~ 9,999."""
@@ -262,7 +476,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_dead_band_setting(self, value):
         """Write Dead band setting (Dual Loop). -999 ~ 9,999."""
-        self.write_register(0x100F, value)
+        return self.write_register(0x100F, value)
 
     def get_hysteresis_output_1(self):
         """Read Hysteresis (1st output group). 0 ~ 9,999."""
@@ -270,7 +484,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_hysteresis_output_1(self, value):
         """Write Hysteresis (1st output group). 0 ~ 9,999."""
-        self.write_register(0x1010, value)
+        return self.write_register(0x1010, value)
 
     def get_hysteresis_output_2(self):
         """Read Hysteresis (2nd output group). 0 ~ 9,999."""
@@ -278,7 +492,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_hysteresis_output_2(self, value):
         """Write Hysteresis (2nd output group). 0 ~ 9,999."""
-        self.write_register(0x1011, value)
+        return self.write_register(0x1011, value)
 
     def get_output_1_value(self):
         """Read Output 1 Value. Unit is 0.1%."""
@@ -286,7 +500,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_output_1_value(self, value):
         """Write Output 1 Value. Write valid under manual tuning mode only."""
-        self.write_register(0x1012, value, 1)
+        return self.write_register(0x1012, value, 1)
 
     def get_output_2_value(self):
         """Read Output 2 Value. Unit is 0.1%."""
@@ -294,7 +508,12 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_output_2_value(self, value):
         """Write Output 2 Value. Write valid under manual tuning mode only."""
-        self.write_register(0x1013, value, 1)
+        return self.write_register(0x1013, value, 1)
+
+    def get_output_values(self):
+        """Read Output 1 and 2 (1012H-1013H) in one transaction. Returns (out1, out2)."""
+        out1, out2 = self.read_registers(0x1012, 2)
+        return out1 / 10.0, out2 / 10.0
 
     def get_upper_limit_analog(self):
         """Read Upper-limit analog regulation."""
@@ -302,7 +521,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_upper_limit_analog(self, value):
         """Write Upper-limit analog regulation."""
-        self.write_register(0x1014, value)
+        return self.write_register(0x1014, value)
 
     def get_lower_limit_analog(self):
         """Read Lower-limit analog regulation."""
@@ -310,7 +529,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_lower_limit_analog(self, value):
         """Write Lower-limit analog regulation."""
-        self.write_register(0x1015, value)
+        return self.write_register(0x1015, value)
 
     def get_temperature_regulation_value(self):
         """Read Temperature regulation value. -999 ~ +999, unit: 0.1."""
@@ -318,7 +537,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_temperature_regulation_value(self, value):
         """Write Temperature regulation value. -999 ~ +999, unit: 0.1."""
-        self.write_register(0x1016, value, 1)
+        return self.write_register(0x1016, value, 1)
 
     def get_analog_decimal_setting(self):
         """Read Analog decimal setting. 0 ~ 3."""
@@ -326,7 +545,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_analog_decimal_setting(self, value):
         """Write Analog decimal setting. 0 ~ 3."""
-        self.write_register(0x1017, int(value))
+        return self.write_register(0x1017, int(value))
 
     def get_valve_time(self):
         """Read Valve time (Open to Close). 0.1 ~ 999.9."""
@@ -334,7 +553,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_valve_time(self, value):
         """Write Valve time (Open to Close). 0.1 ~ 999.9."""
-        self.write_register(0x1018, value, 1)
+        return self.write_register(0x1018, value, 1)
 
     def get_valve_dead_band(self):
         """Read Valve Dead Band. 0 ~ 100%; unit: 0.1%."""
@@ -342,7 +561,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_valve_dead_band(self, value):
         """Write Valve Dead Band. 0 ~ 100%; unit: 0.1%."""
-        self.write_register(0x1019, value, 1)
+        return self.write_register(0x1019, value, 1)
 
     def get_valve_feedback_upper_limit(self):
         """Read Valve feedback upper-limit. 0 ~ 1,024."""
@@ -350,7 +569,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_valve_feedback_upper_limit(self, value):
         """Write Valve feedback upper-limit. 0 ~ 1,024."""
-        self.write_register(0x101A, value)
+        return self.write_register(0x101A, value)
 
     def get_valve_feedback_lower_limit(self):
         """Read Valve feedback lower-limit. 0 ~ 1,024."""
@@ -358,7 +577,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_valve_feedback_lower_limit(self, value):
         """Write Valve feedback lower-limit. 0 ~ 1,024."""
-        self.write_register(0x101B, value)
+        return self.write_register(0x101B, value)
 
     def get_pid_parameter_selection(self):
         """Read PID parameter selection. 0 ~ 4."""
@@ -366,7 +585,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_pid_parameter_selection(self, value):
         """Write PID parameter selection. 0 ~ 4."""
-        self.write_register(0x101C, int(value))
+        return self.write_register(0x101C, int(value))
 
     def get_sv_value_corresponded_to_pid(self):
         """Read SV value corresponded to PID. Unit: 0.1."""
@@ -378,7 +597,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_alarm_1_type(self, value):
         """Write Alarm 1 type."""
-        self.write_register(0x1020, value)
+        return self.write_register(0x1020, value)
 
     def get_alarm_2_type(self):
         """Read Alarm 2 type."""
@@ -386,7 +605,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_alarm_2_type(self, value):
         """Write Alarm 2 type."""
-        self.write_register(0x1021, value)
+        return self.write_register(0x1021, value)
 
     def get_alarm_3_type(self):
         """Read Alarm 3 type."""
@@ -394,7 +613,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_alarm_3_type(self, value):
         """Write Alarm 3 type."""
-        self.write_register(0x1022, value)
+        return self.write_register(0x1022, value)
 
     def get_system_alarm_setting(self):
         """Read System alarm setting. 0: None (default), 1-3: Set Alarm 1 to Alarm 3."""
@@ -402,7 +621,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_system_alarm_setting(self, value):
         """Write System alarm setting. 0: None (default), 1-3: Set Alarm 1 to Alarm 3."""
-        self.write_register(0x1023, int(value))
+        return self.write_register(0x1023, int(value))
 
     def get_upper_limit_alarm_1(self):
         """Read Upper-limit alarm 1."""
@@ -410,7 +629,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_upper_limit_alarm_1(self, value):
         """Write Upper-limit alarm 1."""
-        self.write_register(0x1024, value)
+        return self.write_register(0x1024, value)
 
     def get_lower_limit_alarm_1(self):
         """Read Lower-limit alarm 1."""
@@ -418,7 +637,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_lower_limit_alarm_1(self, value):
         """Write Lower-limit alarm 1."""
-        self.write_register(0x1025, value)
+        return self.write_register(0x1025, value)
 
     def get_upper_limit_alarm_2(self):
         """Read Upper-limit alarm 2."""
@@ -426,7 +645,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_upper_limit_alarm_2(self, value):
         """Write Upper-limit alarm 2."""
-        self.write_register(0x1026, value)
+        return self.write_register(0x1026, value)
 
     def get_lower_limit_alarm_2(self):
         """Read Lower-limit alarm 2."""
@@ -434,7 +653,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_lower_limit_alarm_2(self, value):
         """Write Lower-limit alarm 2."""
-        self.write_register(0x1027, value)
+        return self.write_register(0x1027, value)
 
     def get_upper_limit_alarm_3(self):
         """Read Upper-limit alarm 3."""
@@ -442,7 +661,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_upper_limit_alarm_3(self, value):
         """Write Upper-limit alarm 3."""
-        self.write_register(0x1028, value)
+        return self.write_register(0x1028, value)
 
     def get_lower_limit_alarm_3(self):
         """Read Lower-limit alarm 3."""
@@ -450,7 +669,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_lower_limit_alarm_3(self, value):
         """Write Lower-limit alarm 3."""
-        self.write_register(0x1029, value)
+        return self.write_register(0x1029, value)
 
     def get_led_status(self):
         """Read LED status.
@@ -470,12 +689,34 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_setting_lock_status(self, value):
         """Write Setting lock status."""
-        self.write_register(0x102C, int(value))
+        return self.write_register(0x102C, int(value))
 
     def get_ct_read_value(self):
         """Read CT read value. Unit: 0.1A."""
         return self.read_register(0x102D, 1)
 
+    def get_status_snapshot(self):
+        """Read LED, key and lock status and CT current (102AH-102DH) in one
+        transaction, plus the event, system alarm, AT and RUN/STOP bits.
+        """
+        led, _, _, ct = self.read_registers(0x102A, 4)
+        bits = {}
+        for start, count in plan_blocks(self.STATUS_BITS.values()):
+            for offset, value in enumerate(self.read_bits(start, count)):
+                bits[start + offset] = value
+        status = {
+            name: bool(bits[address]) for name, address in self.STATUS_BITS.items()
+        }
+        status.update(
+            {
+                "alarm1": bool(led & 0x10),
+                "alarm2": bool(led & 0x02),
+                "alarm3": bool(led & 0x01),
+                "ct_current": ct / 10.0,
+            }
+        )
+        return status
+
     def get_firmware_version(self):
         """Read Software version. V1.00 indicates 0x100."""
         return self.read_register(0x102F)
@@ -486,7 +727,7 @@ class Delta2(minimalmodbus.Instrument):
 
     def set_start_pattern_number(self, value):
         """Write Start pattern number. 0-7."""
-        self.write_register(0x1030, value)
+        return self.write_register(0x1030, value)
 
     def get_executing_step_time_left(self):
         """Read step time left. Returns tuple (min, sec) or total seconds, depending on preference.
@@ -519,6 +760,19 @@ class Delta2(minimalmodbus.Instrument):
         """Read dynamic set value."""
         return self.read_register(0x1036, 1)  # Assuming unit 0.1 same as PV/SV
 
+    def get_program_position(self):
+        """Read step time left, executing step/pattern and dynamic set value
+        (1032H-1036H) in one transaction.
+        """
+        sec, minutes, step, pattern, dynamic = self.read_registers(0x1032, 5)
+        return {
+            "time_left_sec": sec,
+            "time_left_min": minutes,
+            "step": step,
+            "pattern": pattern,
+            "dynamic_set_value": dynamic / 10.0,
+        }
+
     def get_actual_step_number_setting(self, pattern_index):
         """Read Actual step No. setting for pattern 0-7.
         Address 1040H - 1047H.
@@ -531,7 +785,7 @@ class Delta2(minimalmodbus.Instrument):
         """Write Actual step No. setting for pattern 0-7."""
         if not 0 <= pattern_index <= 7:
             raise ValueError("Pattern index must be between 0 and 7")
-        self.write_register(0x1040 + pattern_index, value)
+        return self.write_register(0x1040 + pattern_index, value)
 
     def get_cycle_number(self, pattern_index):
         """Read Cycle number for pattern 0-7.
@@ -545,7 +799,7 @@ class Delta2(minimalmodbus.Instrument):
         """Write Cycle number for pattern 0-7."""
         if not 0 <= pattern_index <= 7:
             raise ValueError("Pattern index must be between 0 and 7")
-        self.write_register(0x1050 + pattern_index, value)
+        return self.write_register(0x1050 + pattern_index, value)
 
     def get_link_pattern_number(self, pattern_index):
         """Read Link pattern number for pattern 0-7.
@@ -559,7 +813,7 @@ class Delta2(minimalmodbus.Instrument):
         """Write Link pattern number for pattern 0-7."""
         if not 0 <= pattern_index <= 7:
             raise ValueError("Pattern index must be between 0 and 7")
-        self.write_register(0x1060 + pattern_index, value)
+        return self.write_register(0x1060 + pattern_index, value)
 
     # Patterns (Temperature and Time)
     # Pattern 0 is 2000H-2007H (Temp) and 2080H-2087H (Time)
@@ -599,8 +853,33 @@ class Delta2(minimalmodbus.Instrument):
         temp_addr = self.PATTERN_TEMP_START + (pattern_number * 8) + step_number
         time_addr = self.PATTERN_TIME_START + (pattern_number * 8) + step_number
 
-        self.write_register(temp_addr, temp, 1)
-        self.write_register(time_addr, time, 0)
+        # Both queued before waiting, so they share one coalescing window
+        temp_write = self.submit_write(temp_addr, temp, 1)
+        time_write = self.submit_write(time_addr, time, 0)
+        return temp_write.result(), time_write.result()
+
+    def get_program_memory(self):
+        """Read steps, actual steps, cycles and links of all 8 patterns.
+        The DTB returns at most 8 words per read, so this takes 19 block reads
+        instead of 152 single reads.
+        Returns: [{"steps": [(temp, time), ...], "actual_steps", "cycles", "link"}]
+        """
+        actual_steps = self.read_registers(0x1040, 8)
+        cycles = self.read_registers(0x1050, 8)
+        links = self.read_registers(0x1060, 8)
+        patterns = []
+        for n in range(8):
+            temps = self.read_registers(self.PATTERN_TEMP_START + n * 8, 8)
+            times = self.read_registers(self.PATTERN_TIME_START + n * 8, 8)
+            patterns.append(
+                {
+                    "steps": [(temp / 10.0, time) for temp, time in zip(temps, times)],
+                    "actual_steps": actual_steps[n],
+                    "cycles": cycles[n],
+                    "link": links[n],
+                }
+            )
+        return patterns
 
     # =========================================================================
     # 6. Address and Content of Bit Register
@@ -0,0 +1,76 @@
+# src/core/derived.py
+from collections import deque
+from typing import Dict, Optional
+
+from .config import HEAT_RATE_WINDOW
+
+# Running sums are rebuilt from the window this often to stop rounding drift
+RESUM_INTERVAL = 1000
+
+
+class RollingHeatRate:
+    """Least-squares slope of PV over the last `window` seconds, in deg/hour.
+
+    Keeps running sums of t, y, t*t and t*y, so each sample costs O(1).
+    """
+
+    def __init__(self, window: float = HEAT_RATE_WINDOW):
+        self.window = window
+        self._samples = deque()
+        self._origin = 0.0
+        self._updates = 0
+        self._st = self._sy = self._stt = self._sty = 0.0
+
+    def _add(self, t: float, y: float, sign: float):
+        t -= self._origin
+        self._st += sign * t
+        self._sy += sign * y
+        self._stt += sign * t * t
+        self._sty += sign * t * y
+
+    def _resum(self):
+        self._origin = self._samples[0][0] if self._samples else 0.0
+        self._st = self._sy = self._stt = self._sty = 0.0
+        for t, y in self._samples:
+            self._add(t, y, 1.0)
+
+    def update(self, t: float, y: Optional[float]) -> Optional[float]:
+        if y is not None:
+            self._samples.append((t, y))
+            self._add(t, y, 1.0)
+        while self._samples and t - self._samples[0][0] > self.window:
+            old_t, old_y = self._samples.popleft()
+            self._add(old_t, old_y, -1.0)
+
+        self._updates += 1
+        if self._updates % RESUM_INTERVAL == 0:
+            self._resum()
+        return self.rate()
+
+    def rate(self) -> Optional[float]:
+        n = len(self._samples)
+        if n < 2:
+            return None
+        denominator = n * self._stt - self._st * self._st
+        if denominator <= 0:
+            return None
+        slope = (n * self._sty - self._st * self._sy) / denominator
+        return slope * 3600.0
+
+
+class DerivedChannels:
+    """Channels computed incrementally from each acquired sample."""
+
+    def __init__(self, heat_rate_window: float = HEAT_RATE_WINDOW):
+        self.heat_rate = RollingHeatRate(heat_rate_window)
+
+    def update(self, time_passed: float, sample: Dict, fresh: bool = True) -> Dict:
+        pv = sample.get("temperature")
+        sv = sample.get("setpoint")
+        dsv = sample.get("dynamic_setpoint")
+        rate = self.heat_rate.update(time_passed, pv if fresh else None)
+        return {
+            "heat_rate": None if rate is None else round(rate, 2),
+            "error_sv": None if pv is None or sv is None else round(pv - sv, 1),
+            "error_dsv": None if pv is None or dsv is None else round(pv - dsv, 1),
+        }
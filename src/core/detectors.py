@@ -0,0 +1,268 @@
+# src/core/detectors.py
+"""Anomaly detectors run on every acquired sample.
+
+Each detector keeps a few numbers of state, so a sample costs a handful of
+comparisons regardless of how long the firing runs. A detector raises when
+its condition has held for `hold` seconds and clears as soon as it no longer
+holds; both transitions are reported as events.
+"""
+
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .config import (
+    DETECT_CT_MIN_CURRENT,
+    DETECT_DIVERGENCE_BAND,
+    DETECT_FLATLINE_BAND,
+    DETECT_HOLD,
+    DETECT_RISE_LIMIT,
+    DETECT_SPIKE_RATE,
+)
+
+
+class Detector(ABC):
+    """Base class: subclasses implement check(), returning True (anomalous),
+    False (normal) or None (cannot tell from this sample, state unchanged)."""
+
+    name = "detector"
+
+    def __init__(self, hold: float = DETECT_HOLD):
+        self.hold = hold
+        self.active = False
+        self.since: Optional[float] = None  # first time the condition held
+        self.detail: Dict = {}
+
+    @abstractmethod
+    def check(self, t: float, sample: dict) -> Optional[bool]: ...
+
+    def update(self, t: float, sample: dict) -> Optional[dict]:
+        """Feed one sample; returns an event when the detector changes state."""
+        condition = self.check(t, sample)
+        if condition is None:
+            return None
+        if not condition:
+            event = self._event("cleared", t) if self.active else None
+            self.active = False
+            self.since = None
+            return event
+        if self.since is None:
+            self.since = t
+        if not self.active and t - self.since >= self.hold:
+            self.active = True
+            return self._event("raised", t)
+        return None
+
+    def reset(self):
+        self.active = False
+        self.since = None
+        self.detail = {}
+
+    def _event(self, state: str, t: float) -> dict:
+        return {
+            "detector": self.name,
+            "state": state,
+            "time_passed": t,
+            "since": self.since,
+            **self.detail,
+        }
+
+
+class FlatlineAtFullOutput(Detector):
+    """PV stays within `band` while output 1 is at 100 %: open or shorted
+    thermocouple, burnt element, open contactor."""
+
+    name = "flatline_full_output"
+
+    def __init__(self, band: float = DETECT_FLATLINE_BAND, hold: float = DETECT_HOLD):
+        super().__init__(hold)
+        self.band = band
+        self.low = self.high = None
+
+    def reset(self):
+        super().reset()
+        self.low = self.high = None
+
+    def check(self, t, sample):
+        pv, out = sample.get("temperature"), sample.get("output1")
+        if pv is None or out is None:
+            return None
+        if out < 100.0:
+            self.low = self.high = None
+            return False
+        if self.low is None or max(self.high, pv) - min(self.low, pv) > self.band:
+            # Moving: restart the window at this sample
+            self.low = self.high = pv
+            return False
+        self.low, self.high = min(self.low, pv), max(self.high, pv)
+        self.detail = {"temperature": pv, "output1": out}
+        return True
+
+
+class RisingWithoutOutput(Detector):
+    """PV rises more than `rise` degrees above its lowest point while output 1
+    is 0 %: a welded relay or contactor keeps heating."""
+
+    name = "rising_zero_output"
+
+    def __init__(self, rise: float = DETECT_RISE_LIMIT, hold: float = DETECT_HOLD):
+        super().__init__(hold)
+        self.rise = rise
+        self.low = None
+
+    def reset(self):
+        super().reset()
+        self.low = None
+
+    def check(self, t, sample):
+        pv, out = sample.get("temperature"), sample.get("output1")
+        if pv is None or out is None:
+            return None
+        if out > 0.0:
+            self.low = None
+            return False
+        self.low = pv if self.low is None else min(self.low, pv)
+        self.detail = {"temperature": pv, "rise": round(pv - self.low, 1)}
+        return pv - self.low > self.rise
+
+
+class RateSpike(Detector):
+    """PV changes faster than `rate` deg/min between consecutive samples,
+    faster than any kiln heats or cools: a loose or failing thermocouple."""
+
+    name = "rate_spike"
+
+    def __init__(self, rate: float = DETECT_SPIKE_RATE, hold: float = 0.0):
+        super().__init__(hold)
+        self.rate = rate
+        self.last = None  # (t, pv)
+
+    def reset(self):
+        super().reset()
+        self.last = None
+
+    def check(self, t, sample):
+        pv = sample.get("temperature")
+        if pv is None:
+            return None
+        last, self.last = self.last, (t, pv)
+        if last is None or t <= last[0]:
+            return None
+        rate = (pv - last[1]) / (t - last[0]) * 60.0
+        self.detail = {"temperature": pv, "rate": round(rate, 1)}
+        return abs(rate) > self.rate
+
+
+class SetpointDivergence(Detector):
+    """PV more than `band` degrees from the dynamic set value (SV when no
+    program runs): the kiln cannot follow, or runs away."""
+
+    name = "setpoint_divergence"
+
+    def __init__(self, band: float = DETECT_DIVERGENCE_BAND, hold: float = DETECT_HOLD):
+        super().__init__(hold)
+        self.band = band
+
+    def check(self, t, sample):
+        pv = sample.get("temperature")
+        target = sample.get("dynamic_setpoint")
+        if target is None:
+            target = sample.get("setpoint")
+        if pv is None or target is None:
+            return None
+        self.detail = {"temperature": pv, "target": target}
+        return abs(pv - target) > self.band
+
+
+class CurrentDropout(Detector):
+    """CT current (102DH) below `minimum` A while output 1 is on: an element
+    or a supply phase is out."""
+
+    name = "ct_dropout"
+
+    def __init__(
+        self, minimum: float = DETECT_CT_MIN_CURRENT, hold: float = DETECT_HOLD
+    ):
+        super().__init__(hold)
+        self.minimum = minimum
+
+    def check(self, t, sample):
+        current, out = sample.get("ct_current"), sample.get("output1")
+        if current is None or out is None:
+            return None
+        if out < 100.0:
+            # Time-proportioned output: the CT sees whichever half-cycle it hits
+            return False
+        self.detail = {"ct_current": current, "output1": out}
+        return current < self.minimum
+
+
+def default_detectors() -> List[Detector]:
+    return [
+        FlatlineAtFullOutput(),
+        RisingWithoutOutput(),
+        RateSpike(),
+        SetpointDivergence(),
+        CurrentDropout(),
+    ]
+
+
+class DetectorStage:
+    """The detectors of one kiln. Detectors can be added or removed at runtime;
+    events are kept in a bounded history."""
+
+    def __init__(self, detectors: Optional[List[Detector]] = None, history: int = 100):
+        self.detectors: Dict[str, Detector] = {}
+        self.events = deque(maxlen=history)
+        for detector in default_detectors() if detectors is None else detectors:
+            self.add(detector)
+
+    def add(self, detector: Detector):
+        self.detectors[detector.name] = detector
+
+    def remove(self, name: str):
+        self.detectors.pop(name, None)
+
+    def reset(self):
+        for detector in self.detectors.values():
+            detector.reset()
+        self.events.clear()
+
+    def update(self, sample: dict, t: Optional[float] = None) -> List[dict]:
+        """Feed one sample. `t` is the detectors' clock in seconds (default:
+        the sample's time_passed); pass a clock that keeps running between
+        recordings. Events report times on the sample's time_passed axis."""
+        time_passed = sample.get("time_passed")
+        if t is None:
+            t = time_passed
+        if t is None:
+            return []
+        events = []
+        for detector in self.detectors.values():
+            event = detector.update(t, sample)
+            if event is not None:
+                if time_passed is not None:
+                    event["time_passed"] = time_passed
+                    if event["since"] is not None:
+                        event["since"] = round(time_passed - (t - event["since"]), 3)
+                event["timestamp"] = (
+                    sample.get("timestamp") or datetime.now().isoformat()
+                )
+                events.append(event)
+        self.events.extend(events)
+        return events
+
+    def mirror(self, event: dict):
+        """Apply a raise or clear reported by the bus worker's detectors."""
+        detector = self.detectors.get(event["detector"])
+        if detector is not None:
+            detector.active = event["state"] == "raised"
+        self.events.append(event)
+
+    def active(self) -> List[str]:
+        return [name for name, d in self.detectors.items() if d.active]
+
+
+# Global Detector Stage
+detectors = DetectorStage()
@@ -0,0 +1,168 @@
+# src/core/eta.py
+import asyncio
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from .program import Program, load_program
+
+# PV may trail the dynamic set value by this much before a ramp counts as behind
+BEHIND_TOLERANCE = 2.0
+# Upper bound on the per-step schedule returned for looping programs
+MAX_SCHEDULE_STEPS = 64
+
+
+class FiringETA:
+    """Predicts when the running program ends, updated from recorded samples.
+
+    Pattern memory is read once and cached until a pattern setting is written.
+    The controller advances steps on its own timers whether or not PV keeps
+    up, so completion comes from the step timers; the measured heat rate
+    only decides whether the current ramp is behind and by how much.
+    """
+
+    def __init__(self):
+        self.program: Optional[Program] = None
+        self.prediction: Optional[dict] = None
+        self._kiln: Any = None
+        self._loading: Optional[asyncio.Task] = None
+        self._generation = 0
+        self._position: Optional[Tuple[int, int, int]] = None
+        self._current: Optional[tuple] = None
+        self._remaining: Optional[List[tuple]] = None  # steps after the current one
+        self._bounded = True
+
+    def ensure_program(self, kiln: Any):
+        """Start loading pattern memory in the background if it is not cached."""
+        self._kiln = kiln
+        if self.program is None and (self._loading is None or self._loading.done()):
+            self._loading = asyncio.create_task(self._load(self._generation))
+
+    async def get_program(self, kiln: Any) -> Optional[Program]:
+        """The cached program, loading it first if needed."""
+        if self.program is None:
+            self.ensure_program(kiln)
+            await asyncio.shield(self._loading)
+        return self.program
+
+    def invalidate_program(self):
+        """Forget the cached program after pattern memory was written."""
+        self._generation += 1
+        self.program = None
+        self._remaining = None
+
+    def reset(self):
+        """Start a new firing: forget the executing position and prediction."""
+        self._position = None
+        self._remaining = None
+        self.prediction = None
+
+    async def _load(self, generation: int):
+        try:
+            program = await load_program(self._kiln)
+        except Exception as e:
+            print(f"Error reading program: {e}")
+            return
+        if generation == self._generation:
+            self.program = program
+            self._remaining = None
+
+    def _advance(self, pattern: int, step: int) -> Tuple[int, int, int]:
+        """The controller does not report the cycle, count it from step wrap-around."""
+        cycle = 0
+        if self._position is not None:
+            last_pattern, last_step, last_cycle = self._position
+            if pattern == last_pattern:
+                cycle = last_cycle + 1 if step < last_step else last_cycle
+        return pattern, step, cycle
+
+    def _schedule_after(self, position: Tuple[int, int, int]) -> List[tuple]:
+        if self._remaining is None or position != self._position:
+            steps = self.program.run_from(*position)
+            current = next(steps, None)
+            self._current = current
+            self._remaining = []
+            for entry in steps:
+                if len(self._remaining) >= MAX_SCHEDULE_STEPS:
+                    break
+                self._remaining.append(entry)
+            self._bounded = self.program.is_bounded(position[0])
+        return self._remaining
+
+    def update(self, sample: dict) -> Optional[dict]:
+        """Refresh the prediction from one recorded sample."""
+        pattern = sample.get("pattern")
+        step = sample.get("step")
+        if pattern is None or step is None:
+            return self.prediction
+        if self.program is None:
+            if self._kiln is not None:
+                self.ensure_program(self._kiln)
+            return self.prediction
+
+        position = self._advance(pattern, step)
+        remaining = self._schedule_after(position)
+        self._position = position
+        if self._current is None:
+            self.prediction = None
+            return None
+
+        now = datetime.fromisoformat(sample["timestamp"]).timestamp()
+        step_left = sample.get("step_time_left") or 0
+        target = self._current[3]
+
+        steps = [
+            {
+                "pattern": pattern,
+                "step": step,
+                "cycle": position[2],
+                "temp": target,
+                "ends_at": _isoformat(now + step_left),
+            }
+        ]
+        finish = now + step_left
+        for p, s, c, temp, minutes in remaining:
+            finish += minutes * 60
+            steps.append(
+                {
+                    "pattern": p,
+                    "step": s,
+                    "cycle": c,
+                    "temp": temp,
+                    "ends_at": _isoformat(finish),
+                }
+            )
+
+        self.prediction = {
+            "updated_at": sample["timestamp"],
+            "bounded": self._bounded,
+            "completion": _isoformat(finish) if self._bounded else None,
+            "remaining_sec": round(finish - now) if self._bounded else None,
+            **self._ramp_status(sample, target, step_left),
+            "steps": steps,
+        }
+        return self.prediction
+
+    def _ramp_status(self, sample: dict, target: float, step_left: float) -> dict:
+        pv = sample.get("temperature")
+        dsv = sample.get("dynamic_setpoint")
+        rate = sample.get("heat_rate")
+        status = {"required_rate": None, "behind": False, "lag_sec": None}
+        if pv is None or dsv is None:
+            return status
+        if step_left > 0:
+            status["required_rate"] = round((target - dsv) / (step_left / 3600.0), 1)
+
+        # Only heating can fall behind for lack of power
+        status["behind"] = target > pv and pv < dsv - BEHIND_TOLERANCE
+        if status["behind"] and rate and rate > 0:
+            reach = (target - pv) / rate * 3600.0
+            status["lag_sec"] = round(max(reach - step_left, 0.0))
+        return status
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).isoformat(timespec="seconds")
+
+
+# Global ETA Predictor
+eta = FiringETA()
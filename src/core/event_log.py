@@ -0,0 +1,132 @@
+# src/core/event_log.py
+import json
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from .config import EVENT_LOG_BATCH, EVENT_LOG_FILE, KILN_NAME
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY,
+        kiln TEXT NOT NULL,
+        ts REAL NOT NULL,
+        type TEXT NOT NULL,
+        data TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS events_kiln_ts ON events (kiln, ts)",
+    "CREATE INDEX IF NOT EXISTS events_kiln_type_ts ON events (kiln, type, ts)",
+)
+
+
+def to_epoch(value) -> float:
+    """Epoch seconds from epoch seconds or an ISO timestamp (local time)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+class EventLog:
+    """Append-only event log in SQLite (WAL mode), indexed by kiln and time,
+    and by kiln, type and time.
+
+    append() only queues the event; one writer thread commits whatever has
+    queued up in a single transaction. Queries open their own connection, and
+    WAL lets them run while the writer commits.
+    """
+
+    def __init__(self, path: str = EVENT_LOG_FILE, kiln: str = KILN_NAME):
+        self.path = path
+        self.kiln = kiln
+        self.written = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._local = threading.local()  # read connection per thread
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        return conn
+
+    def append(self, event: dict, kiln: Optional[str] = None):
+        ts = to_epoch(event.get("timestamp") or datetime.now().isoformat())
+        row = (kiln or self.kiln, ts, event["type"], json.dumps(event, default=str))
+        self._queue.put(row)
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="event-log", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        conn = self._connect()
+        while True:
+            rows = [self._queue.get()]
+            while len(rows) < EVENT_LOG_BATCH:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO events (kiln, ts, type, data) VALUES (?, ?, ?, ?)",
+                        rows,
+                    )
+                self.written += len(rows)
+            except sqlite3.Error as e:
+                print(f"Event log write failed: {e}")
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Block until every appended event is committed."""
+        self._queue.join()
+
+    def query(
+        self,
+        kiln: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        types: Optional[Sequence[str]] = None,
+        limit: int = 1000,
+        newest_first: bool = False,
+    ) -> List[dict]:
+        """Events of one kiln with start <= ts < end (epoch seconds)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        sql = "SELECT id, kiln, ts, data FROM events WHERE kiln = ?"
+        args: list = [kiln or self.kiln]
+        if types:
+            sql += f" AND type IN ({','.join('?' * len(types))})"
+            args.extend(types)
+        if start is not None:
+            sql += " AND ts >= ?"
+            args.append(start)
+        if end is not None:
+            sql += " AND ts < ?"
+            args.append(end)
+        sql += f" ORDER BY ts {'DESC' if newest_first else 'ASC'}, id LIMIT ?"
+        args.append(limit)
+        return [
+            {**json.loads(data), "log_id": row_id, "kiln": row_kiln, "ts": ts}
+            for row_id, row_kiln, ts, data in conn.execute(sql, args)
+        ]
+
+
+# Global Event Log
+event_log = EventLog()
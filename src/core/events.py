@@ -0,0 +1,187 @@
+# src/core/events.py
+import asyncio
+import ipaddress
+import itertools
+import socket
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from .broadcast import Broadcaster
+from .config import EVENT_HISTORY, EVENT_WEBHOOK_TIMEOUT, EVENT_WEBHOOKS
+from .event_log import event_log
+
+# Status flag -> (event when it goes on, event when it goes off)
+EDGES = {
+    "alarm1": ("alarm_raised", "alarm_cleared"),
+    "alarm2": ("alarm_raised", "alarm_cleared"),
+    "alarm3": ("alarm_raised", "alarm_cleared"),
+    "system_alarm": ("system_alarm_raised", "system_alarm_cleared"),
+    "event1": ("event_on", "event_off"),
+    "event2": ("event_on", "event_off"),
+    "run": ("run_started", "run_stopped"),
+    "at": ("autotune_started", "autotune_finished"),
+}
+
+
+class StatusDiff:
+    """Transition events between consecutive status snapshots.
+
+    The first snapshot only sets the baseline. A flag missing from a snapshot
+    keeps its previous state, so a failed read does not produce events.
+    """
+
+    def __init__(self):
+        self.previous: Dict = {}
+
+    def reset(self):
+        self.previous = {}
+
+    def diff(self, snapshot: Dict) -> List[dict]:
+        events = []
+        previous, self.previous = self.previous, {**self.previous, **snapshot}
+        if not previous:
+            return events
+        for flag, (on, off) in EDGES.items():
+            before, now = previous.get(flag), snapshot.get(flag)
+            if before is None or now is None or bool(before) == bool(now):
+                continue
+            events.append({"type": on if now else off, "source": flag})
+
+        position = (snapshot.get("pattern"), snapshot.get("step"))
+        before = (previous.get("pattern"), previous.get("step"))
+        if None not in position and None not in before and position != before:
+            events.append(
+                {
+                    "type": "step_advanced",
+                    "pattern": position[0],
+                    "step": position[1],
+                    "previous_pattern": before[0],
+                    "previous_step": before[1],
+                }
+            )
+        return events
+
+
+def check_webhook_host(url: str):
+    """Raise ValueError unless the URL's host resolves only to loopback or
+    LAN (private, link-local) addresses. Resolves the name, so it blocks."""
+    host = urlsplit(url).hostname
+    if not host:
+        raise ValueError("Webhook URL has no host")
+    try:
+        infos = socket.getaddrinfo(host, None)
+    except socket.gaierror as e:
+        raise ValueError(f"Cannot resolve webhook host {host}: {e}")
+    for *_, sockaddr in infos:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if not (address.is_loopback or address.is_private or address.is_link_local):
+            raise ValueError(
+                f"Webhook host {host} ({address}) is not on this machine or the LAN"
+            )
+
+
+class EventHub:
+    """Delivers events to SSE subscribers and registered webhooks.
+
+    Webhooks are POSTed one event at a time from a single background task;
+    when a receiver is slow the oldest undelivered events are dropped.
+
+    With a bus worker, the worker's hub numbers, logs and delivers every
+    event: HTTP workers set `forward` to send their events there, and
+    `mirror` the events the worker relays back.
+    """
+
+    def __init__(
+        self, webhooks: List[str] = EVENT_WEBHOOKS, history: int = EVENT_HISTORY
+    ):
+        self.broadcaster = Broadcaster()
+        self.recent = deque(maxlen=history)
+        self.webhooks: Dict[int, dict] = {}
+        self.delivered = 0
+        self.failed = 0
+        self._ids = itertools.count(1)
+        self._seq = itertools.count(1)
+        self._outbox: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.forward: Optional[Callable[[dict], None]] = None
+        for url in webhooks:
+            self.add_webhook(url)
+
+    def add_webhook(self, url: str, types: Optional[List[str]] = None) -> int:
+        if not url.startswith(("http://", "https://")):
+            raise ValueError("Webhook URL must be http(s)")
+        hook_id = next(self._ids)
+        self.webhooks[hook_id] = {"id": hook_id, "url": url, "types": types}
+        return hook_id
+
+    def remove_webhook(self, hook_id: int):
+        if self.webhooks.pop(hook_id, None) is None:
+            raise KeyError(hook_id)
+
+    def publish(self, event: dict):
+        if self.forward is not None:
+            self.forward(event)
+            return
+        event = {
+            "id": next(self._seq),
+            "timestamp": datetime.now().isoformat(),
+            **event,
+        }
+        self.recent.append(event)
+        event_log.append(event)
+        self.broadcaster.publish(event)
+        targets = [
+            hook
+            for hook in self.webhooks.values()
+            if not hook["types"] or event["type"] in hook["types"]
+        ]
+        if not targets:
+            return
+        if self._task is None or self._task.done():
+            self._outbox = asyncio.Queue(EVENT_HISTORY)
+            self._task = asyncio.create_task(self._deliver())
+        for hook in targets:
+            if self._outbox.full():
+                self._outbox.get_nowait()
+                self.failed += 1
+            self._outbox.put_nowait((hook["url"], event))
+
+    def mirror(self, event: dict):
+        """Show an event published by the bus worker to this process's clients."""
+        self.recent.append(event)
+        self.broadcaster.publish(event)
+
+    async def _deliver(self):
+        async with httpx.AsyncClient(timeout=EVENT_WEBHOOK_TIMEOUT) as client:
+            while True:
+                url, event = await self._outbox.get()
+                try:
+                    resp = await client.post(url, json=event)
+                    resp.raise_for_status()
+                    self.delivered += 1
+                except httpx.HTTPError as e:
+                    self.failed += 1
+                    print(f"Webhook {url} failed: {e}")
+
+    async def shutdown(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self.broadcaster.subscribers,
+            "webhooks": len(self.webhooks),
+            "pending": self._outbox.qsize() if self._outbox else 0,
+            "delivered": self.delivered,
+            "failed": self.failed,
+        }
+
+
+# Global Event Hub
+event_hub = EventHub()
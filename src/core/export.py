@@ -0,0 +1,194 @@
+# src/core/export.py
+"""Export recording sessions to CSV or NumPy .npz.
+
+Usage:
+    python -m src.core.export SESSION [-f csv|npz] [--from S] [--to S]
+        [--channels temperature,time_passed] [-o OUTPUT]
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import os
+import sys
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import RECORDING_FILE
+from .recordings import iter_samples, session_path
+
+EXPORT_FORMATS = ("csv", "npz")
+CHUNK_ROWS = 2000
+
+
+def select_samples(
+    path: str, start: Optional[float] = None, end: Optional[float] = None
+) -> Iterator[dict]:
+    """Samples whose time_passed (seconds) lies within [start, end]."""
+    for sample in iter_samples(path):
+        t = sample.get("time_passed")
+        if start is not None and (t is None or t < start):
+            continue
+        if end is not None and t is not None and t > end:
+            break  # time_passed only grows within a session
+        yield sample
+
+
+def _resolve_channels(
+    samples: Iterator[dict], channels: Optional[Sequence[str]]
+) -> Tuple[List[str], Iterator[dict]]:
+    first = next(samples, None)
+    if first is None:
+        return list(channels or []), iter(())
+    if not channels:
+        channels = list(first.keys())
+    return list(channels), itertools.chain([first], samples)
+
+
+def iter_csv(
+    path: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    channels: Optional[Sequence[str]] = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[str]:
+    channels, samples = _resolve_channels(select_samples(path, start, end), channels)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(channels)
+    for i, sample in enumerate(samples, 1):
+        writer.writerow([sample.get(c) for c in channels])
+        if i % chunk_rows == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def _column_dtype(name: str, values: list) -> Optional[str]:
+    """Dtype of a channel, from its first non-None value (None: not yet known)."""
+    if name == "timestamp":
+        return "datetime64[us]"
+    for v in values:
+        if v is not None:
+            return "float64" if isinstance(v, (int, float)) else "str"
+    return None
+
+
+def _to_column(values: list, dtype: str) -> np.ndarray:
+    if dtype == "str":
+        return np.array(["" if v is None else str(v) for v in values], dtype=str)
+    if dtype == "float64":
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return np.array(values, dtype=dtype)
+
+
+def _as_text(column: np.ndarray) -> np.ndarray:
+    if column.dtype.kind != "f":
+        return column.astype(str)
+    return np.where(np.isnan(column), "", column.astype(str))
+
+
+def read_columns(
+    path: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    channels: Optional[Sequence[str]] = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> dict:
+    """Load selected channels as typed arrays, converting chunk_rows at a time.
+
+    The dtype of a channel is chosen once, from its first value, so a chunk
+    that is all None does not turn a text channel into "nan" strings.
+    """
+    channels, samples = _resolve_channels(select_samples(path, start, end), channels)
+    chunks = {c: [] for c in channels}
+    dtypes = {c: None for c in channels}
+    blank = {c: 0 for c in channels}  # leading rows before the dtype is known
+    while True:
+        rows = list(itertools.islice(samples, chunk_rows))
+        if not rows:
+            break
+        for c in channels:
+            values = [row.get(c) for row in rows]
+            if dtypes[c] is None:
+                dtypes[c] = _column_dtype(c, values)
+                if dtypes[c] is None:
+                    blank[c] += len(values)
+                    continue
+            try:
+                chunks[c].append(_to_column(values, dtypes[c]))
+            except (TypeError, ValueError):
+                # Numbers first, text later: keep the whole channel as text
+                dtypes[c] = "str"
+                chunks[c] = [_as_text(part) for part in chunks[c]]
+                chunks[c].append(_to_column(values, "str"))
+
+    columns = {}
+    for c in channels:
+        dtype = dtypes[c] or "float64"
+        parts = [_to_column([None] * blank[c], dtype)] + chunks[c]
+        columns[c] = np.concatenate(parts)
+    return columns
+
+
+def cached_columns(path: str) -> dict:
+    """All channels of a finished session, parsed once into a `<path>.npz` cache.
+
+    The file being recorded is still growing, so it is never cached.
+    """
+    if os.path.abspath(path) == os.path.abspath(RECORDING_FILE):
+        return read_columns(path)
+    cache = path + ".npz"
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+        with np.load(cache) as data:
+            return dict(data)
+    columns = read_columns(path)
+    tmp = cache + ".tmp.npz"
+    np.savez(tmp, **columns)
+    os.replace(tmp, cache)
+    return columns
+
+
+def write_npz(
+    path: str,
+    out,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    channels: Optional[Sequence[str]] = None,
+):
+    np.savez_compressed(out, **read_columns(path, start, end, channels))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Export a recording session.")
+    parser.add_argument("session", help="session id, or 'current'")
+    parser.add_argument("-f", "--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--from", dest="start", type=float, help="seconds")
+    parser.add_argument("--to", dest="end", type=float, help="seconds")
+    parser.add_argument("--channels", help="comma separated channel names")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    path = session_path(args.session)
+    channels = args.channels.split(",") if args.channels else None
+
+    if args.format == "npz":
+        write_npz(
+            path, args.output or sys.stdout.buffer, args.start, args.end, channels
+        )
+        return
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        for chunk in iter_csv(path, args.start, args.end, channels):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
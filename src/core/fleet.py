@@ -0,0 +1,161 @@
+# src/core/fleet.py
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import httpx
+
+from .broadcast import Broadcaster
+from .config import FLEET_PEER_RETRY, FLEET_PEERS, FLEET_POLL_WAIT, KILN_NAME
+
+# Sample channels kept per kiln
+STATE_CHANNELS = (
+    "temperature",
+    "setpoint",
+    "dynamic_setpoint",
+    "output1",
+    "output2",
+    "pattern",
+    "step",
+    "step_time_left",
+    "ct_current",
+    "quality",
+)
+STATUS_FLAGS = (
+    "alarm1",
+    "alarm2",
+    "alarm3",
+    "system_alarm",
+    "event1",
+    "event2",
+    "run",
+    "at",
+)
+
+
+class Fleet:
+    """Latest acquired state of every kiln, served from memory.
+
+    The local kiln is updated by the monitor and the recorder. Kilns of other
+    servers (FLEET_PEERS) are followed with one long-poll connection per
+    server and listed as "<server>/<kiln>", so peers that share a kiln name
+    (or use the local one) do not overwrite each other. Every change bumps
+    `version`; waiters are woken on each bump.
+    """
+
+    def __init__(self, peers: Dict[str, str] = FLEET_PEERS):
+        self.peers = peers
+        self.version = 0
+        self.kilns: Dict[str, dict] = {}
+        self.local = {KILN_NAME}
+        self._changed: Optional[asyncio.Event] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Streams only need the newest snapshot
+        self._snapshots = Broadcaster(maxsize=1)
+
+    def _bump(self):
+        self.version += 1
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+        if self._snapshots.subscribers:
+            self._snapshots.publish(self.snapshot())
+
+    @contextmanager
+    def subscribe(self) -> Iterator[asyncio.Queue]:
+        """Queue holding the newest snapshot, starting with the current one."""
+        with self._snapshots.subscribe() as queue:
+            queue.put_nowait(self.snapshot())
+            yield queue
+
+    def update(self, name: str, sample: dict, flags: Optional[dict] = None):
+        state = {c: sample.get(c) for c in STATE_CHANNELS}
+        if flags:
+            state.update({f: flags.get(f) for f in STATUS_FLAGS})
+        elif name in self.kilns:
+            # Keep the last known flags through a failed status read
+            state.update({f: self.kilns[name].get(f) for f in STATUS_FLAGS})
+        state["updated"] = time.time()
+        self.kilns[name] = state
+        self._bump()
+
+    def mirror(self, snapshot: dict):
+        """Take the local kilns from a snapshot of the bus worker's fleet."""
+        for name, state in snapshot["kilns"].items():
+            if name in self.local:
+                state.pop("age", None)
+                self.kilns[name] = state
+        self._bump()
+
+    def snapshot(self, local_only: bool = False) -> dict:
+        now = time.time()
+        return {
+            "version": self.version,
+            "time": round(now, 3),
+            "kilns": {
+                name: {**state, "age": round(now - state["updated"], 3)}
+                for name, state in self.kilns.items()
+                if not local_only or name in self.local
+            },
+        }
+
+    async def wait(self, since: int, timeout: float) -> bool:
+        """Wait until version > since. Returns False on timeout."""
+        self.ensure_peers()
+        if self.version > since:
+            return True
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def ensure_peers(self):
+        """Start following peer servers (idempotent)."""
+        for name, url in self.peers.items():
+            task = self._tasks.get(name)
+            if task is None or task.done():
+                self._tasks[name] = asyncio.create_task(self._follow(name, url))
+
+    async def _follow(self, name: str, url: str):
+        since = -1
+        async with httpx.AsyncClient(
+            base_url=url, timeout=FLEET_POLL_WAIT + 10
+        ) as client:
+            while True:
+                try:
+                    resp = await client.get(
+                        "/fleet/snapshot",
+                        params={"local": True, "since": since, "wait": FLEET_POLL_WAIT},
+                    )
+                    resp.raise_for_status()
+                    snapshot = resp.json()
+                except (httpx.HTTPError, ValueError) as e:
+                    print(f"Fleet peer {name} unreachable: {e}")
+                    since = -1  # the peer may have restarted
+                    await asyncio.sleep(FLEET_PEER_RETRY)
+                    continue
+                if snapshot["version"] == since:
+                    continue  # long-poll timed out without changes
+                since = snapshot["version"]
+                # Move the peer's update times onto this host's clock
+                offset = time.time() - snapshot["time"]
+                for kiln, state in snapshot["kilns"].items():
+                    state.pop("age", None)
+                    state["updated"] += offset
+                    state["server"] = name
+                    self.kilns[f"{name}/{kiln}"] = state
+                self._bump()
+
+    async def shutdown(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+
+# Global Fleet
+fleet = Fleet()
@@ -1,8 +1,36 @@
 # src/core/kiln.py
+import os
+
+from .bus import BusClient
 from .delta_2 import Delta2
-from .config import SLAVE_ADDRESS, DEFAULT_PORT_NAME, DEFAULT_BAUDRATE, TIMEOUT
+from .trace import ReplaySerial
+from .config import (
+    BUS_REPLAY_FILE,
+    BUS_REPLAY_SPEED,
+    BUS_TRACE_FILE,
+    BUS_WORKER_ADDRESS,
+    SLAVE_ADDRESS,
+    DEFAULT_PORT_NAME,
+    DEFAULT_BAUDRATE,
+    TIMEOUT,
+)
+
+
+def open_kiln() -> Delta2:
+    port = DEFAULT_PORT_NAME
+    if BUS_REPLAY_FILE:
+        port = ReplaySerial(BUS_REPLAY_FILE, speed=BUS_REPLAY_SPEED)
+        print(f"Replaying bus trace {BUS_REPLAY_FILE} ({len(port.records)} frames)")
+    kiln = Delta2(port, SLAVE_ADDRESS)
+    kiln.serial.timeout = TIMEOUT
+    kiln.serial.baudrate = DEFAULT_BAUDRATE
+    if BUS_TRACE_FILE:
+        kiln.start_trace(BUS_TRACE_FILE)
+    return kiln
+
 
-# Global Kiln Instance
-kiln = Delta2(DEFAULT_PORT_NAME, SLAVE_ADDRESS)
-kiln.serial.timeout = TIMEOUT
-kiln.serial.baudrate = DEFAULT_BAUDRATE
+# Global Kiln Instance: the serial port, or the bus worker that holds it
+if BUS_WORKER_ADDRESS and os.environ.get("KILN_BUS_ROLE") != "worker":
+    kiln = BusClient(BUS_WORKER_ADDRESS)
+else:
+    kiln = open_kiln()
@@ -0,0 +1,255 @@
+# src/core/modbus_gateway.py
+"""Modbus TCP gateway to the controller.
+
+Tools that used to open the serial port next to the service (SCADA, the
+delta_2.py test script) talk Modbus TCP to the service instead. Their
+requests take the same bus lock as the service, at PRIORITY_GATEWAY, so the
+recorder and the profile runner always go first. Each client address has a
+token bucket for requests that reach the bus. A read whose whole block is in
+the register cache, or was read through the gateway less than
+MODBUS_GATEWAY_CACHE_AGE seconds ago, is answered without touching the bus.
+
+Function codes 01H-06H are forwarded (the DTB itself implements 02H, 03H,
+05H and 06H). Register writes go through Delta2's write coalescer like the
+service's own writes, and still take the bus at PRIORITY_GATEWAY. The
+gateway listens on localhost unless KILN_MODBUS_HOST says otherwise.
+"""
+
+import asyncio
+import struct
+import time
+from typing import Dict, List, Optional, Set
+
+import minimalmodbus
+
+from .config import (
+    MODBUS_GATEWAY_BURST,
+    MODBUS_GATEWAY_CACHE_AGE,
+    MODBUS_GATEWAY_HOST,
+    MODBUS_GATEWAY_PORT,
+    MODBUS_GATEWAY_RATE,
+    SLAVE_ADDRESS,
+)
+from .events import event_hub
+from .registers import BIT, MAX_BLOCK, REGISTER, RegisterCache
+from .scheduler import PRIORITY_GATEWAY
+
+MBAP = struct.Struct(">HHHB")  # transaction id, protocol id, length, unit id
+
+READ_BITS = {0x01, 0x02}
+READ_REGISTERS = {0x03, 0x04}
+WRITE_BIT = 0x05
+WRITE_REGISTER = 0x06
+# Function codes whose values Delta2 keeps in its register cache
+CACHED = {0x02: BIT, 0x03: REGISTER}
+
+# Modbus exception codes
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+DEVICE_FAILURE = 0x04
+DEVICE_BUSY = 0x06
+PATH_UNAVAILABLE = 0x0A
+TARGET_NO_RESPONSE = 0x0B
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+def _exception(function: int, code: int) -> bytes:
+    return bytes([function | 0x80, code])
+
+
+def _pack_bits(values: List[int]) -> bytes:
+    data = bytearray((len(values) + 7) // 8)
+    for i, value in enumerate(values):
+        if value:
+            data[i // 8] |= 1 << (i % 8)
+    return bytes(data)
+
+
+class ModbusGateway:
+    def __init__(
+        self,
+        host: str = MODBUS_GATEWAY_HOST,
+        port: int = MODBUS_GATEWAY_PORT,
+        rate: float = MODBUS_GATEWAY_RATE,
+        burst: float = MODBUS_GATEWAY_BURST,
+        cache_age: float = MODBUS_GATEWAY_CACHE_AGE,
+    ):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.burst = burst
+        self.kiln = None
+        # Live values read through the gateway; settings come from kiln.cache
+        self.cache = RegisterCache(cache_age, settings_only=False)
+        self.clients: Dict[str, dict] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    async def start(self, kiln):
+        """Listen for Modbus TCP clients (a no-op when the port is 0)."""
+        if not self.port or self._server is not None:
+            return
+        self.kiln = kiln
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        print(f"Modbus TCP gateway listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = writer.get_extra_info("peername")[0]
+        self._writers.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(MBAP.size)
+                transaction, protocol, length, unit = MBAP.unpack(header)
+                if protocol != 0 or not 2 <= length <= 254:
+                    break  # not Modbus TCP, drop the connection
+                pdu = await reader.readexactly(length - 1)
+                response = await self.request(client, unit, pdu)
+                writer.write(
+                    MBAP.pack(transaction, 0, len(response) + 1, unit) + response
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def request(self, client: str, unit: int, pdu: bytes) -> bytes:
+        """Answer one request PDU; returns the response PDU."""
+        stats = self.clients.setdefault(
+            client, {"requests": 0, "cached": 0, "bus": 0, "limited": 0, "errors": 0}
+        )
+        stats["requests"] += 1
+        function = pdu[0]
+        if unit not in (0, 0xFF, SLAVE_ADDRESS):
+            return _exception(function, PATH_UNAVAILABLE)
+        if function not in READ_BITS | READ_REGISTERS | {WRITE_BIT, WRITE_REGISTER}:
+            return _exception(function, ILLEGAL_FUNCTION)
+        if len(pdu) != 5:
+            return _exception(function, ILLEGAL_DATA_VALUE)
+        address, value = struct.unpack(">HH", pdu[1:])
+        reading = function in READ_BITS | READ_REGISTERS
+        if reading and not 1 <= value <= MAX_BLOCK:
+            return _exception(function, ILLEGAL_DATA_VALUE)
+        if function == WRITE_BIT and value not in (0x0000, 0xFF00):
+            return _exception(function, ILLEGAL_DATA_VALUE)
+
+        values = self._cached(function, address, value) if reading else None
+        if values is not None:
+            stats["cached"] += 1
+        else:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            if not bucket.take():
+                stats["limited"] += 1
+                return _exception(function, DEVICE_BUSY)
+            stats["bus"] += 1
+            try:
+                values = await asyncio.to_thread(self._bus, function, address, value)
+            except minimalmodbus.IllegalRequestError:
+                stats["errors"] += 1
+                return _exception(function, ILLEGAL_DATA_ADDRESS)
+            except minimalmodbus.SlaveDeviceBusyError:
+                stats["errors"] += 1
+                return _exception(function, DEVICE_BUSY)
+            except minimalmodbus.NoResponseError:
+                stats["errors"] += 1
+                return _exception(function, TARGET_NO_RESPONSE)
+            except (minimalmodbus.ModbusException, OSError, ValueError) as e:
+                stats["errors"] += 1
+                print(f"Modbus gateway request from {client} failed: {e}")
+                return _exception(function, DEVICE_FAILURE)
+
+        if function in READ_BITS:
+            data = _pack_bits(values)
+            return bytes([function, len(data)]) + data
+        if function in READ_REGISTERS:
+            return bytes([function, 2 * len(values)]) + struct.pack(
+                f">{len(values)}H", *values
+            )
+        event_hub.publish(
+            {
+                "type": "gateway_write",
+                "client": client,
+                "function": function,
+                "address": f"{address:04X}H",
+                "value": value,
+            }
+        )
+        return pdu  # write responses echo the request
+
+    def _cached(self, function: int, address: int, count: int) -> Optional[List[int]]:
+        kind = CACHED.get(function)
+        if kind is None:
+            return None
+        values = []
+        for a in range(address, address + count):
+            raw = self.kiln.cache.get(kind, a)
+            if raw is None:
+                raw = self.cache.get(kind, a)
+            if raw is None:
+                return None
+            values.append(raw)
+        return values
+
+    def _bus(self, function: int, address: int, value: int) -> Optional[List[int]]:
+        with self.kiln.lock.priority(PRIORITY_GATEWAY):
+            if function in READ_BITS:
+                values = self.kiln.read_bits(address, value, function)
+            elif function in READ_REGISTERS:
+                values = self.kiln.read_registers(address, value, function)
+            elif function == WRITE_BIT:
+                self.kiln.write_bit(address, value == 0xFF00, function)
+            else:
+                self.kiln.write_register(address, value, functioncode=function)
+        if function in CACHED:
+            self.cache.update(CACHED[function], address, values)
+            return values
+        if function in READ_BITS | READ_REGISTERS:
+            return values
+        # A write may rescale or redirect other registers
+        self.cache.clear()
+        return None
+
+    def status(self) -> dict:
+        if self._server is None:
+            return {"listening": False}
+        return {
+            "listening": True,
+            "address": f"{self.host}:{self.port}",
+            "connections": len(self._writers),
+            "bus_waiting": self.kiln.lock.waiting(),
+            "clients": self.clients,
+        }
+
+
+# Global Modbus Gateway
+gateway = ModbusGateway()
@@ -1,4 +1,6 @@
 # src/core/models.py
+from typing import Dict, List, Optional
+
 from pydantic import BaseModel
 from .delta_2 import (
     ControlMethod,
@@ -105,3 +107,30 @@ class SensorTypeRequest(BaseModel):
 
 class IntValueRequest(BaseModel):
     value: int
+
+
+class SettingsRequest(BaseModel):
+    values: Dict[str, float]  # keys as in GET /settings/all, plus setpoint and p/i/d
+
+
+class WebhookRequest(BaseModel):
+    url: str
+    types: Optional[List[str]] = None  # default: every event type
+
+
+class ProfileSegment(BaseModel):
+    target: float
+    duration: Optional[float] = None  # seconds
+    rate: Optional[float] = None  # deg/h, used when duration is not given
+
+
+class ProfileRequest(BaseModel):
+    segments: List[ProfileSegment]
+    start_temp: Optional[float] = None  # default: current PV
+
+
+class ProfilerRequest(BaseModel):
+    seconds: float = 10.0
+    cprofile: bool = False  # exact, but slows the process: 30 s at most
+    sampling: bool = True  # stack sampler, for flame graphs
+    interval: float = 0.01  # seconds between stack samples
@@ -0,0 +1,248 @@
+# src/core/profile_runner.py
+import asyncio
+import bisect
+import json
+import os
+import tempfile
+import time
+from typing import Any, List, Optional
+
+from .config import PROFILE_SAVE_INTERVAL, PROFILE_STATE_FILE, PROFILE_TICK
+from .delta_2 import ControlMethod
+from .scheduler import DeadlineScheduler
+
+
+class Schedule:
+    """Piecewise-linear setpoint: each segment ramps from the previous target
+    to its own, over `duration` seconds or at `rate` deg/h."""
+
+    def __init__(self, segments: List[dict], start_temp: float):
+        if not segments:
+            raise ValueError("Schedule has no segments")
+        self.ends = []
+        self.temps = [start_temp]
+        elapsed = 0.0
+        for i, segment in enumerate(segments):
+            target = float(segment["target"])
+            if segment.get("duration") is not None:
+                duration = float(segment["duration"])
+            elif segment.get("rate"):
+                duration = abs(target - self.temps[-1]) / abs(segment["rate"]) * 3600
+            else:
+                raise ValueError(f"Segment {i} needs a duration or a rate")
+            if duration < 0:
+                raise ValueError(f"Segment {i} has a negative duration")
+            elapsed += duration
+            self.ends.append(elapsed)
+            self.temps.append(target)
+
+    @property
+    def duration(self) -> float:
+        return self.ends[-1]
+
+    def segment_at(self, elapsed: float) -> int:
+        return min(bisect.bisect_right(self.ends, elapsed), len(self.ends) - 1)
+
+    def setpoint(self, elapsed: float) -> float:
+        i = self.segment_at(elapsed)
+        start = self.ends[i - 1] if i else 0.0
+        span = self.ends[i] - start
+        fraction = min(max((elapsed - start) / span, 0.0), 1.0) if span > 0 else 1.0
+        return self.temps[i] + fraction * (self.temps[i + 1] - self.temps[i])
+
+
+async def _call(kiln: Any, name: str, *args):
+    method = getattr(kiln, name)
+    if asyncio.iscoroutinefunction(method):
+        return await method(*args)
+    return await asyncio.to_thread(method, *args)
+
+
+class ProfileRunner:
+    """Runs a Schedule on the host by writing SV (1001H) with the controller in
+    PID mode, so programs are not limited to 8 patterns x 8 whole-minute steps.
+
+    SV is only written when its 0.1 deg value changes. Progress is saved to
+    PROFILE_STATE_FILE; after a restart the schedule resumes where it was
+    saved, the controller having held the last SV in the meantime.
+    """
+
+    def __init__(self, state_file: str = PROFILE_STATE_FILE):
+        self.state_file = state_file
+        self.state = "idle"  # idle, running, paused, finished, stopped
+        self.segments: List[dict] = []
+        self.start_temp: Optional[float] = None
+        self.schedule: Optional[Schedule] = None
+        self.last_written: Optional[float] = None
+        self.writes = 0
+        self._elapsed = 0.0  # program seconds up to _resumed_at
+        self._resumed_at: Optional[float] = None  # monotonic, None while paused
+        self._task: Optional[asyncio.Task] = None
+
+    def elapsed(self) -> float:
+        if self._resumed_at is None:
+            return self._elapsed
+        return self._elapsed + time.monotonic() - self._resumed_at
+
+    def _load(self, segments: List[dict], start_temp: float, elapsed: float):
+        self.schedule = Schedule(segments, start_temp)
+        self.segments = segments
+        self.start_temp = start_temp
+        self._elapsed = elapsed
+        self.writes = 0
+
+    async def start(
+        self, kiln: Any, segments: List[dict], start_temp: Optional[float] = None
+    ):
+        if self.state in ("running", "paused"):
+            raise RuntimeError("A profile is already running")
+        method = await _call(kiln, "get_control_method")
+        if isinstance(method, dict):  # KilnClient
+            method = method["control_method"]
+        if int(method) != ControlMethod.PID:
+            raise RuntimeError("Switch the control method to PID to run a profile")
+        if start_temp is None:
+            start_temp = await _call(kiln, "get_pv")
+
+        self._load(segments, start_temp, 0.0)
+        self.last_written = None
+        self._run(kiln)
+
+    def _run(self, kiln: Any):
+        self.state = "running"
+        self._resumed_at = time.monotonic()
+        self._save()
+        self._task = asyncio.create_task(self._loop(kiln))
+
+    async def _loop(self, kiln: Any):
+        scheduler = DeadlineScheduler(PROFILE_TICK)
+        saved_at = time.monotonic()
+        try:
+            while True:
+                await scheduler.wait()
+                elapsed = self.elapsed()
+                value = round(self.schedule.setpoint(elapsed), 1)
+                if value != self.last_written:
+                    try:
+                        await _call(kiln, "set_setpoint", value)
+                        self.last_written = value
+                        self.writes += 1
+                    except Exception as e:
+                        print(f"Profile setpoint write failed: {e}")
+                        continue  # retried on the next tick
+                if elapsed >= self.schedule.duration and self.state == "running":
+                    self._pause_clock()
+                    self.state = "finished"
+                    self._save()
+                    print("Profile finished.")
+                    return
+                if time.monotonic() - saved_at >= PROFILE_SAVE_INTERVAL:
+                    saved_at = time.monotonic()
+                    await asyncio.to_thread(self._save)
+        except asyncio.CancelledError:
+            pass
+
+    def _pause_clock(self):
+        self._elapsed = self.elapsed()
+        self._resumed_at = None
+
+    def pause(self):
+        if self.state != "running":
+            raise RuntimeError("No profile is running")
+        self._pause_clock()
+        self.state = "paused"
+        self._save()
+
+    def resume(self):
+        if self.state != "paused":
+            raise RuntimeError("Profile is not paused")
+        self._resumed_at = time.monotonic()
+        self.state = "running"
+        self._save()
+
+    def skip(self):
+        """Jump to the end of the current segment; SV steps to its target."""
+        if self.state not in ("running", "paused"):
+            raise RuntimeError("No profile is running")
+        end = self.schedule.ends[self.schedule.segment_at(self.elapsed())]
+        self._elapsed = end
+        if self._resumed_at is not None:
+            self._resumed_at = time.monotonic()
+        self._save()
+
+    async def stop(self):
+        """Stop writing SV. The controller keeps the last value."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.state in ("running", "paused"):
+            self._pause_clock()
+            self.state = "stopped"
+            self._save()
+
+    async def shutdown(self):
+        """Process exit: stop the loop but keep the saved state for recovery."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.state in ("running", "paused"):
+            self._save()
+
+    def _save(self):
+        state = {
+            "state": self.state,
+            "segments": self.segments,
+            "start_temp": self.start_temp,
+            "elapsed": self.elapsed(),
+            "last_written": self.last_written,
+            "saved_at": time.time(),
+        }
+        directory = os.path.dirname(self.state_file) or "."
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_file)
+
+    async def recover(self, kiln: Any) -> bool:
+        """Resume a profile that was running or paused when the process exited."""
+        if not os.path.exists(self.state_file):
+            return False
+        try:
+            with open(self.state_file, "r") as f:
+                saved = json.load(f)
+            if saved["state"] not in ("running", "paused"):
+                return False
+            self._load(saved["segments"], saved["start_temp"], saved["elapsed"])
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Could not recover profile: {e}")
+            return False
+
+        # Rewritten on the first tick, the controller may have been reset
+        self.last_written = None
+        print(f"Recovering profile at {self._elapsed:.0f} s ({saved['state']}).")
+        self._run(kiln)
+        if saved["state"] == "paused":
+            self.pause()
+        return True
+
+    def status(self) -> dict:
+        if self.schedule is None:
+            return {"state": self.state}
+        elapsed = self.elapsed()
+        return {
+            "state": self.state,
+            "elapsed": round(elapsed, 1),
+            "duration": round(self.schedule.duration, 1),
+            "remaining": round(max(self.schedule.duration - elapsed, 0.0), 1),
+            "segment": self.schedule.segment_at(elapsed),
+            "segments": len(self.segments),
+            "setpoint": round(self.schedule.setpoint(elapsed), 1),
+            "last_written": self.last_written,
+            "writes": self.writes,
+        }
+
+
+# Global Profile Runner
+runner = ProfileRunner()
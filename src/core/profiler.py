@@ -0,0 +1,232 @@
+# src/core/profiler.py
+"""On-demand profiling of the running service.
+
+A session runs for a fixed number of seconds (at most PROFILER_MAX_SECONDS)
+with either or both of:
+
+- A sampling profiler thread (the default), which reads the stack of every
+  other thread every `interval` seconds and counts collapsed stacks (one line
+  per stack, `thread;outer;...;inner count`, the input format of
+  flamegraph.pl and speedscope). Its own CPU time is kept below
+  PROFILER_MAX_OVERHEAD of one core by stretching the interval when stacks
+  get expensive to walk.
+- cProfile, on request. From Python 3.12 on it observes every thread of the
+  process (the event loop, the bus threads of the thread pool, the write
+  coalescer). Call counts and own times are exact; cumulative times can be
+  skewed where threads interleave. Its overhead is not bounded: it hooks
+  every call, and can slow a busy process several times over, serial timing
+  included. Sessions with it last at most PROFILER_MAX_CPROFILE_SECONDS.
+
+Only one session runs at a time. The last result is kept until the next
+session starts.
+"""
+
+import asyncio
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from .config import (
+    BASE_DIR,
+    PROFILER_MAX_CPROFILE_SECONDS,
+    PROFILER_MAX_OVERHEAD,
+    PROFILER_MAX_SECONDS,
+    PROFILER_SAMPLE_INTERVAL,
+)
+
+FORMATS = ("pstats", "text", "collapsed")
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if path.startswith(BASE_DIR):
+        path = os.path.relpath(path, BASE_DIR)
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    def __init__(
+        self,
+        interval: float = PROFILER_SAMPLE_INTERVAL,
+        max_overhead: float = PROFILER_MAX_OVERHEAD,
+    ):
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.busy = 0.0  # CPU seconds spent sampling
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        labels = {}  # code object -> label, built once per function
+        start = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            cost = time.thread_time()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _frame_label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            cost = time.thread_time() - cost
+            self.busy += cost
+            # Stay below max_overhead of a core: sleep long enough per sample
+            self.interval = max(self.interval, cost / self.max_overhead)
+        self.elapsed = time.perf_counter() - start
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+    def stats(self) -> dict:
+        return {
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "interval": round(self.interval, 4),
+            "overhead": round(self.busy / self.elapsed, 4) if self.elapsed else 0.0,
+        }
+
+
+class Profiler:
+    def __init__(self):
+        self.session: Optional[dict] = None
+        self.result: Optional[dict] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def start(
+        self,
+        seconds: float,
+        cprofile: bool = False,
+        sampling: bool = True,
+        interval: float = PROFILER_SAMPLE_INTERVAL,
+    ) -> dict:
+        """Start a session that stops by itself after `seconds`. Must be
+        called on the event loop."""
+        if self.session is not None:
+            raise RuntimeError("A profiling session is already running")
+        if not 0 < seconds <= PROFILER_MAX_SECONDS:
+            raise ValueError(f"Duration must be between 0 and {PROFILER_MAX_SECONDS} s")
+        if not (cprofile or sampling):
+            raise ValueError("Enable cprofile, sampling or both")
+        if cprofile and seconds > PROFILER_MAX_CPROFILE_SECONDS:
+            raise ValueError(
+                f"cProfile sessions last at most {PROFILER_MAX_CPROFILE_SECONDS} s"
+            )
+        if interval <= 0:
+            raise ValueError("Sampling interval must be positive")
+
+        if cprofile:
+            self._cprofile = cProfile.Profile()
+            try:
+                self._cprofile.enable()
+            except ValueError as e:  # another profiler holds the interpreter
+                self._cprofile = None
+                raise RuntimeError(str(e))
+        if sampling:
+            self._sampler = StackSampler(interval)
+            self._sampler.start()
+        self.result = None
+        self.session = {
+            "started": datetime.now().isoformat(),
+            "seconds": seconds,
+            "cprofile": cprofile,
+            "sampling": sampling,
+            "_start": time.perf_counter(),
+        }
+        self._timer = asyncio.get_running_loop().call_later(seconds, self.stop)
+        return self.status()
+
+    def stop(self) -> dict:
+        if self.session is None:
+            raise RuntimeError("No profiling session running")
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        result = {
+            "started": self.session["started"],
+            "duration": round(time.perf_counter() - self.session["_start"], 3),
+            "formats": [],
+        }
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            result["stats"] = pstats.Stats(self._cprofile)
+            result["formats"] += ["pstats", "text"]
+            self._cprofile = None
+        if self._sampler is not None:
+            self._sampler.stop()
+            result["collapsed"] = self._sampler.collapsed()
+            result["sampler"] = self._sampler.stats()
+            result["formats"].append("collapsed")
+            self._sampler = None
+        self.session = None
+        self.result = result
+        print(f"Profiling session of {result['duration']} s finished")
+        return self.status()
+
+    def status(self) -> dict:
+        status = {"running": self.session is not None}
+        if self.session is not None:
+            status.update(
+                {k: v for k, v in self.session.items() if not k.startswith("_")}
+            )
+            status["elapsed"] = round(time.perf_counter() - self.session["_start"], 3)
+        if self.result is not None:
+            status["result"] = {
+                k: v
+                for k, v in self.result.items()
+                if k in ("started", "duration", "formats", "sampler")
+            }
+        return status
+
+    def export(self, fmt: str, limit: int = 50):
+        """The last result as pstats (bytes, for pstats.Stats or snakeviz), a
+        text report of the top `limit` functions, or collapsed stacks."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Format must be one of {', '.join(FORMATS)}")
+        if self.result is None or fmt not in self.result["formats"]:
+            raise LookupError(f"No {fmt} result available")
+        if fmt == "collapsed":
+            return self.result["collapsed"]
+        stats = self.result["stats"]
+        if fmt == "pstats":
+            return marshal.dumps(stats.stats)  # what Stats.dump_stats writes
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats("tottime").print_stats(limit)
+        return out.getvalue()
+
+
+# Global Profiler
+profiler = Profiler()
@@ -0,0 +1,104 @@
+# src/core/program.py
+import asyncio
+from typing import Any, Iterator, List, Tuple
+
+PATTERN_COUNT = 8
+STEP_COUNT = 8
+# Link pattern number 8 (OFF) ends the program
+LINK_END = 8
+# Bounds patterns linked into a loop
+MAX_PATTERN_RUNS = 64
+
+
+class Program:
+    """Pattern memory of a DTB controller (2000H/2080H, 1040H, 1050H, 1060H).
+
+    Execution semantics, shared by the ETA predictor and the simulator:
+    each step ramps linearly from the previous target to `temp` over `time`
+    minutes; a pattern runs steps 0..actual_steps; it is repeated `cycles`
+    additional times; then execution continues with its link pattern, or
+    ends when the link is LINK_END.
+    """
+
+    def __init__(self, patterns: List[dict]):
+        # [{"steps": [(temp, minutes), ...], "actual_steps": n, "cycles": n, "link": n}]
+        self.patterns = patterns
+
+    def run_from(
+        self, pattern: int, step: int = 0, cycle: int = 0
+    ) -> Iterator[Tuple[int, int, int, float, int]]:
+        """Yield (pattern, step, cycle, temp, minutes) in execution order,
+        starting at the given position. Stops after MAX_PATTERN_RUNS patterns."""
+        for _ in range(MAX_PATTERN_RUNS):
+            if not 0 <= pattern < PATTERN_COUNT:
+                return
+            spec = self.patterns[pattern]
+            last_step = min(spec["actual_steps"], STEP_COUNT - 1)
+            for c in range(cycle, spec["cycles"] + 1):
+                for s in range(step, last_step + 1):
+                    temp, minutes = spec["steps"][s]
+                    yield pattern, s, c, temp, minutes
+                step = 0
+            pattern = spec["link"]
+            step = 0
+            cycle = 0
+
+    def is_bounded(self, pattern: int) -> bool:
+        """False if links starting at pattern loop forever."""
+        seen = set()
+        while 0 <= pattern < PATTERN_COUNT:
+            if pattern in seen:
+                return False
+            seen.add(pattern)
+            pattern = self.patterns[pattern]["link"]
+        return True
+
+    def as_dict(self) -> dict:
+        return {
+            "patterns": [
+                {
+                    "pattern_id": i,
+                    "steps": [
+                        {"step": s, "temp": temp, "time": minutes}
+                        for s, (temp, minutes) in enumerate(p["steps"])
+                    ],
+                    "actual_steps": p["actual_steps"],
+                    "cycles": p["cycles"],
+                    "link": p["link"],
+                }
+                for i, p in enumerate(self.patterns)
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Program":
+        return cls(
+            [
+                {
+                    "steps": [(s["temp"], s["time"]) for s in p["steps"]],
+                    "actual_steps": p["actual_steps"],
+                    "cycles": p["cycles"],
+                    "link": p["link"],
+                }
+                for p in data["patterns"]
+            ]
+        )
+
+
+async def load_program(kiln: Any) -> Program:
+    """Read pattern memory from the controller (or a KilnClient)."""
+    if hasattr(kiln, "get_pattern") and asyncio.iscoroutinefunction(kiln.get_pattern):
+        patterns = []
+        for i in range(PATTERN_COUNT):
+            data = await kiln.get_pattern(i)
+            patterns.append(
+                {
+                    "steps": [(s["temp"], s["time"]) for s in data["steps"]],
+                    "actual_steps": await kiln.get_actual_steps(i),
+                    "cycles": await kiln.get_cycles(i),
+                    "link": await kiln.get_link(i),
+                }
+            )
+        return Program(patterns)
+
+    return Program(await asyncio.to_thread(kiln.get_program_memory))
@@ -0,0 +1,40 @@
+# src/core/quality.py
+from enum import Enum
+from typing import Optional
+
+
+class SampleQuality(str, Enum):
+    GOOD = "good"
+    RETRIED = "retried"  # first read failed, retry succeeded
+    STALE = "stale"  # read failed, last good value repeated
+    TIMEOUT = "timeout"  # read failed, no value
+    SIMULATED = "simulated"  # produced by the simulator, not the kiln
+
+
+class GapTracker:
+    """Folds missed deadlines and failed reads into gap records.
+
+    A gap runs from the first missed slot or failed read to the next sample with
+    a fresh value. Times are seconds since the start of the recording.
+    """
+
+    def __init__(self):
+        self.current: Optional[dict] = None
+
+    def _open(self, start: float) -> dict:
+        if self.current is None:
+            self.current = {"start": start, "end": None, "missed": 0, "failed": 0}
+        return self.current
+
+    def missed(self, start: float, count: int):
+        self._open(start)["missed"] += count
+
+    def failed(self, t: float):
+        self._open(t)["failed"] += 1
+
+    def close(self, t: float) -> Optional[dict]:
+        """End the open gap at t, returning its record (None if no gap)."""
+        gap, self.current = self.current, None
+        if gap is not None:
+            gap["end"] = t
+        return gap
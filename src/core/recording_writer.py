@@ -0,0 +1,88 @@
+# src/core/recording_writer.py
+import json
+import os
+import threading
+import time
+from typing import List
+
+from .config import (
+    RECORDING_BATCH_SIZE,
+    RECORDING_COMMIT_INTERVAL,
+    RECORDING_FSYNC_INTERVAL,
+)
+
+
+class RecordingWriter:
+    """Appends samples to a recording file in groups from a background thread.
+
+    `append` never touches the disk, so it is safe to call from the event loop.
+    A process crash loses at most `commit_interval` seconds of samples; a power
+    loss at most `commit_interval + fsync_interval`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = RECORDING_BATCH_SIZE,
+        commit_interval: float = RECORDING_COMMIT_INTERVAL,
+        fsync_interval: float = RECORDING_FSYNC_INTERVAL,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.fsync_interval = fsync_interval
+        self._pending: List[dict] = []
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name="recording-writer", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def append(self, entry: dict):
+        with self._cond:
+            self._pending.append(entry)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def close(self):
+        """Commit and fsync everything pending, then stop the thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        with open(self.path, "a") as f:
+            last_fsync = time.monotonic()
+            unsynced = False
+            while True:
+                with self._cond:
+                    if not self._closed and len(self._pending) < self.batch_size:
+                        self._cond.wait(timeout=self.commit_interval)
+                    batch, self._pending = self._pending, []
+                    closed = self._closed
+
+                if batch:
+                    try:
+                        f.write("".join(json.dumps(entry) + "\n" for entry in batch))
+                        f.flush()
+                        unsynced = True
+                    except Exception as e:
+                        print(
+                            f"Recording writer failed to commit {len(batch)} samples: {e}"
+                        )
+
+                now = time.monotonic()
+                if unsynced and (closed or now - last_fsync >= self.fsync_interval):
+                    try:
+                        os.fsync(f.fileno())
+                    except OSError as e:
+                        print(f"Recording writer fsync failed: {e}")
+                    last_fsync = now
+                    unsynced = False
+
+                if closed:
+                    break
@@ -0,0 +1,155 @@
+# src/core/recordings.py
+import json
+import os
+from datetime import datetime
+from typing import Iterator, List, Tuple
+
+from .config import RECORDING_FILE, RECORDINGS_DIR
+
+# Session id of the recording currently being written to RECORDING_FILE
+CURRENT_SESSION = "current"
+
+# Lines are already JSON, so they are passed through without decoding.
+# Batching keeps the per-chunk overhead low without holding the file in memory.
+CHUNK_SIZE = 64 * 1024
+
+
+def _iter_complete_lines(path: str) -> Iterator[str]:
+    with open(path, "r") as f:
+        for line in f:
+            # A line without newline is still being written by the recorder
+            if not line.endswith("\n"):
+                break
+            line = line.strip()
+            if line:
+                yield line
+
+
+def iter_ndjson(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Stream a recording file as NDJSON in chunks of about chunk_size bytes."""
+    chunk = []
+    size = 0
+    for line in _iter_complete_lines(path):
+        chunk.append(line)
+        size += len(line) + 1
+        if size >= chunk_size:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+            size = 0
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+def iter_json_array(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Stream a recording file as one JSON array, chunk by chunk."""
+    yield "["
+    chunk = []
+    size = 0
+    first = True
+    for line in _iter_complete_lines(path):
+        chunk.append(line)
+        size += len(line) + 1
+        if size >= chunk_size:
+            yield ("" if first else ",") + ",".join(chunk)
+            first = False
+            chunk = []
+            size = 0
+    if chunk:
+        yield ("" if first else ",") + ",".join(chunk)
+    yield "]"
+
+
+# =========================================================================
+# Sessions
+# =========================================================================
+
+
+def gaps_path(path: str) -> str:
+    """Sidecar file holding the gap records of a recording."""
+    return path + ".gaps"
+
+
+def read_gaps(path: str) -> List[dict]:
+    if not os.path.exists(gaps_path(path)):
+        return []
+    return [json.loads(line) for line in _iter_complete_lines(gaps_path(path))]
+
+
+def session_path(session_id: str) -> str:
+    """Resolve a session id to its file. Raises FileNotFoundError if unknown."""
+    if session_id == CURRENT_SESSION:
+        path = RECORDING_FILE
+    else:
+        if os.path.basename(session_id) != session_id or session_id.startswith("."):
+            raise FileNotFoundError(f"Unknown recording session: {session_id}")
+        path = os.path.join(RECORDINGS_DIR, f"{session_id}.jsonl")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Unknown recording session: {session_id}")
+    return path
+
+
+def list_sessions() -> List[str]:
+    sessions = []
+    if os.path.isdir(RECORDINGS_DIR):
+        sessions = sorted(
+            name[: -len(".jsonl")]
+            for name in os.listdir(RECORDINGS_DIR)
+            if name.endswith(".jsonl")
+        )
+    if os.path.exists(RECORDING_FILE):
+        sessions.append(CURRENT_SESSION)
+    return sessions
+
+
+def archive_current_recording():
+    """Move RECORDING_FILE into RECORDINGS_DIR, named after its first sample."""
+    if not os.path.exists(RECORDING_FILE) or os.path.getsize(RECORDING_FILE) == 0:
+        return None
+
+    with open(RECORDING_FILE, "r") as f:
+        first = f.readline()
+    try:
+        started = datetime.fromisoformat(json.loads(first)["timestamp"])
+    except (ValueError, KeyError, TypeError):
+        started = datetime.fromtimestamp(os.path.getmtime(RECORDING_FILE))
+
+    os.makedirs(RECORDINGS_DIR, exist_ok=True)
+    session_id = started.strftime("%Y%m%dT%H%M%S")
+    path = os.path.join(RECORDINGS_DIR, f"{session_id}.jsonl")
+    suffix = 1
+    while os.path.exists(path):
+        path = os.path.join(RECORDINGS_DIR, f"{session_id}-{suffix}.jsonl")
+        suffix += 1
+    os.replace(RECORDING_FILE, path)
+    if os.path.exists(gaps_path(RECORDING_FILE)):
+        os.replace(gaps_path(RECORDING_FILE), gaps_path(path))
+    return os.path.basename(path)[: -len(".jsonl")]
+
+
+def _sample_time(line: str) -> float:
+    return datetime.fromisoformat(json.loads(line)["timestamp"]).timestamp()
+
+
+def session_span(path: str) -> Tuple[float, float]:
+    """Epoch seconds of the first and last complete sample of a recording."""
+    with open(path, "rb") as f:
+        first = f.readline().decode()
+        # The last line is near the end; read backwards until it is whole
+        size = f.seek(0, os.SEEK_END)
+        back = 4096
+        while True:
+            f.seek(max(size - back, 0))
+            lines = f.read().decode().split("\n")
+            complete = [line for line in lines[:-1] if line.strip()]
+            if len(complete) >= 2 or back >= size:
+                break
+            back *= 4
+    if not first.endswith("\n") or not complete:
+        raise ValueError(f"Recording {path} has no complete samples")
+    return _sample_time(first), _sample_time(complete[-1])
+
+
+def iter_samples(path: str) -> Iterator[dict]:
+    """Decode a recording file sample by sample."""
+    for line in _iter_complete_lines(path):
+        yield json.loads(line)
@@ -0,0 +1,151 @@
+# src/core/registers.py
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .config import REGISTER_CACHE_MAX_AGE
+
+REGISTER = "register"
+BIT = "bit"
+
+# Settings that only change when written (or from the front panel). Live values
+# (PV, SV, outputs, LEDs, keys, CT, program position) are never served cached.
+CACHEABLE = {
+    REGISTER: (
+        (0x1002, 0x1011),
+        (0x1014, 0x101D),
+        (0x1020, 0x1029),
+        (0x102C, 0x102C),
+        (0x102F, 0x1030),
+        (0x1040, 0x1067),
+        (0x2000, 0x20BF),
+    ),
+    # AT (0813H) and valve AT (0818H) switch themselves off when tuning ends
+    BIT: ((0x0810, 0x0812), (0x0814, 0x0817)),
+}
+
+# The DTB answers at most 8 words (or bits) per read
+MAX_BLOCK = 8
+
+
+def is_cacheable(kind: str, address: int) -> bool:
+    return any(lo <= address <= hi for lo, hi in CACHEABLE[kind])
+
+
+def plan_blocks(addresses: Iterable[int], max_block: int = MAX_BLOCK):
+    """Cover addresses with as few (start, count) reads as possible.
+    Small holes are read along rather than split into separate reads."""
+    blocks: List[Tuple[int, int]] = []
+    for address in sorted(set(addresses)):
+        if blocks and address - blocks[-1][0] < max_block:
+            blocks[-1] = (blocks[-1][0], address - blocks[-1][0] + 1)
+        else:
+            blocks.append((address, 1))
+    return blocks
+
+
+class RegisterCache:
+    """Raw 16-bit register and bit values with the time they were read.
+    Only CACHEABLE addresses are kept unless settings_only is False."""
+
+    def __init__(self, max_age: float = REGISTER_CACHE_MAX_AGE, settings_only=True):
+        self.max_age = max_age
+        self.settings_only = settings_only
+        self._values: Dict[Tuple[str, int], Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, kind: str, start: int, values: List[int]):
+        now = time.monotonic()
+        with self._lock:
+            for offset, raw in enumerate(values):
+                if not self.settings_only or is_cacheable(kind, start + offset):
+                    self._values[(kind, start + offset)] = (int(raw), now)
+
+    def get(self, kind: str, address: int) -> Optional[int]:
+        with self._lock:
+            entry = self._values.get((kind, address))
+        if entry is None or time.monotonic() - entry[1] > self.max_age:
+            return None
+        return entry[0]
+
+    def invalidate(self, kind: str, address: int):
+        with self._lock:
+            self._values.pop((kind, address), None)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class WriteBatch:
+    """Writes collected by Delta2.verified_writes(), checked by one read-back."""
+
+    def __init__(self):
+        self.writes: List[dict] = []
+        self.results: Dict[str, dict] = {}
+        # (kind, address) -> error of a read-back that failed
+        self.unread: Dict[Tuple[str, int], str] = {}
+
+    def add(self, kind: str, address: int, raw: int, future: Optional[Future] = None):
+        self.writes.append(
+            {
+                "kind": kind,
+                "address": address,
+                "expected": raw,
+                "future": future,
+                "field": None,
+            }
+        )
+
+    def flush(self):
+        """Wait for the queued register writes; failures are kept per write."""
+        for write in self.writes:
+            future = write["future"]
+            if future is not None and "error" not in write:
+                try:
+                    future.result()
+                except Exception as e:
+                    write["error"] = str(e)
+
+    def mark(self, field: str):
+        """Attribute the writes made since the last mark to a field name."""
+        for write in self.writes:
+            if write["field"] is None:
+                write["field"] = field
+
+    @property
+    def ok(self) -> bool:
+        return all(result["ok"] for result in self.results.values())
+
+    @property
+    def verified(self) -> bool:
+        return not any(result.get("unverified") for result in self.results.values())
+
+    def check(self, readback: Dict[Tuple[str, int], int]):
+        self.mark("unnamed")
+        # Only the last write to a register is expected to stick
+        last = {(w["kind"], w["address"]): w for w in self.writes}
+        for write in self.writes:
+            field = self.results.setdefault(
+                write["field"], {"ok": True, "registers": []}
+            )
+            if last[(write["kind"], write["address"])] is not write:
+                continue
+            actual = readback.get((write["kind"], write["address"]))
+            entry = {
+                "address": f"{write['address']:04X}H",
+                "expected": write["expected"],
+                "actual": actual,
+            }
+            if write.get("error"):
+                entry["error"] = write["error"]
+            field["registers"].append(entry)
+            unread = self.unread.get((write["kind"], write["address"]))
+            if unread is not None:
+                # Not read back: neither confirmed nor a mismatch
+                entry["unverified"] = True
+                entry.setdefault("error", unread)
+                field["unverified"] = True
+            elif actual != write["expected"]:
+                field["ok"] = False
@@ -0,0 +1,152 @@
+# src/core/scheduler.py
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+from . import timing
+from .config import MAX_SAMPLE_PERIOD, MIN_SAMPLE_PERIOD
+
+
+class JitterStats:
+    """Running lateness statistics (seconds), constant memory."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.max = max(self.max, value)
+        self.last = value
+
+    def as_dict(self) -> dict:
+        std = math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean * 1000, 3),
+            "std_ms": round(std * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "last_ms": round(self.last * 1000, 3),
+        }
+
+
+class DeadlineScheduler:
+    """Fires on absolute monotonic deadlines `anchor + k * period`.
+
+    Time spent on the bus does not accumulate as drift. After a stall, deadlines
+    more than half a period in the past are skipped instead of firing back to
+    back.
+    """
+
+    def __init__(self, period: float):
+        if not MIN_SAMPLE_PERIOD <= period <= MAX_SAMPLE_PERIOD:
+            raise ValueError(
+                f"Sample period must be between {MIN_SAMPLE_PERIOD} and {MAX_SAMPLE_PERIOD} s"
+            )
+        self.period = period
+        # Wall clock anchor so monotonic instants can be turned into timestamps
+        self.anchor_monotonic = time.monotonic()
+        self.anchor_wall = time.time()
+        self.tick = 0
+        self.skipped = 0
+        self.jitter = JitterStats()
+
+    def wall_time(self, monotonic_time: float) -> float:
+        return self.anchor_wall + (monotonic_time - self.anchor_monotonic)
+
+    async def wait(self) -> Tuple[float, int]:
+        """Sleep until the next deadline. Returns (deadline, deadlines skipped)."""
+        deadline = self.anchor_monotonic + self.tick * self.period
+        now = time.monotonic()
+        missed = 0
+        # More than half a period late: this slot is gone, move to the next one
+        if now - deadline > self.period / 2:
+            missed = math.ceil((now - deadline - self.period / 2) / self.period)
+            deadline += missed * self.period
+            self.tick += missed
+            self.skipped += missed
+        if now < deadline:
+            await asyncio.sleep(deadline - now)
+
+        self.jitter.add(time.monotonic() - deadline)
+        self.tick += 1
+        return deadline, missed
+
+    def stats(self) -> dict:
+        return {
+            "period": self.period,
+            "samples": self.tick - self.skipped,
+            "skipped": self.skipped,
+            "jitter": self.jitter.as_dict(),
+        }
+
+
+# Bus priority classes; lower goes first
+PRIORITY_SERVICE = 0
+PRIORITY_GATEWAY = 1
+
+
+class PriorityLock:
+    """Mutex handing the bus to waiters in priority order, FIFO within a
+    priority. Used as a plain lock (`with lock:`), it acquires at the calling
+    thread's priority, PRIORITY_SERVICE unless set with `priority()`.
+    A transaction in progress is never interrupted.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._held = False
+        self._waiting: List[Tuple[int, int]] = []  # heap of (priority, ticket)
+        self._tickets = itertools.count()
+        self._local = threading.local()
+
+    @contextmanager
+    def priority(self, priority: int):
+        """Acquisitions from this thread inside the block use `priority`."""
+        previous = getattr(self._local, "priority", PRIORITY_SERVICE)
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def current(self) -> int:
+        """The priority acquisitions from this thread use."""
+        return getattr(self._local, "priority", PRIORITY_SERVICE)
+
+    def acquire(self):
+        ticket = (self.current(), next(self._tickets))
+        start = time.perf_counter()
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            while self._held or self._waiting[0] != ticket:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self._held = True
+        timing.record("bus_wait", time.perf_counter() - start)
+
+    def release(self):
+        with self._cond:
+            self._held = False
+            self._cond.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def waiting(self) -> int:
+        return len(self._waiting)
@@ -0,0 +1,203 @@
+# src/core/simulator.py
+"""Offline firing simulator.
+
+Runs a DTB program (patterns, actual steps, cycles and links, see Program)
+against a thermal model (see thermal.py) under the controller's PID, much
+faster than real time. The time-stepping core advances a whole batch of PID
+settings at once, one numpy operation per term and time step.
+
+Usage:
+    python -m src.core.simulator PROGRAM.json [--pattern N] [--start-temp T]
+        [--pid P,I,D] [--kiln NAME] [-o OUTPUT]
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import (
+    KILN_NAME,
+    SIMULATION_MAX_DURATION,
+    SIMULATION_STEP,
+    THERMAL_DEFAULT_MODEL,
+)
+from .program import Program
+from .quality import SampleQuality
+from .thermal import load_model
+
+# DTB factory PID settings: P band (deg), Ti (s), Td (s)
+DEFAULT_PID = (47.6, 260.0, 41.0)
+
+
+def setpoint_profile(
+    program: Program,
+    pattern: int,
+    start_temp: float,
+    step: float = SIMULATION_STEP,
+    max_duration: float = SIMULATION_MAX_DURATION,
+) -> dict:
+    """Dynamic set value and program position on a uniform time grid.
+
+    Each step ramps linearly from the previous target; the first ramp starts
+    from start_temp (the PV when the program is started).
+    """
+    ends = [0.0]
+    temps = [start_temp]
+    positions = [(pattern, 0)]  # placeholder, segments are numbered from 1
+    for p, s, _, temp, minutes in program.run_from(pattern):
+        if ends[-1] >= max_duration:
+            break
+        ends.append(ends[-1] + minutes * 60.0)
+        temps.append(temp)
+        positions.append((p, s))
+    if len(ends) == 1:
+        raise ValueError(f"Pattern {pattern} has no steps to run")
+    ends = np.array(ends)
+    duration = min(ends[-1], max_duration)
+
+    t = np.arange(0.0, duration + step / 2, step)
+    # Segment k runs from ends[k-1] to ends[k]; zero-length steps are jumps
+    segment = np.clip(np.searchsorted(ends, t, "right"), 1, len(ends) - 1)
+    start, end = ends[segment - 1], ends[segment]
+    span = np.where(end > start, end - start, 1.0)
+    fraction = np.clip((t - start) / span, 0.0, 1.0)
+    temps = np.array(temps)
+    positions = np.array(positions)
+    return {
+        "time": t,
+        "dynamic_setpoint": temps[segment - 1] + fraction * np.diff(temps)[segment - 1],
+        "setpoint": temps[segment],
+        "pattern": positions[segment, 0],
+        "step": positions[segment, 1],
+        "step_time_left": np.maximum(end - t, 0.0),
+    }
+
+
+def simulate(
+    model: dict,
+    setpoint: np.ndarray,
+    pid: np.ndarray,
+    start_temp: float,
+    step: float = SIMULATION_STEP,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """PV and output traces, shape (len(setpoint), batch), for a batch of PID
+    settings given as rows of (P band, Ti seconds, Td seconds).
+
+    Output is 100/P * (e + integral(e)/Ti + Td * d(-PV)/dt), clamped to
+    0-100 %; the integral only winds while the output is not saturated.
+    """
+    pid = np.atleast_2d(np.asarray(pid, dtype=np.float64))
+    band, ti, td = pid[:, 0], pid[:, 1], pid[:, 2]
+    kp = 100.0 / band
+    ki = np.where(ti > 0, step / np.where(ti > 0, ti, 1.0), 0.0)
+    kd = td / step
+    gain = model["heat_gain"] * step
+    decay = 1.0 - model["loss_rate"] * step
+    drift = model["loss_rate"] * model["ambient"] * step
+    delay = int(round(model.get("dead_time", 0.0) / step))
+
+    batch = len(pid)
+    n = len(setpoint)
+    pv_trace = np.empty((n, batch))
+    out_trace = np.empty((n, batch))
+    pv = np.full(batch, float(start_temp))
+    last_pv = pv.copy()
+    integral = np.zeros(batch)
+    history = np.zeros((delay + 1, batch))  # ring of outputs not yet felt
+
+    for k in range(n):
+        error = setpoint[k] - pv
+        integral += ki * error
+        u = kp * (error + integral - kd * (pv - last_pv))
+        saturated = (u > 100.0) | (u < 0.0)
+        integral -= np.where(saturated, ki * error, 0.0)
+        np.clip(u, 0.0, 100.0, out=u)
+
+        pv_trace[k] = pv
+        out_trace[k] = u
+        history[k % (delay + 1)] = u
+        last_pv = pv
+        pv = decay * pv + gain * history[(k + 1) % (delay + 1)] + drift
+    return pv_trace, out_trace
+
+
+def iter_samples(
+    profile: dict,
+    pv: np.ndarray,
+    output: np.ndarray,
+    started: Optional[datetime] = None,
+    period: float = 1.0,
+) -> Iterator[dict]:
+    """One simulated trace (1-D arrays) in the recording format."""
+    started = started or datetime.now()
+    t = profile["time"]
+    every = max(int(round(period / (t[1] - t[0]))), 1) if len(t) > 1 else 1
+    for k in range(0, len(t), every):
+        yield {
+            "timestamp": (started + timedelta(seconds=float(t[k]))).isoformat(),
+            "time_passed": round(float(t[k]), 3),
+            "temperature": round(float(pv[k]), 1),
+            "setpoint": round(float(profile["setpoint"][k]), 1),
+            "dynamic_setpoint": round(float(profile["dynamic_setpoint"][k]), 1),
+            "pattern": int(profile["pattern"][k]),
+            "step": int(profile["step"][k]),
+            "step_time_left": int(profile["step_time_left"][k]),
+            "output1": round(float(output[k]), 1),
+            "output2": 0.0,
+            "quality": SampleQuality.SIMULATED.value,
+        }
+
+
+def run_simulation(
+    program: Program,
+    pattern: int,
+    pid: Sequence[float],
+    start_temp: Optional[float] = None,
+    model: Optional[dict] = None,
+    period: float = 1.0,
+) -> List[dict]:
+    """Simulate one firing and return it as recording samples."""
+    model = model or load_model(KILN_NAME) or THERMAL_DEFAULT_MODEL
+    if start_temp is None:
+        start_temp = model["ambient"]
+    profile = setpoint_profile(program, pattern, start_temp)
+    pv, output = simulate(model, profile["dynamic_setpoint"], [pid], start_temp)
+    return list(iter_samples(profile, pv[:, 0], output[:, 0], period=period))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Simulate a firing program.")
+    parser.add_argument("program", help="program JSON, as returned by GET /program")
+    parser.add_argument("--pattern", type=int, default=0, help="start pattern")
+    parser.add_argument("--start-temp", type=float, help="default: model ambient")
+    parser.add_argument(
+        "--pid", default=",".join(map(str, DEFAULT_PID)), help="P band,Ti,Td"
+    )
+    parser.add_argument("--kiln", default=KILN_NAME, help="fitted model to use")
+    parser.add_argument("--period", type=float, default=1.0, help="output period")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    with open(args.program, "r") as f:
+        program = Program.from_dict(json.load(f))
+    model = load_model(args.kiln) or THERMAL_DEFAULT_MODEL
+    pid = [float(v) for v in args.pid.split(",")]
+    samples = run_simulation(
+        program, args.pattern, pid, args.start_temp, model, args.period
+    )
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for sample in samples:
+            out.write(json.dumps(sample) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# src/core/telemetry.py
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class TelemetryStore:
+    """Latest acquired values, shared by every client.
+
+    The version is bumped only when a value actually changes, so renderers can
+    key their caches on it.
+    """
+
+    def __init__(self, max_age: float = 0.5):
+        self.max_age = max_age
+        self.version = 0
+        self.values: Dict[str, Any] = {}
+        self.updated_at: Optional[float] = None  # time.monotonic()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def publish(self, values: Dict[str, Any]) -> int:
+        self.updated_at = time.monotonic()
+        if values != self.values:
+            self.values = values
+            self.version += 1
+        return self.version
+
+    def invalidate(self):
+        """Force the next refresh to hit the bus (e.g. after a write)."""
+        self.updated_at = None
+
+    def is_fresh(self) -> bool:
+        return (
+            self.updated_at is not None
+            and time.monotonic() - self.updated_at < self.max_age
+        )
+
+    async def _run_refresh(self, fetch: Callable[[], Awaitable[Dict[str, Any]]]):
+        self.publish(await fetch())
+
+    async def refresh(
+        self, fetch: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[int, Dict[str, Any]]:
+        """Return (version, values), reading the bus at most once per max_age.
+
+        Concurrent callers share the same in-flight read.
+        """
+        if not self.is_fresh():
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._run_refresh(fetch))
+            await asyncio.shield(self._refresh_task)
+        return self.version, self.values
+
+
+# Global Telemetry Instance
+telemetry = TelemetryStore()
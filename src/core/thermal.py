@@ -0,0 +1,204 @@
+# src/core/thermal.py
+"""Identify a kiln's thermal model from recorded firings.
+
+The model is first order with heat loss and dead time:
+
+    dT/dt = a * u(t - L) - b * (T - T_amb)
+
+T is PV (deg), u is output 1 (%), L the dead time. For a fixed L it is
+linear in (a, b, b * T_amb), so every candidate dead time is an ordinary
+least squares problem. Each session contributes its normal equations for
+all candidate dead times at once; sessions are summed and the dead time
+with the smallest residual wins.
+
+Usage:
+    python -m src.core.thermal [SESSION ...] [--kiln NAME] [--dry-run]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from .config import (
+    KILN_NAME,
+    THERMAL_FIT_STEP,
+    THERMAL_MAX_DEAD_TIME,
+    THERMAL_MODELS_FILE,
+)
+from .export import cached_columns
+from .recordings import CURRENT_SESSION, list_sessions, session_path
+
+MODEL_TYPE = "first_order_dead_time"
+TEMPERATURE = "temperature"
+OUTPUT = "output1"
+TIME = "time_passed"
+
+
+class NormalEquations:
+    """X'X, X'y and y'y per candidate dead time, summed over sessions."""
+
+    def __init__(self, delays: int):
+        self.xtx = np.zeros((delays, 3, 3))
+        self.xty = np.zeros((delays, 3))
+        self.yty = np.zeros(delays)
+        self.sessions = 0
+
+    def add(self, columns: dict, step: float) -> bool:
+        """Add one session. Returns False if it has no usable data."""
+        grid = _resample(columns, step)
+        if grid is None:
+            return False
+        temperature, output, valid = grid
+        delays = len(self.xty)
+        n = len(temperature)
+        if n < delays + 3:
+            return False
+
+        # Central difference at i uses i-1..i+1, the delayed output i-d
+        i = np.arange(delays, n - 1)
+        rate = (temperature[i + 1] - temperature[i - 1]) / (2 * step)
+        ok = valid[i + 1] & valid[i - 1] & valid[i]
+        # Delayed output for every candidate dead time: shape (delays, rows)
+        d = np.arange(delays)[:, None]
+        u = output[i[None, :] - d]
+        ok = ok[None, :] & valid[i[None, :] - d]
+
+        w = ok.astype(np.float64)
+        y = rate[None, :] * w
+        cols = (u * w, temperature[i][None, :] * w, w)
+        for r in range(3):
+            self.xty[:, r] += np.einsum("dn,dn->d", cols[r], y)
+            for c in range(r, 3):
+                value = np.einsum("dn,dn->d", cols[r], cols[c])
+                self.xtx[:, r, c] += value
+                if c != r:
+                    self.xtx[:, c, r] += value
+        self.yty += np.einsum("dn,dn->d", y, y)
+        self.sessions += 1
+        return True
+
+    def solve(self, step: float) -> dict:
+        if self.sessions == 0:
+            raise ValueError(f"No sessions with {TEMPERATURE} and {OUTPUT} to fit")
+        # pinv, so a degenerate dead time (e.g. too few rows) cannot fail the batch
+        theta = (np.linalg.pinv(self.xtx) @ self.xty[..., None])[..., 0]
+        sse = (
+            self.yty
+            - 2 * np.einsum("dk,dk->d", theta, self.xty)
+            + np.einsum("dk,dkl,dl->d", theta, self.xtx, theta)
+        )
+        rows = self.xtx[:, 2, 2]
+        mse = np.where(rows > 3, sse / np.maximum(rows, 1), np.inf)
+        best = int(np.argmin(mse))
+        if not np.isfinite(mse[best]):
+            raise ValueError("Not enough samples to fit a model")
+        a, p, c = theta[best]
+        b = -p
+        if a <= 0 or b <= 0:
+            raise ValueError("Fitted model is not physical (non-positive gain or loss)")
+        return {
+            "model": MODEL_TYPE,
+            "heat_gain": float(a),  # deg/s per % output
+            "loss_rate": float(b),  # 1/s
+            "ambient": float(c / b),
+            "dead_time": best * step,
+            "time_constant": float(1 / b),
+            "static_gain": float(a / b),  # deg above ambient per % output
+            "rmse": float(np.sqrt(max(mse[best], 0.0)) * 3600),  # deg/h
+            "sessions": self.sessions,
+            "samples": int(rows[best]),
+            "fit_step": step,
+        }
+
+
+def _resample(columns: dict, step: float):
+    """Mean PV and output per `step` bucket, with a mask of non-empty buckets.
+
+    Averaging, rather than picking samples, takes the 0.1 deg quantisation and
+    sensor noise out of the finite differences.
+    """
+    if any(columns.get(k) is None for k in (TIME, TEMPERATURE, OUTPUT)):
+        return None
+    t = np.asarray(columns[TIME], dtype=np.float64)
+    temperature = np.asarray(columns[TEMPERATURE], dtype=np.float64)
+    output = np.asarray(columns[OUTPUT], dtype=np.float64)
+    keep = ~(np.isnan(t) | np.isnan(temperature) | np.isnan(output))
+    t, temperature, output = t[keep], temperature[keep], output[keep]
+    if len(t) < 2:
+        return None
+
+    index = ((t - t[0]) // step).astype(np.int64)
+    counts = np.bincount(index)
+    valid = counts > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        temperature = np.bincount(index, temperature) / counts
+        output = np.bincount(index, output) / counts
+    return np.nan_to_num(temperature), np.nan_to_num(output), valid
+
+
+def fit_sessions(
+    session_ids: Iterable[str],
+    step: float = THERMAL_FIT_STEP,
+    max_dead_time: float = THERMAL_MAX_DEAD_TIME,
+) -> dict:
+    equations = NormalEquations(int(max_dead_time // step) + 1)
+    used: List[str] = []
+    for session_id in session_ids:
+        if equations.add(cached_columns(session_path(session_id)), step):
+            used.append(session_id)
+    model = equations.solve(step)
+    model["session_ids"] = used
+    model["fitted_at"] = datetime.now().isoformat(timespec="seconds")
+    return model
+
+
+def archived_sessions() -> List[str]:
+    return [s for s in list_sessions() if s != CURRENT_SESSION]
+
+
+def load_models(path: str = THERMAL_MODELS_FILE) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def load_model(
+    kiln: str = KILN_NAME, path: str = THERMAL_MODELS_FILE
+) -> Optional[dict]:
+    return load_models(path).get(kiln)
+
+
+def save_model(model: dict, kiln: str = KILN_NAME, path: str = THERMAL_MODELS_FILE):
+    models = load_models(path)
+    models[kiln] = model
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(models, f, indent=2)
+    os.replace(tmp, path)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Fit a kiln thermal model.")
+    parser.add_argument("sessions", nargs="*", help="session ids (default: archived)")
+    parser.add_argument("--kiln", default=KILN_NAME, help="kiln name to store under")
+    parser.add_argument("--step", type=float, default=THERMAL_FIT_STEP)
+    parser.add_argument("--max-dead-time", type=float, default=THERMAL_MAX_DEAD_TIME)
+    parser.add_argument("--dry-run", action="store_true", help="do not store")
+    args = parser.parse_args(argv)
+
+    model = fit_sessions(
+        args.sessions or archived_sessions(), args.step, args.max_dead_time
+    )
+    if not args.dry_run:
+        save_model(model, args.kiln)
+    print(json.dumps(model, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# src/core/timing.py
+"""Per-request latency breakdown.
+
+TimingMiddleware gives every HTTP request a RequestTiming in a context
+variable. Instrumented stages add to it from wherever they run: contexts are
+copied into asyncio.to_thread, so bus code in the thread pool records into the
+request that caused it. Work outside a request (the recorder, the profile
+runner, the write coalescer thread) records nothing.
+
+Stages:
+    bus_wait   waiting for Delta2.lock
+    bus_io     serial transactions, one count per frame pair
+    bus_call   calls forwarded to the bus worker (multi-worker mode)
+    thread     waiting for a free thread of the default executor
+    render     Jinja template rendering
+    serialize  JSON encoding of responses
+
+The breakdown goes out in a Server-Timing header and into rolling per-route
+windows for /debug/timings.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional, Tuple
+
+import jinja2
+import numpy as np
+from fastapi.responses import JSONResponse
+from fastapi.templating import Jinja2Templates
+
+from .config import SERVER_TIMING, TIMING_WINDOW
+
+
+class RequestTiming:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, list] = {}  # stage -> [seconds, count]
+        self._lock = threading.Lock()  # stages may record from several threads
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self.stages.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def header(self, total: float) -> str:
+        parts = [
+            f'{stage};dur={seconds * 1000:.2f};desc="{count}x"'
+            for stage, (seconds, count) in self.stages.items()
+        ]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+current: ContextVar[Optional[RequestTiming]] = ContextVar("timing", default=None)
+
+
+def record(stage: str, seconds: float):
+    """Add to the current request's breakdown (no-op outside a request)."""
+    timing = current.get()
+    if timing is not None:
+        timing.add(stage, seconds)
+
+
+@contextmanager
+def measure(stage: str):
+    timing = current.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(stage, time.perf_counter() - start)
+
+
+class TimedExecutor(ThreadPoolExecutor):
+    """Default executor recording how long work waited for a thread."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        timing = current.get()
+        if timing is None:
+            return super().submit(fn, *args, **kwargs)
+        submitted = time.perf_counter()
+
+        def run():
+            timing.add("thread", time.perf_counter() - submitted)
+            return fn(*args, **kwargs)
+
+        return super().submit(run)
+
+
+class TimedJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        with measure("serialize"):
+            return super().render(content)
+
+
+class TimedTemplate(jinja2.Template):
+    def render(self, *args, **kwargs) -> str:
+        with measure("render"):
+            return super().render(*args, **kwargs)
+
+
+class TimedTemplates(Jinja2Templates):
+    """Jinja2Templates whose templates record their rendering time, whether
+    rendered by TemplateResponse or directly."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.env.template_class = TimedTemplate
+
+
+class RouteTimings:
+    """The last `window` breakdowns of every route."""
+
+    def __init__(self, window: int = TIMING_WINDOW):
+        self.window = window
+        self.routes: Dict[str, Deque[Tuple[float, Dict[str, float]]]] = {}
+
+    def add(self, route: str, total: float, timing: RequestTiming):
+        samples = self.routes.get(route)
+        if samples is None:
+            samples = self.routes[route] = deque(maxlen=self.window)
+        samples.append((total, {s: v[0] for s, v in timing.stages.items()}))
+
+    def clear(self):
+        self.routes.clear()
+
+    def summary(self) -> dict:
+        """Percentiles (ms) of the total and of every stage, per route. A
+        request that skipped a stage counts as 0 for it."""
+        result = {}
+        for route, samples in list(self.routes.items()):
+            samples = list(samples)
+            totals = np.array([total for total, _ in samples]) * 1000
+            stages = sorted({s for _, breakdown in samples for s in breakdown})
+            result[route] = {
+                "count": len(samples),
+                "total": _percentiles(totals),
+                "stages": {
+                    stage: _percentiles(
+                        np.array([b.get(stage, 0.0) for _, b in samples]) * 1000
+                    )
+                    for stage in stages
+                },
+            }
+        return result
+
+
+def _percentiles(values: np.ndarray) -> dict:
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50": round(float(p50), 2),
+        "p95": round(float(p95), 2),
+        "p99": round(float(p99), 2),
+        "max": round(float(values.max()), 2),
+    }
+
+
+# Global Route Timings
+route_timings = RouteTimings()
+
+
+class TimingMiddleware:
+    """Attaches a RequestTiming to each HTTP request. The total runs until the
+    response headers go out, so streams count their time to first byte."""
+
+    def __init__(self, app, send_header: bool = SERVER_TIMING):
+        self.app = app
+        self.send_header = send_header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timing = RequestTiming()
+        token = current.set(timing)
+
+        async def send_timed(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - timing.start
+                route = scope.get("route")
+                if route is not None:
+                    route_timings.add(f"{scope['method']} {route.path}", total, timing)
+                if self.send_header:
+                    headers = list(message.get("headers", []))
+                    headers.append(
+                        (b"server-timing", timing.header(total).encode("latin-1"))
+                    )
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            current.reset(token)
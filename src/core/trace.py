@@ -0,0 +1,254 @@
+# src/core/trace.py
+"""Modbus frame traces: capture and replay.
+
+A trace holds every request/response frame pair exchanged with the
+controller, with monotonic timestamps, in a compact binary file:
+
+    header   b"KTRC", version (u16), wall-clock start (f64, epoch seconds)
+    record   sent (u64, us since start), latency (u32, us),
+             request length (u16), response length (u16),
+             request bytes, response bytes
+
+A response of length 0 is a transaction the controller did not answer.
+The latency runs from the start of the transaction, so it includes the
+inter-frame silent period.
+
+ReplaySerial is a serial port that answers requests from a trace, after the
+recorded latency (scaled by `speed`), so Delta2 can run without hardware.
+
+Usage:
+    python -m src.core.trace TRACE    (summary of a trace file)
+"""
+
+import argparse
+import os
+import struct
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Iterator, NamedTuple, Optional
+
+import numpy as np
+import serial
+
+from .config import TRACES_DIR
+
+MAGIC = b"KTRC"
+VERSION = 1
+HEADER = struct.Struct("<4sHd")
+RECORD = struct.Struct("<QIHH")
+
+
+class TraceRecord(NamedTuple):
+    sent: float  # seconds since the start of the trace
+    latency: float  # seconds
+    request: bytes
+    response: bytes
+
+
+class TraceWriter:
+    """Appends frame pairs to a trace file. Each record is flushed as it is
+    written, so a trace survives a crash of the process."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0
+        self.timeouts = 0
+        self.start = time.monotonic()
+        self.started = datetime.now()
+        self._lock = threading.Lock()
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, self.started.timestamp()))
+        self._file.flush()
+
+    def record(self, sent: float, received: float, request: bytes, response: bytes):
+        """Add one transaction; sent and received are time.monotonic() values."""
+        header = RECORD.pack(
+            max(0, round((sent - self.start) * 1e6)),
+            min(0xFFFFFFFF, max(0, round((received - sent) * 1e6))),
+            len(request),
+            len(response),
+        )
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(header + request + response)
+            self._file.flush()
+            self.records += 1
+            if not response:
+                self.timeouts += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def status(self) -> dict:
+        return {
+            "path": self.path,
+            "started": self.started.isoformat(),
+            "records": self.records,
+            "timeouts": self.timeouts,
+            "bytes": os.path.getsize(self.path),
+        }
+
+
+def new_trace_path() -> str:
+    os.makedirs(TRACES_DIR, exist_ok=True)
+    name = f"bus-{datetime.now().strftime('%Y%m%d-%H%M%S')}.ktrace"
+    return os.path.join(TRACES_DIR, name)
+
+
+def read_trace(path: str) -> Iterator[TraceRecord]:
+    """Records of a trace file in order. A record cut short at the end of the
+    file (the process died while writing it) is ignored."""
+    with open(path, "rb") as f:
+        magic, version, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} bus trace")
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            sent, latency, n_request, n_response = RECORD.unpack(header)
+            frames = f.read(n_request + n_response)
+            if len(frames) < n_request + n_response:
+                return
+            yield TraceRecord(
+                sent / 1e6, latency / 1e6, frames[:n_request], frames[n_request:]
+            )
+
+
+def trace_start(path: str) -> datetime:
+    with open(path, "rb") as f:
+        magic, version, start = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} bus trace")
+    return datetime.fromtimestamp(start)
+
+
+class ReplaySerial:
+    """Serial port answering from a trace file.
+
+    Each written request is matched against the trace from the current
+    position on, and the recorded response is returned after the recorded
+    latency divided by `speed` (0 answers at once). Requests that are not in
+    the rest of the trace get no answer, like a silent controller; with
+    `strict`, a request that differs from the next recorded one raises
+    instead, for replays that must follow the capture exactly.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, strict: bool = False):
+        self.records = list(read_trace(path))
+        self.speed = speed
+        self.strict = strict
+        self.position = 0
+        self.served = 0
+        self.missed = 0
+        self.port = f"replay:{path}"
+        self.is_open = True
+        self.timeout = 0.05
+        self.baudrate = 19200
+        self._pending = b""
+        self._due = 0.0
+
+    def open(self):
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+    def reset_input_buffer(self):
+        self._pending = b""
+
+    def reset_output_buffer(self):
+        pass
+
+    def write(self, data: bytes) -> int:
+        data = bytes(data)
+        index = self._find(data)
+        if index is None:
+            self.missed += 1
+            self._pending = b""
+            # Nothing comes back: the read waits out the port's timeout
+            timeout = self.timeout or 0.0
+            self._due = time.monotonic() + (timeout / self.speed if self.speed else 0.0)
+            return len(data)
+        record = self.records[index]
+        self.position = index + 1
+        self.served += 1
+        self._pending = record.response
+        delay = record.latency / self.speed if self.speed else 0.0
+        self._due = time.monotonic() + delay
+        return len(data)
+
+    def _find(self, request: bytes) -> Optional[int]:
+        if self.position >= len(self.records):
+            if self.strict:
+                raise serial.SerialException("Replay trace exhausted")
+            return None
+        if self.strict:
+            if self.records[self.position].request != request:
+                raise serial.SerialException(
+                    f"Request {request.hex()} does not match record "
+                    f"{self.position} ({self.records[self.position].request.hex()})"
+                )
+            return self.position
+        for index in range(self.position, len(self.records)):
+            if self.records[index].request == request:
+                return index
+        return None
+
+    def read(self, size: int = 1) -> bytes:
+        wait = self._due - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def status(self) -> dict:
+        return {
+            "port": self.port,
+            "position": self.position,
+            "records": len(self.records),
+            "served": self.served,
+            "missed": self.missed,
+            "speed": self.speed,
+        }
+
+
+def summarize(path: str) -> dict:
+    records = list(read_trace(path))
+    latencies = np.array([r.latency for r in records if r.response]) * 1000
+    functions = Counter(r.request[1] for r in records if len(r.request) > 1)
+    return {
+        "started": trace_start(path).isoformat(),
+        "records": len(records),
+        "duration": round(records[-1].sent + records[-1].latency, 3) if records else 0,
+        "timeouts": sum(1 for r in records if not r.response),
+        "exceptions": sum(
+            1 for r in records if len(r.response) > 1 and r.response[1] & 0x80
+        ),
+        "function_codes": {f"{code:02X}H": n for code, n in sorted(functions.items())},
+        "latency_ms": (
+            {
+                "p50": round(float(np.percentile(latencies, 50)), 2),
+                "p95": round(float(np.percentile(latencies, 95)), 2),
+                "max": round(float(latencies.max()), 2),
+            }
+            if len(latencies)
+            else None
+        ),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a bus trace file")
+    parser.add_argument("trace")
+    args = parser.parse_args(argv)
+    for key, value in summarize(args.trace).items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
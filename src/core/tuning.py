@@ -0,0 +1,195 @@
+# src/core/tuning.py
+"""Offline PID tuning against a kiln's thermal model.
+
+Every candidate (P band, Ti, Td) is simulated on the same test firing, a
+ramp to the target followed by a hold. The grid is split across a process
+pool, and each worker simulates its whole share as one batch (see
+simulator.simulate). The best candidates are returned together with the
+requests that write them through the /pid/* endpoints.
+
+Usage:
+    python -m src.core.tuning TARGET [--kiln NAME] [--top K]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+from .config import (
+    KILN_NAME,
+    SIMULATION_STEP,
+    THERMAL_DEFAULT_MODEL,
+    TUNING_HOLD,
+    TUNING_RAMP_RATE,
+    TUNING_SETTLE_BAND,
+    TUNING_WEIGHTS,
+)
+from .simulator import simulate
+from .thermal import load_model
+
+# Default search grid
+P_BANDS = np.geomspace(2.0, 200.0, 12)
+INTEGRAL_TIMES = np.geomspace(30.0, 9999.0, 12)  # Ti register range
+DERIVATIVE_TIMES = np.array([0.0, 10.0, 30.0, 60.0, 120.0, 240.0])
+
+
+def candidate_grid(
+    p_bands=P_BANDS, integral_times=INTEGRAL_TIMES, derivative_times=DERIVATIVE_TIMES
+) -> np.ndarray:
+    """All combinations as rows of (P band, Ti, Td), rounded to register units."""
+    p, i, d = np.meshgrid(p_bands, integral_times, derivative_times, indexing="ij")
+    grid = np.column_stack([p.ravel(), i.ravel(), d.ravel()])
+    grid[:, 0] = np.round(grid[:, 0], 1)
+    grid[:, 1:] = np.round(grid[:, 1:])
+    return np.unique(grid, axis=0)
+
+
+def test_profile(
+    start: float,
+    target: float,
+    ramp_rate: float = TUNING_RAMP_RATE,
+    hold: float = TUNING_HOLD,
+    step: float = SIMULATION_STEP,
+):
+    """Setpoint of a ramp at ramp_rate (deg/h) to target, then a hold.
+    Returns (setpoint, index of the first hold sample)."""
+    ramp = abs(target - start) / ramp_rate * 3600.0
+    t = np.arange(0.0, ramp + hold, step)
+    fraction = np.clip(t / ramp, 0.0, 1.0) if ramp > 0 else np.ones_like(t)
+    return start + fraction * (target - start), int(np.ceil(ramp / step))
+
+
+def score(
+    pv: np.ndarray,
+    setpoint: np.ndarray,
+    hold_start: int,
+    step: float = SIMULATION_STEP,
+    band: float = TUNING_SETTLE_BAND,
+    weights: dict = TUNING_WEIGHTS,
+) -> dict:
+    """Overshoot, settling time and tracking error per candidate (columns of pv)."""
+    error = pv - setpoint[:, None]
+    heating = setpoint[-1] >= setpoint[0]
+    overshoot = np.maximum((error if heating else -error).max(axis=0), 0.0)
+
+    # Settled from the last hold sample outside the band onwards
+    outside = np.abs(error[hold_start:]) > band
+    last_outside = np.where(
+        outside.any(axis=0),
+        len(outside) - 1 - np.argmax(outside[::-1], axis=0),
+        -1,
+    )
+    settled = last_outside < len(outside) - 1
+    settling = np.where(settled, (last_outside + 1) * step, np.inf)
+    tracking = np.sqrt(np.mean(error * error, axis=0))
+
+    cost = (
+        weights["overshoot"] * overshoot
+        + weights["settling"] * np.where(settled, settling / 60.0, 1e6)
+        + weights["tracking"] * tracking
+    )
+    return {
+        "overshoot": overshoot,
+        "settling_time": settling,
+        "tracking_rms": tracking,
+        "cost": cost,
+    }
+
+
+def _evaluate(
+    model: dict, setpoint: np.ndarray, hold_start: int, start: float, pid: np.ndarray
+) -> dict:
+    # Runs in a worker process
+    pv, _ = simulate(model, setpoint, pid, start)
+    return score(pv, setpoint, hold_start)
+
+
+def optimise(
+    target: float,
+    model: Optional[dict] = None,
+    start: Optional[float] = None,
+    grid: Optional[np.ndarray] = None,
+    top: int = 5,
+    workers: Optional[int] = None,
+) -> List[dict]:
+    """Best PID candidates for a ramp to target, lowest cost first."""
+    model = model or load_model(KILN_NAME) or THERMAL_DEFAULT_MODEL
+    start = model["ambient"] if start is None else start
+    grid = candidate_grid() if grid is None else grid
+    setpoint, hold_start = test_profile(start, target)
+
+    workers = workers or os.cpu_count() or 1
+    chunks = np.array_split(grid, min(workers, len(grid)))
+    # spawn: the server process has threads, which fork does not copy safely
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(len(chunks), mp_context=context) as pool:
+        futures = [
+            pool.submit(_evaluate, model, setpoint, hold_start, start, chunk)
+            for chunk in chunks
+        ]
+        results = [f.result() for f in futures]
+
+    scores = {k: np.concatenate([r[k] for r in results]) for k in results[0]}
+    order = np.argsort(scores["cost"], kind="stable")[:top]
+    return [
+        {
+            "p": float(grid[k, 0]),
+            "i": float(grid[k, 1]),
+            "d": float(grid[k, 2]),
+            "overshoot": round(float(scores["overshoot"][k]), 2),
+            "settling_time": _finite(scores["settling_time"][k]),
+            "tracking_rms": round(float(scores["tracking_rms"][k]), 2),
+            "cost": round(float(scores["cost"][k]), 3),
+        }
+        for k in order
+    ]
+
+
+def _finite(value: float) -> Optional[float]:
+    return float(value) if np.isfinite(value) else None
+
+
+def apply_requests(candidate: dict) -> List[dict]:
+    """The requests that write a candidate to the controller (to the PID
+    parameter set currently selected)."""
+    return [
+        {
+            "method": "POST",
+            "path": f"/pid/{name}",
+            "json": {"value": candidate[name]},
+        }
+        for name in ("p", "i", "d")
+    ]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Tune PID on the thermal model.")
+    parser.add_argument("target", type=float, help="hold temperature of the test")
+    parser.add_argument("--start", type=float, help="default: model ambient")
+    parser.add_argument("--kiln", default=KILN_NAME, help="fitted model to use")
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+
+    model = load_model(args.kiln) or THERMAL_DEFAULT_MODEL
+    candidates = optimise(
+        args.target, model, args.start, top=args.top, workers=args.workers
+    )
+    print(
+        json.dumps(
+            {
+                "candidates": candidates,
+                "apply": apply_requests(candidates[0]),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
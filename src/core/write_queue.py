@@ -0,0 +1,111 @@
+# src/core/write_queue.py
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+
+from .config import WRITE_COALESCE_WINDOW
+
+
+class _PendingWrite:
+    def __init__(self, key: Hashable, value: Any, write: Callable[[], Any], due: float):
+        self.key = key
+        self.value = value
+        self.write = write
+        self.due = due
+        self.futures: List[Future] = []
+        self.superseded = 0
+
+
+class WriteCoalescer:
+    """Serialises writes on a background thread, last write wins per key.
+
+    A write is held for `window` seconds after the first submit for its key;
+    writes to the same key in the meantime replace its value, and every caller
+    gets the value that was actually written. Writes go out in the order their
+    keys were first submitted. A barrier write (e.g. a register that selects
+    which parameter set other registers address) goes out after everything
+    pending, and later writes never merge into writes queued before it.
+    """
+
+    def __init__(self, window: float = WRITE_COALESCE_WINDOW):
+        self.window = window
+        self.written = 0
+        self.superseded = 0
+        self._queue: Deque[_PendingWrite] = deque()
+        self._open: Dict[Hashable, _PendingWrite] = {}  # writes that can still merge
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(
+        self,
+        key: Hashable,
+        value: Any,
+        write: Callable[[], Any],
+        barrier: bool = False,
+    ) -> Future:
+        """Queue `write`, which applies `value`. Resolves with the applied value."""
+        future: Future = Future()
+        with self._cond:
+            now = time.monotonic()
+            pending = None if barrier else self._open.get(key)
+            if pending is not None:
+                pending.value = value
+                pending.write = write
+                pending.superseded += 1
+                self.superseded += 1
+            else:
+                pending = _PendingWrite(key, value, write, now + self.window)
+                if barrier:
+                    # Flush what is queued now, then the barrier itself
+                    for queued in self._queue:
+                        queued.due = now
+                    pending.due = now
+                    self._open.clear()
+                else:
+                    self._open[key] = pending
+                self._queue.append(pending)
+            pending.futures.append(future)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="write-coalescer", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._queue:
+                        delay = self._queue[0].due - time.monotonic()
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+                pending = self._queue.popleft()
+                if self._open.get(pending.key) is pending:
+                    del self._open[pending.key]
+                # Fixed from here on, a newer submit starts a new write
+                value, write = pending.value, pending.write
+
+            try:
+                write()
+            except Exception as e:
+                for future in pending.futures:
+                    future.set_exception(e)
+                continue
+            self.written += 1
+            for future in pending.futures:
+                future.set_result(value)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "pending": len(self._queue),
+                "written": self.written,
+                "superseded": self.superseded,
+            }
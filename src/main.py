@@ -1,12 +1,18 @@
 # src/main.py
+import asyncio
+
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routers import hardware, monitoring, ui
+from .routers import debug, fleet, hardware, monitoring, profile, ui
 from .core.config import STATIC_DIR
+from .core.assets import FingerprintedStaticFiles, assets
+from .core.fleet import fleet as kiln_fleet
+from .core.modbus_gateway import gateway
+from .core.profile_runner import runner
+from .core.timing import TimedExecutor, TimedJSONResponse, TimingMiddleware
 
-app = FastAPI(title="Unified Kiln Controller")
+app = FastAPI(title="Unified Kiln Controller", default_response_class=TimedJSONResponse)
 
 # Middleware
 app.add_middleware(
@@ -16,22 +22,43 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TimingMiddleware)
 
 # Static files
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+app.mount(
+    "/static",
+    FingerprintedStaticFiles(directory=STATIC_DIR, manifest=assets),
+    name="static",
+)
 
 # Include Routers
 app.include_router(hardware.router)
 app.include_router(monitoring.router)
+app.include_router(profile.router)
+app.include_router(fleet.router)
 app.include_router(ui.router)
+app.include_router(debug.router)
 
 
 @app.on_event("startup")
 async def startup_event():
     print("Unified Kiln Service starting...")
+    # asyncio.to_thread runs here; records thread waits into request timings
+    asyncio.get_running_loop().set_default_executor(TimedExecutor())
+    if monitoring.bus_worker():
+        # That process samples the controller, recovers and runs the profile,
+        # serves the Modbus gateway and owns the event hub
+        monitoring.start_relay()
+    else:
+        monitoring.start_monitor(monitoring.get_kiln())
+        await runner.recover(monitoring.get_kiln())
+        await gateway.start(monitoring.get_kiln())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     print("Unified Kiln Service shutting down...")
+    await gateway.stop()
     await monitoring.shutdown_monitoring()
+    await runner.shutdown()
+    await kiln_fleet.shutdown()
@@ -0,0 +1,110 @@
+# src/routers/debug.py
+import asyncio
+import secrets
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+
+from .monitoring import bus_worker
+from ..core.config import ADMIN_TOKEN
+from ..core.models import ProfilerRequest
+from ..core.profiler import profiler
+from ..core.timing import route_timings
+
+router = APIRouter(tags=["debug"])
+
+
+def require_admin(authorization: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=403, detail="Admin endpoints disabled: set KILN_ADMIN_TOKEN"
+        )
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        token.encode(), ADMIN_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid admin token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get("/debug/timings")
+async def get_timings():
+    """Rolling per-route latency percentiles (ms), split by stage."""
+    return {"window": route_timings.window, "routes": route_timings.summary()}
+
+
+@router.delete("/debug/timings", dependencies=[Depends(require_admin)])
+async def clear_timings():
+    route_timings.clear()
+    return {"status": "ok"}
+
+
+# --- Profiler ---
+# process=bus profiles the bus worker (recorder, profile runner, serial I/O)
+# instead of the HTTP worker that answers the request.
+
+
+async def _profiler(process: str, action: str, *args):
+    if process == "local":
+        return getattr(profiler, action)(*args)
+    if not bus_worker():
+        raise HTTPException(
+            status_code=400, detail="No bus worker: the bus runs in this process"
+        )
+    return await asyncio.to_thread(bus_worker().command, "profiler", action, *args)
+
+
+@router.get("/debug/profiler", dependencies=[Depends(require_admin)])
+async def get_profiler_status(process: Literal["local", "bus"] = "local"):
+    return await _profiler(process, "status")
+
+
+@router.post("/debug/profiler/start", dependencies=[Depends(require_admin)])
+async def start_profiler(
+    req: ProfilerRequest, process: Literal["local", "bus"] = "local"
+):
+    """Profile for req.seconds; the session stops by itself. The stack
+    sampler runs by default; cProfile must be asked for."""
+    try:
+        status = await _profiler(
+            process, "start", req.seconds, req.cprofile, req.sampling, req.interval
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "ok", **status}
+
+
+@router.post("/debug/profiler/stop", dependencies=[Depends(require_admin)])
+async def stop_profiler(process: Literal["local", "bus"] = "local"):
+    try:
+        status = await _profiler(process, "stop")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "ok", **status}
+
+
+@router.get("/debug/profiler/result", dependencies=[Depends(require_admin)])
+async def get_profiler_result(
+    format: Literal["pstats", "text", "collapsed"] = "pstats",
+    process: Literal["local", "bus"] = "local",
+):
+    """pstats: binary, for pstats.Stats or snakeviz. text: top functions by
+    own time. collapsed: stacks for flamegraph.pl or speedscope."""
+    try:
+        content = await _profiler(process, "export", format)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if format == "text":
+        return PlainTextResponse(content)
+    filename = f"kiln-{process}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format == "pstats":
+        return Response(content, media_type="application/octet-stream", headers=headers)
+    return PlainTextResponse(content, headers=headers)
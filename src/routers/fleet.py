@@ -0,0 +1,33 @@
+# src/routers/fleet.py
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request
+
+from ..core.broadcast import sse_response
+from ..core.config import FLEET_STREAM_INTERVAL
+from ..core.fleet import fleet
+
+router = APIRouter(prefix="/fleet", tags=["fleet"])
+
+
+@router.get("/snapshot")
+async def get_fleet_snapshot(
+    since: Optional[int] = None,
+    wait: float = Query(0.0, ge=0.0, le=60.0),
+    local: bool = False,
+):
+    """Latest state of every kiln, from memory. With `since` (a version from
+    an earlier response) and `wait`, holds the request until something newer
+    arrives or `wait` seconds pass."""
+    fleet.ensure_peers()
+    if since is not None and wait > 0:
+        await fleet.wait(since, wait)
+    return fleet.snapshot(local_only=local)
+
+
+@router.get("/stream")
+async def stream_fleet(request: Request):
+    """Server-sent events with the whole fleet snapshot on every change, at
+    most one per FLEET_STREAM_INTERVAL seconds."""
+    fleet.ensure_peers()
+    return sse_response(request, fleet.subscribe, min_interval=FLEET_STREAM_INTERVAL)
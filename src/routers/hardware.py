@@ -1,8 +1,11 @@
 # src/routers/hardware.py
 import asyncio
+import minimalmodbus
 from fastapi import APIRouter, HTTPException, Depends
 from typing import Any
-from .monitoring import get_kiln
+from .monitoring import bus_worker, get_kiln, invalidate_program, latest_sample
+from ..core.events import event_hub
+from ..core.modbus_gateway import gateway
 from ..core.models import (
     SetpointRequest,
     ControlMethodRequest,
@@ -24,6 +27,7 @@ from ..core.models import (
     SensorTypeRequest,
     PatternStepRequest,
     IntValueRequest,
+    SettingsRequest,
 )
 
 router = APIRouter(tags=["hardware"])
@@ -37,11 +41,19 @@ async def _eval(kiln: Any, func_name: str, *args, **kwargs):
     return await asyncio.to_thread(method, *args, **kwargs)
 
 
+def _changed(event_type: str, **data):
+    event_hub.publish({"type": event_type, **data})
+
+
 # --- Core Values ---
 
 
 @router.get("/pv")
 async def get_process_value(kiln: Any = Depends(get_kiln)):
+    sample = latest_sample()
+    if sample is not None:
+        # Multi-worker mode: the bus worker's newest sample, from shared memory
+        return {"pv": sample["temperature"]}
     pv = await _eval(kiln, "get_pv")
     return {"pv": pv}
 
@@ -54,8 +66,15 @@ async def get_setpoint(kiln: Any = Depends(get_kiln)):
 
 @router.post("/setpoint")
 async def set_setpoint(req: SetpointRequest, kiln: Any = Depends(get_kiln)):
-    await _eval(kiln, "set_setpoint", req.value)
-    return {"status": "ok", "setpoint": req.value}
+    applied = await _eval(kiln, "set_setpoint", req.value)
+    _changed("setting_changed", setting="setpoint", value=applied)
+    return {"status": "ok", "setpoint": applied}
+
+
+@router.get("/dynamic-setpoint")
+async def get_dynamic_setpoint(kiln: Any = Depends(get_kiln)):
+    val = await _eval(kiln, "get_dynamic_set_value")
+    return {"dynamic_setpoint": val}
 
 
 @router.get("/temp-range")
@@ -83,6 +102,7 @@ async def get_control_method(kiln: Any = Depends(get_kiln)):
 @router.post("/setting/control-method")
 async def set_control_method(req: ControlMethodRequest, kiln: Any = Depends(get_kiln)):
     await _eval(kiln, "set_control_method", req.value)
+    _changed("setting_changed", setting="control_method", value=req.value)
     return {"status": "ok", "control_method": req.value}
 
 
@@ -97,6 +117,7 @@ async def set_heating_cooling_selection(
     req: HeatingCoolingRequest, kiln: Any = Depends(get_kiln)
 ):
     await _eval(kiln, "set_heating_cooling_selection", req.value)
+    _changed("setting_changed", setting="heating_cooling", value=req.value)
     return {"status": "ok", "heating_cooling": req.value}
 
 
@@ -109,6 +130,7 @@ async def get_temp_unit(kiln: Any = Depends(get_kiln)):
 @router.post("/setting/temp-unit")
 async def set_temp_unit(req: TempUnitRequest, kiln: Any = Depends(get_kiln)):
     await _eval(kiln, "set_temp_unit_display", req.value)
+    _changed("setting_changed", setting="temp_unit", value=req.value)
     return {"status": "ok", "temp_unit": req.value}
 
 
@@ -140,6 +162,64 @@ async def get_all_settings(kiln: Any = Depends(get_kiln)):
     }
 
 
+# Setters behind POST /settings. PID selection comes before P/I/D, which
+# address the selected set.
+SETTINGS_SETTERS = {
+    "control_method": "set_control_method",
+    "heating_cooling": "set_heating_cooling_selection",
+    "temp_unit": "set_temp_unit_display",
+    "sensor_type": "set_sensor_type",
+    "decimal_point": "set_decimal_point_position",
+    "analog_decimal": "set_analog_decimal_setting",
+    "pid_selection": "set_pid_parameter_selection",
+    "p": "set_proportional_band",
+    "i": "set_integral_time",
+    "d": "set_derivative_time",
+    "setpoint": "set_setpoint",
+    "valve_feedback": "set_valve_feedback_setting",
+    "at_valve_feedback": "set_auto_tuning_valve_feedback",
+    "system_alarm": "set_system_alarm_setting",
+    "at_setting": "set_at_setting",
+    "stop_pid": "set_stop_setting_pid",
+    "temp_stop_pid": "set_temporarily_stop_pid",
+    "run_stop": "set_run_stop_setting",
+    "lock_status": "set_setting_lock_status",
+}
+
+
+@router.post("/settings")
+async def set_settings(
+    req: SettingsRequest, verify: bool = False, kiln: Any = Depends(get_kiln)
+):
+    """Write several settings. With verify=true every affected register is
+    read back afterwards (block reads); mismatches are reported per field, and
+    registers that could not be read back as unverified."""
+    unknown = sorted(set(req.values) - set(SETTINGS_SETTERS))
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown settings: {', '.join(unknown)}"
+        )
+    if asyncio.iscoroutinefunction(getattr(kiln, "set_settings", None)):
+        result = await kiln.set_settings(req.values, verify)
+    else:
+        try:
+            calls = [
+                (name, setter, req.values[name])
+                for name, setter in SETTINGS_SETTERS.items()
+                if name in req.values
+            ]
+            result = await asyncio.to_thread(kiln.apply_settings, calls, verify)
+        except (ValueError, minimalmodbus.ModbusException, OSError) as e:
+            # Fields before the failing one may have been written
+            _changed(
+                "settings_changed", values=req.values, status="error", error=str(e)
+            )
+            status_code = 400 if isinstance(e, ValueError) else 503
+            raise HTTPException(status_code=status_code, detail=str(e))
+    _changed("settings_changed", values=req.values, status=result["status"])
+    return result
+
+
 @router.get("/setting/lock-status")
 async def get_lock_status(kiln: Any = Depends(get_kiln)):
     val = await _eval(kiln, "get_setting_lock_status")
@@ -149,6 +229,7 @@ async def get_lock_status(kiln: Any = Depends(get_kiln)):
 @router.post("/setting/lock-status")
 async def set_lock_status(req: LockStatusRequest, kiln: Any = Depends(get_kiln)):
     await _eval(kiln, "set_setting_lock_status", req.value)
+    _changed("setting_changed", setting="lock_status", value=req.value)
     return {"status": "ok", "lock_status": req.value}
 
 
@@ -161,6 +242,7 @@ async def get_pid_selection(kiln: Any = Depends(get_kiln)):
 @router.post("/setting/pid-selection")
 async def set_pid_selection(req: PIDSelectionRequest, kiln: Any = Depends(get_kiln)):
     await _eval(kiln, "set_pid_parameter_selection", req.value)
+    _changed("setting_changed", setting="pid_selection", value=req.value)
     return {"status": "ok", "pid_selection": req.value}
 
 
@@ -173,6 +255,7 @@ async def get_analog_decimal(kiln: Any = Depends(get_kiln)):
 @router.post("/setting/analog-decimal")
 async def set_analog_decimal(req: AnalogDecimalRequest, kiln: Any = Depends(get_kiln)):
     await _eval(kiln, "set_analog_decimal_setting", req.value)
+    _changed("setting_changed", setting="analog_decimal", value=req.value)
     return {"status": "ok", "analog_decimal": req.value}
 
 
@@ -185,6 +268,7 @@ async def get_valve_feedback(kiln: Any = Depends(get_kiln)):
 @router.post("/setting/valve-feedback")
 async def set_valve_feedback(req: ValveFeedbackRequest, kiln: Any = Depends(get_kiln)):
     await _eval(kiln, "set_valve_feedback_setting", req.value)
+    _changed("setting_changed", setting="valve_feedback", value=req.value)
     return {"status": "ok", "valve_feedback": req.value}
 
 
@@ -199,6 +283,7 @@ async def set_at_valve_feedback(
     req: ATValveFeedbackRequest, kiln: Any = Depends(get_kiln)
 ):
     await _eval(kiln, "set_auto_tuning_valve_feedback", req.value)
+    _changed("setting_changed", setting="at_valve_feedback", value=req.value)
     return {"status": "ok", "at_valve_feedback": req.value}
 
 
@@ -211,6 +296,7 @@ async def get_decimal_point(kiln: Any = Depends(get_kiln)):
 @router.post("/setting/decimal-point")
 async def set_decimal_point(req: DecimalPointRequest, kiln: Any = Depends(get_kiln)):
     await _eval(kiln, "set_decimal_point_position", req.value)
+    _changed("setting_changed", setting="decimal_point", value=req.value)
     return {"status": "ok", "decimal_point": req.value}
 
 
@@ -223,6 +309,7 @@ async def get_at_setting(kiln: Any = Depends(get_kiln)):
 @router.post("/setting/at-setting")
 async def set_at_setting(req: ATSettingRequest, kiln: Any = Depends(get_kiln)):
     await _eval(kiln, "set_at_setting", req.value)
+    _changed("setting_changed", setting="at_setting", value=req.value)
     return {"status": "ok", "at_setting": req.value}
 
 
@@ -235,6 +322,7 @@ async def get_stop_pid(kiln: Any = Depends(get_kiln)):
 @router.post("/setting/stop-pid")
 async def set_stop_pid(req: StopSettingPIDRequest, kiln: Any = Depends(get_kiln)):
     await _eval(kiln, "set_stop_setting_pid", req.value)
+    _changed("setting_changed", setting="stop_pid", value=req.value)
     return {"status": "ok", "stop_pid": req.value}
 
 
@@ -247,12 +335,14 @@ async def get_temp_stop_pid(kiln: Any = Depends(get_kiln)):
 @router.post("/setting/temp-stop-pid")
 async def set_temp_stop_pid(req: TempStopPIDRequest, kiln: Any = Depends(get_kiln)):
     await _eval(kiln, "set_temporarily_stop_pid", req.value)
+    _changed("setting_changed", setting="temp_stop_pid", value=req.value)
     return {"status": "ok", "temp_stop_pid": req.value}
 
 
 @router.post("/sensor-type")
 async def set_sensor_type(req: SensorTypeRequest, kiln: Any = Depends(get_kiln)):
     await _eval(kiln, "set_sensor_type", req.value)
+    _changed("setting_changed", setting="sensor_type", value=req.value)
     return {"status": "ok", "sensor_type": req.value}
 
 
@@ -267,8 +357,9 @@ async def get_proportional_band(kiln: Any = Depends(get_kiln)):
 
 @router.post("/pid/p")
 async def set_proportional_band(req: PIDRequest, kiln: Any = Depends(get_kiln)):
-    await _eval(kiln, "set_proportional_band", req.value)
-    return {"status": "ok", "proportional_band": req.value}
+    applied = await _eval(kiln, "set_proportional_band", req.value)
+    _changed("setting_changed", setting="proportional_band", value=applied)
+    return {"status": "ok", "proportional_band": applied}
 
 
 @router.get("/pid/i")
@@ -279,8 +370,9 @@ async def get_integral_time(kiln: Any = Depends(get_kiln)):
 
 @router.post("/pid/i")
 async def set_integral_time(req: PIDRequest, kiln: Any = Depends(get_kiln)):
-    await _eval(kiln, "set_integral_time", req.value)
-    return {"status": "ok", "integral_time": req.value}
+    applied = await _eval(kiln, "set_integral_time", req.value)
+    _changed("setting_changed", setting="integral_time", value=applied)
+    return {"status": "ok", "integral_time": applied}
 
 
 @router.get("/pid/d")
@@ -291,8 +383,9 @@ async def get_derivative_time(kiln: Any = Depends(get_kiln)):
 
 @router.post("/pid/d")
 async def set_derivative_time(req: PIDRequest, kiln: Any = Depends(get_kiln)):
-    await _eval(kiln, "set_derivative_time", req.value)
-    return {"status": "ok", "derivative_time": req.value}
+    applied = await _eval(kiln, "set_derivative_time", req.value)
+    _changed("setting_changed", setting="derivative_time", value=applied)
+    return {"status": "ok", "derivative_time": applied}
 
 
 # --- Outputs & Alarms ---
@@ -310,12 +403,19 @@ async def get_output_value(index: int, kiln: Any = Depends(get_kiln)):
         raise HTTPException(status_code=404, detail="Output index must be 1 or 2")
 
 
+@router.get("/ct-current")
+async def get_ct_current(kiln: Any = Depends(get_kiln)):
+    val = await _eval(kiln, "get_ct_read_value")
+    return {"ct_current": val}
+
+
 @router.post("/output/{index}")
 async def set_output_value(
     index: int, req: OutputRequest, kiln: Any = Depends(get_kiln)
 ):
     method_name = f"set_output_{index}_value"
     await _eval(kiln, method_name, req.value)
+    _changed("setting_changed", setting=f"output{index}", value=req.value)
     return {"status": "ok", "output": index, "value": req.value}
 
 
@@ -328,6 +428,7 @@ async def get_system_alarm(kiln: Any = Depends(get_kiln)):
 @router.post("/alarm/system")
 async def set_system_alarm(req: SystemAlarmRequest, kiln: Any = Depends(get_kiln)):
     await _eval(kiln, "set_system_alarm_setting", req.value)
+    _changed("setting_changed", setting="system_alarm", value=req.value)
     return {"status": "ok", "system_alarm": req.value}
 
 
@@ -376,6 +477,10 @@ async def set_pattern_step(
             await asyncio.to_thread(
                 kiln.set_pattern_step, id, step_id, req.temp, req.time
             )
+        await invalidate_program()
+        _changed(
+            "pattern_changed", pattern=id, step=step_id, temp=req.temp, time=req.time
+        )
         return {"status": "ok", "pattern": id, "step": step_id, "data": req}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -391,6 +496,7 @@ async def get_start_pattern(kiln: Any = Depends(get_kiln)):
 async def set_start_pattern(req: IntValueRequest, kiln: Any = Depends(get_kiln)):
     try:
         await _eval(kiln, "set_start_pattern_number", req.value)
+        _changed("setting_changed", setting="start_pattern", value=req.value)
         return {"status": "ok", "start_pattern": req.value}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -411,11 +517,53 @@ async def set_actual_steps(
 ):
     try:
         await _eval(kiln, "set_actual_step_number_setting", id, req.value)
+        await invalidate_program()
+        _changed("pattern_changed", pattern=id, field="actual_steps", value=req.value)
         return {"status": "ok", "pattern_id": id, "actual_steps": req.value}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.get("/pattern/{id}/cycles")
+async def get_cycles(id: int, kiln: Any = Depends(get_kiln)):
+    try:
+        val = await _eval(kiln, "get_cycle_number", id)
+        return {"pattern_id": id, "cycles": val}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/pattern/{id}/cycles")
+async def set_cycles(id: int, req: IntValueRequest, kiln: Any = Depends(get_kiln)):
+    try:
+        await _eval(kiln, "set_cycle_number", id, req.value)
+        await invalidate_program()
+        _changed("pattern_changed", pattern=id, field="cycles", value=req.value)
+        return {"status": "ok", "pattern_id": id, "cycles": req.value}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/pattern/{id}/link")
+async def get_link(id: int, kiln: Any = Depends(get_kiln)):
+    try:
+        val = await _eval(kiln, "get_link_pattern_number", id)
+        return {"pattern_id": id, "link": val}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/pattern/{id}/link")
+async def set_link(id: int, req: IntValueRequest, kiln: Any = Depends(get_kiln)):
+    try:
+        await _eval(kiln, "set_link_pattern_number", id, req.value)
+        await invalidate_program()
+        _changed("pattern_changed", pattern=id, field="link", value=req.value)
+        return {"status": "ok", "pattern_id": id, "link": req.value}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/current/program")
 async def get_current_program_status(kiln: Any = Depends(get_kiln)):
     if hasattr(kiln, "get_executing_program_status") and asyncio.iscoroutinefunction(
@@ -450,6 +598,12 @@ async def get_led_status(kiln: Any = Depends(get_kiln)):
     }
 
 
+@router.get("/status/snapshot")
+async def get_status_snapshot(kiln: Any = Depends(get_kiln)):
+    """Alarm, event, AT and RUN/STOP flags and CT current, as the recorder sees them."""
+    return await _eval(kiln, "get_status_snapshot")
+
+
 @router.get("/run")
 async def get_run_status(kiln: Any = Depends(get_kiln)):
     val = await _eval(kiln, "get_run_stop_setting")
@@ -459,6 +613,7 @@ async def get_run_status(kiln: Any = Depends(get_kiln)):
 @router.post("/run")
 async def set_run_status(req: RunStopRequest, kiln: Any = Depends(get_kiln)):
     await _eval(kiln, "set_run_stop_setting", req.value)
+    _changed("setting_changed", setting="run_stop", value=req.value)
     return {"status": "ok", "run_status": req.value}
 
 
@@ -470,3 +625,38 @@ async def get_key_status(kiln: Any = Depends(get_kiln)):
         "up": await _eval(kiln, "get_key_up_status"),
         "down": await _eval(kiln, "get_key_down_status"),
     }
+
+
+# --- Bus Trace ---
+
+
+@router.get("/bus/trace")
+async def get_bus_trace(kiln: Any = Depends(get_kiln)):
+    return await _eval(kiln, "trace_status")
+
+
+@router.post("/bus/trace/start")
+async def start_bus_trace(kiln: Any = Depends(get_kiln)):
+    """Capture every Modbus frame into a new file under TRACES_DIR."""
+    try:
+        status = await _eval(kiln, "start_trace")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "ok", **status}
+
+
+@router.post("/bus/trace/stop")
+async def stop_bus_trace(kiln: Any = Depends(get_kiln)):
+    try:
+        status = await _eval(kiln, "stop_trace")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "ok", **status}
+
+
+@router.get("/bus/gateway")
+async def get_gateway_status():
+    """Modbus TCP gateway clients and their request counts."""
+    if bus_worker():
+        return await asyncio.to_thread(bus_worker().command, "gateway")
+    return gateway.status()
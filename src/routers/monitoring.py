@@ -1,13 +1,57 @@
 # src/routers/monitoring.py
 import asyncio
 import json
+import os
+import tempfile
+import threading
 import time
 from datetime import datetime
-from typing import List, Optional, Any
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional, Any
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 
 from ..core.kiln import kiln as direct_kiln
-from ..core.config import RECORDING_FILE
+from ..core.bus import BusClient, BusError
+from ..core.config import (
+    BUS_POLL_INTERVAL,
+    BUS_RELAY_RETRY,
+    BUS_SAMPLE_MAX_AGE,
+    KILN_NAME,
+    MONITOR_PERIOD,
+    READ_CT_CURRENT,
+    RECORDING_FILE,
+    SAMPLE_PERIOD,
+    SAMPLE_STALE_LIMIT,
+    STATUS_EVENTS,
+)
+from ..core.recordings import (
+    CURRENT_SESSION,
+    archive_current_recording,
+    gaps_path,
+    iter_json_array,
+    iter_ndjson,
+    list_sessions,
+    read_gaps,
+    session_path,
+    session_span,
+)
+from ..core.export import EXPORT_FORMATS, iter_csv, write_npz
+from ..core.aggregate import aggregates, parse_duration
+from ..core.recording_writer import RecordingWriter
+from ..core.scheduler import DeadlineScheduler
+from ..core.quality import GapTracker, SampleQuality
+from ..core.derived import DerivedChannels
+from ..core.broadcast import KEEP_ALIVE, Broadcaster, sse_response
+from ..core.detectors import detectors
+from ..core.events import StatusDiff, check_webhook_host, event_hub
+from ..core.fleet import fleet
+from ..core.event_log import event_log, to_epoch
+from ..core.models import WebhookRequest
+from ..core.eta import eta
+from ..core.thermal import archived_sessions, fit_sessions, load_model, save_model
+from ..core.simulator import run_simulation
+from ..core.tuning import apply_requests, optimise
 
 router = APIRouter(tags=["monitoring"])
 
@@ -17,45 +61,353 @@ def get_kiln():
     return direct_kiln
 
 
+def bus_worker() -> Optional[BusClient]:
+    """The bus worker when this process is one of several HTTP workers.
+    Recording runs there, so recording state is the same for every worker."""
+    return direct_kiln if isinstance(direct_kiln, BusClient) else None
+
+
+# Raw channels stored with every sample
+CHANNELS = (
+    "temperature",
+    "setpoint",
+    "dynamic_setpoint",
+    "pattern",
+    "step",
+    "step_time_left",
+    "output1",
+    "output2",
+    "ct_current",
+)
+
 # Global State
+monitor_task: Optional[asyncio.Task] = None
 recording_task: Optional[asyncio.Task] = None
 start_time: Optional[float] = None
+sampler: Optional[DeadlineScheduler] = None
+samples = Broadcaster()
+# Newest acquired sample, from the monitor or the recorder
+acquired = Broadcaster(maxsize=1)
+anomalies = Broadcaster()
+status_diff = StatusDiff()
+# Bus worker state mirrored by the relay (multi-worker mode)
+bus_state: dict = {"is_recording": False, "prediction": None}
+_relay_stop: Optional[threading.Event] = None
+
+
+async def _read_channels(kiln: Any) -> dict:
+    # Check if kiln is KilnClient (has async methods) or direct (sync)
+    read_ct = READ_CT_CURRENT and not STATUS_EVENTS  # else from the status block
+    if hasattr(kiln, "get_pv") and asyncio.iscoroutinefunction(kiln.get_pv):
+        status = await kiln.get_executing_program_status()
+        return {
+            "temperature": await kiln.get_pv(),
+            "setpoint": await kiln.get_setpoint(),
+            "dynamic_setpoint": await kiln.get_dynamic_setpoint(),
+            "pattern": status["pattern"],
+            "step": status["step"],
+            "step_time_left": status["time_left_min"] * 60 + status["time_left_sec"],
+            "output1": await kiln.get_output1(),
+            "output2": await kiln.get_output2(),
+            "ct_current": await kiln.get_ct_current() if read_ct else None,
+        }
+
+    # Block reads instead of one transaction per register
+    def fetch():
+        pv, sv = kiln.get_pv_and_setpoint()
+        position = kiln.get_program_position()
+        output1, output2 = kiln.get_output_values()
+        return {
+            "temperature": pv,
+            "setpoint": sv,
+            "dynamic_setpoint": position["dynamic_set_value"],
+            "pattern": position["pattern"],
+            "step": position["step"],
+            "step_time_left": position["time_left_min"] * 60
+            + position["time_left_sec"],
+            "output1": output1,
+            "output2": output2,
+            "ct_current": kiln.get_ct_read_value() if read_ct else None,
+        }
+
+    return await asyncio.to_thread(fetch)
+
+
+async def _read_status(kiln: Any) -> Optional[dict]:
+    """Status flags, or None without STATUS_EVENTS or when the read fails."""
+    if not STATUS_EVENTS:
+        return None
+    try:
+        if asyncio.iscoroutinefunction(getattr(kiln, "get_status_snapshot", None)):
+            return await kiln.get_status_snapshot()
+        return await asyncio.to_thread(kiln.get_status_snapshot)
+    except Exception as e:
+        print(f"Error reading status: {e}")
+        return None
+
+
+async def _acquire(kiln: Any) -> tuple:
+    """Returns (channels, status flags). Status is read on its own, so a
+    failed status read costs the flags and CT current, not the sample."""
+    channels = await _read_channels(kiln)
+    flags = await _read_status(kiln)
+    if flags:
+        # The status block includes the CT current
+        channels["ct_current"] = flags["ct_current"]
+    return channels, flags
+
+
+def _is_recording() -> bool:
+    return recording_task is not None and not recording_task.done()
+
+
+def is_recording() -> bool:
+    """Whether a recording runs, here or in the bus worker."""
+    return bus_state["is_recording"] if bus_worker() else _is_recording()
+
+
+def current_prediction() -> Optional[dict]:
+    """The ETA prediction of the process that records."""
+    return bus_state["prediction"] if bus_worker() else eta.prediction
+
+
+def recording_state() -> dict:
+    """What the bus worker relays as "state" (see relay)."""
+    return {"is_recording": _is_recording(), "prediction": eta.prediction}
+
+
+def _is_fresh(sample: Optional[dict]) -> bool:
+    if sample is None:
+        return False
+    age = time.time() - datetime.fromisoformat(sample["timestamp"]).timestamp()
+    return age <= BUS_SAMPLE_MAX_AGE
+
+
+def latest_sample() -> Optional[dict]:
+    """The bus worker's newest acquired sample, from shared memory. None
+    without a bus worker, before it has acquired one, or when the sample is
+    older than BUS_SAMPLE_MAX_AGE (callers then ask the worker)."""
+    bus = bus_worker()
+    if bus is None:
+        return None
+    try:
+        sample = bus.ring.latest()
+        if not _is_fresh(sample) and bus.reattach():
+            sample = bus.ring.latest()  # the worker restarted with a new ring
+    except (FileNotFoundError, RuntimeError):
+        return None  # the worker has not created the ring yet
+    return sample if _is_fresh(sample) else None
+
+
+async def invalidate_program():
+    """Forget the cached pattern memory after a pattern write, here and in
+    the bus worker (whose ETA follows the running program)."""
+    eta.invalidate_program()
+    if bus_worker():
+        await asyncio.to_thread(bus_worker().command, "invalidate_program")
+
+
+def _mirror(kind: str, message: Any):
+    if kind == "event":
+        event_hub.mirror(message)
+        if message["type"] == "pattern_changed":
+            eta.invalidate_program()  # written through another HTTP worker
+    elif kind == "anomaly":
+        detectors.mirror(message)
+        anomalies.publish(message)
+    elif kind == "fleet":
+        fleet.mirror(message)
+    elif kind == "state":
+        bus_state.update(message)
+
+
+def _relay(bus: BusClient, loop: asyncio.AbstractEventLoop, stop: threading.Event):
+    lost = False
+    while not stop.is_set():
+        try:
+            with bus.subscribe() as conn:
+                if lost:
+                    print("Bus worker relay reconnected")
+                lost = False
+                # A restarted worker has a new ring and sends its detector
+                # history again
+                loop.call_soon_threadsafe(bus.reattach)
+                loop.call_soon_threadsafe(detectors.reset)
+                while not stop.is_set():
+                    if conn.poll(1.0):
+                        loop.call_soon_threadsafe(_mirror, *conn.recv())
+        except (BusError, OSError, EOFError) as e:
+            if not lost and not stop.is_set():
+                print(f"Bus worker relay lost: {e}")
+            lost = True
+            stop.wait(BUS_RELAY_RETRY)
 
 
-async def recorder(kiln: Any):
-    global start_time
+def _forward_event(event: dict):
+    def done(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Forwarding event to the bus worker failed: {future.exception()}")
+
+    asyncio.get_running_loop().run_in_executor(
+        None, bus_worker().command, "publish", event
+    ).add_done_callback(done)
+
+
+def start_relay():
+    """Multi-worker mode: send events to the bus worker's hub, and mirror its
+    events, anomalies, fleet and recording state in this process."""
+    global _relay_stop
+    if _relay_stop is not None:
+        return
+    _relay_stop = threading.Event()
+    event_hub.forward = _forward_event
+    threading.Thread(
+        target=_relay,
+        args=(bus_worker(), asyncio.get_running_loop(), _relay_stop),
+        name="bus-relay",
+        daemon=True,
+    ).start()
+
+
+def _diff_status(sample: dict, flags: Optional[dict]):
+    snapshot = {"pattern": sample["pattern"], "step": sample["step"]}
+    stamp = {"timestamp": sample["timestamp"], "time_passed": sample["time_passed"]}
+    for event in status_diff.diff({**(flags or {}), **snapshot}):
+        event_hub.publish({**event, **stamp})
+
+
+def _detect(sample: dict, t: float):
+    """Run the anomaly detectors on the clock of time.monotonic()."""
+    for event in detectors.update(sample, t):
+        print(f"Anomaly {event['detector']} {event['state']}")
+        anomalies.publish(event)
+        event_hub.publish({"type": f"anomaly_{event['state']}", **event})
+
+
+async def monitor(kiln: Any, period: float = MONITOR_PERIOD):
+    """Always-on acquisition: samples the controller while no recording runs
+    (the recorder does it then), so detectors, status events and the fleet
+    view do not depend on recording."""
+    scheduler = DeadlineScheduler(period)
+    derived = DerivedChannels()
+    failing = False
+    while True:
+        await scheduler.wait()
+        if _is_recording():
+            continue
+        started = time.monotonic()
+        try:
+            channels, flags = await _acquire(kiln)
+        except Exception as e:
+            if not failing:
+                print(f"Monitor read failed: {e}")
+            failing = True
+            continue
+        failing = False
+        if _is_recording():
+            continue  # started meanwhile; its samples are the ones that count
+        midpoint = (started + time.monotonic()) / 2
+        time_passed = round(midpoint - scheduler.anchor_monotonic, 3)
+        sample = {
+            "timestamp": datetime.fromtimestamp(
+                scheduler.wall_time(midpoint)
+            ).isoformat(),
+            "time_passed": time_passed,
+            **channels,
+            "quality": SampleQuality.GOOD.value,
+        }
+        sample.update(derived.update(time_passed, channels))
+        acquired.publish(sample)
+        fleet.update(KILN_NAME, sample, flags)
+        _detect(sample, midpoint)
+        _diff_status(sample, flags)
+
+
+def start_monitor(kiln: Any):
+    """Start the always-on acquisition (idempotent)."""
+    global monitor_task
+    if monitor_task is None or monitor_task.done():
+        monitor_task = asyncio.create_task(monitor(kiln))
+
+
+async def recorder(kiln: Any, scheduler: DeadlineScheduler):
     print("Recording started...")
+    writer = RecordingWriter(RECORDING_FILE)
+    gap_writer = RecordingWriter(gaps_path(RECORDING_FILE))
+    writer.start()
+    gap_writer.start()
+    gaps = GapTracker()
+    derived = DerivedChannels()
+    last_good = None  # (channels, time.monotonic())
     try:
-        with open(RECORDING_FILE, "a") as f:
-            while True:
+        while True:
+            deadline, missed = await scheduler.wait()
+            if missed:
+                first_missed = deadline - missed * scheduler.period
+                gaps.missed(round(first_missed - scheduler.anchor_monotonic, 3), missed)
+
+            started = time.monotonic()
+            quality = SampleQuality.GOOD
+            try:
+                channels, flags = await _acquire(kiln)
+            except Exception as e:
+                print(f"Error querying temperature: {e}")
                 try:
-                    # Check if kiln is KilnClient (has async methods) or direct (sync)
-                    if hasattr(kiln, "get_pv") and asyncio.iscoroutinefunction(
-                        kiln.get_pv
-                    ):
-                        temperature = await kiln.get_pv()
-                    else:
-                        temperature = await asyncio.to_thread(kiln.get_pv)
-
-                    now = datetime.now()
-                    elapsed = time.time() - start_time
-
-                    log_entry = {
-                        "timestamp": now.isoformat(),
-                        "time_passed": round(elapsed, 2),
-                        "temperature": temperature,
-                    }
-
-                    f.write(json.dumps(log_entry) + "\n")
-                    f.flush()
+                    channels, flags = await _acquire(kiln)
+                    quality = SampleQuality.RETRIED
                 except Exception as e:
-                    print(f"Error querying temperature: {e}")
+                    print(f"Retry failed: {e}")
+                    channels, flags = dict.fromkeys(CHANNELS), None
+                    quality = SampleQuality.TIMEOUT
+            finished = time.monotonic()
+            # Timestamp at the middle of the bus transaction
+            midpoint = (started + finished) / 2
+            time_passed = round(midpoint - scheduler.anchor_monotonic, 3)
+
+            if quality is SampleQuality.TIMEOUT:
+                gaps.failed(time_passed)
+                if last_good and finished - last_good[1] <= SAMPLE_STALE_LIMIT:
+                    channels = last_good[0]
+                    quality = SampleQuality.STALE
+            else:
+                last_good = (channels, finished)
+                gap = gaps.close(time_passed)
+                if gap:
+                    gap_writer.append(gap)
 
-                await asyncio.sleep(1)
+            sample = {
+                "timestamp": datetime.fromtimestamp(
+                    scheduler.wall_time(midpoint)
+                ).isoformat(),
+                "time_passed": time_passed,
+                **channels,
+                "quality": quality.value,
+            }
+            # Stale values are repeats, keep them out of the heat rate fit
+            sample.update(
+                derived.update(
+                    time_passed, channels, fresh=quality is not SampleQuality.STALE
+                )
+            )
+            writer.append(sample)
+            samples.publish(sample)
+            if quality is not SampleQuality.TIMEOUT:
+                eta.update(sample)
+                acquired.publish(sample)
+                fleet.update(KILN_NAME, sample, flags)
+            if quality in (SampleQuality.GOOD, SampleQuality.RETRIED):
+                _detect(sample, midpoint)
+                _diff_status(sample, flags)
     except asyncio.CancelledError:
         print("Recording stopped.")
     except Exception as e:
         print(f"Recorder failed: {e}")
+    finally:
+        gap = gaps.close(round(time.monotonic() - scheduler.anchor_monotonic, 3))
+        if gap:
+            gap_writer.append(gap)
+        await asyncio.to_thread(writer.close)
+        await asyncio.to_thread(gap_writer.close)
 
 
 @router.get("/current_temperature")
@@ -71,18 +423,35 @@ async def get_current_temperature(kiln: Any = Depends(get_kiln)):
 
 
 @router.post("/start_recording")
-async def start_recording(kiln: Any = Depends(get_kiln)):
-    global recording_task, start_time
+async def start_recording(
+    period: Optional[float] = None, kiln: Any = Depends(get_kiln)
+):
+    global recording_task, start_time, sampler
 
+    if bus_worker():
+        return await asyncio.to_thread(bus_worker().command, "start_recording", period)
     if recording_task and not recording_task.done():
         return {"status": "error", "message": "Recording is already in progress"}
 
-    # Reset file
-    with open(RECORDING_FILE, "w"):
-        pass
+    try:
+        scheduler = DeadlineScheduler(period or SAMPLE_PERIOD)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+    # Keep the previous firing as its own session, then start a fresh file
+    archived = archive_current_recording()
+    for path in (RECORDING_FILE, gaps_path(RECORDING_FILE)):
+        with open(path, "w"):
+            pass
 
-    start_time = time.time()
-    recording_task = asyncio.create_task(recorder(kiln))
+    eta.reset()
+    eta.ensure_program(kiln)
+    sampler = scheduler
+    start_time = scheduler.anchor_wall
+    recording_task = asyncio.create_task(recorder(kiln, scheduler))
+    event_hub.publish(
+        {"type": "recording_started", "period": scheduler.period, "archived": archived}
+    )
 
     return {"status": "ok", "message": "Recording started"}
 
@@ -91,6 +460,8 @@ async def start_recording(kiln: Any = Depends(get_kiln)):
 async def stop_recording():
     global recording_task
 
+    if bus_worker():
+        return await asyncio.to_thread(bus_worker().command, "stop_recording")
     if not recording_task or recording_task.done():
         return {"status": "error", "message": "No recording in progress"}
 
@@ -101,35 +472,439 @@ async def stop_recording():
         pass
 
     recording_task = None
+    event_hub.publish({"type": "recording_stopped"})
     return {"status": "ok", "message": "Recording stopped"}
 
 
 @router.get("/current_recording")
-async def get_current_recording() -> List[dict]:
-    try:
-        recordings = []
-        with open(RECORDING_FILE, "r") as f:
-            for line in f:
-                if line.strip():
-                    recordings.append(json.loads(line))
-        return recordings
-    except FileNotFoundError:
-        return []
+async def get_current_recording(format: str = "json"):
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+
+    if format == "ndjson":
+        if not os.path.exists(RECORDING_FILE):
+            return StreamingResponse(iter([]), media_type="application/x-ndjson")
+        return StreamingResponse(
+            iter_ndjson(RECORDING_FILE), media_type="application/x-ndjson"
+        )
+
+    if not os.path.exists(RECORDING_FILE):
+        return StreamingResponse(iter(["[]"]), media_type="application/json")
+    return StreamingResponse(
+        iter_json_array(RECORDING_FILE), media_type="application/json"
+    )
+
+
+async def _ring_events(request: Request, bus: BusClient):
+    # Lock-free reads of the bus worker's sample ring, from its current head
+    ring = bus.ring
+    position = ring.head
+    idle = 0.0
+    while not await request.is_disconnected():
+        if bus.ring is not ring:
+            # The worker restarted; its new ring counts from 0
+            ring, position = bus.ring, 0
+        new, position = ring.read(position)
+        for sample in new:
+            yield f"data: {json.dumps(sample)}\n\n"
+        if new:
+            idle = 0.0
+        else:
+            idle += BUS_POLL_INTERVAL
+            if idle >= KEEP_ALIVE:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+                bus.reattach()  # no samples for a while: still the worker's ring?
+        await asyncio.sleep(BUS_POLL_INTERVAL)
+
+
+@router.get("/stream/samples")
+async def stream_samples(request: Request):
+    """Server-sent events with every recorded sample, derived channels included."""
+    if bus_worker():
+        return StreamingResponse(
+            _ring_events(request, bus_worker()), media_type="text/event-stream"
+        )
+    return sse_response(request, samples.subscribe)
+
+
+@router.get("/anomalies")
+async def get_anomalies():
+    """Detectors currently raised and the most recent detector events."""
+    return {"active": detectors.active(), "events": list(detectors.events)}
+
+
+@router.get("/stream/anomalies")
+async def stream_anomalies(request: Request):
+    """Server-sent events with every detector raise and clear."""
+    return sse_response(request, anomalies.subscribe)
+
+
+@router.get("/events")
+async def get_events(types: Optional[str] = None, after: int = 0):
+    """Recent status and anomaly events, oldest first. `after` skips events
+    up to and including that id."""
+    selected = set(types.split(",")) if types else None
+    return {
+        "events": [
+            e
+            for e in event_hub.recent
+            if e["id"] > after and (selected is None or e["type"] in selected)
+        ],
+        "stats": event_hub.stats(),
+    }
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return to_epoch(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail=f"Bad time {value!r}: use epoch seconds or ISO"
+        )
+
+
+@router.get("/events/log")
+async def query_event_log(
+    start: Optional[str] = Query(None, alias="from"),
+    end: Optional[str] = Query(None, alias="to"),
+    types: Optional[str] = None,
+    kiln_name: str = KILN_NAME,
+    limit: int = Query(1000, ge=1, le=100000),
+    newest_first: bool = False,
+):
+    """Logged events of a kiln, optionally within [from, to) and of some types."""
+    events = await asyncio.to_thread(
+        event_log.query,
+        kiln_name,
+        _parse_time(start),
+        _parse_time(end),
+        types.split(",") if types else None,
+        limit,
+        newest_first,
+    )
+    return {"kiln": kiln_name, "events": events}
+
+
+@router.get("/stream/events")
+async def stream_events(request: Request, types: Optional[str] = None):
+    """Server-sent events with status transitions (alarms, events, RUN/STOP,
+    AT, program steps) and anomaly detector raises and clears."""
+    selected = set(types.split(",")) if types else None
+    return sse_response(
+        request,
+        event_hub.broadcaster.subscribe,
+        filter=lambda event: selected is None or event["type"] in selected,
+        event_id=True,
+    )
+
+
+@router.get("/webhooks")
+async def get_webhooks():
+    if bus_worker():
+        # The bus worker's hub delivers the webhooks
+        return {
+            "webhooks": await asyncio.to_thread(
+                bus_worker().command, "webhooks", "list"
+            )
+        }
+    return {"webhooks": list(event_hub.webhooks.values())}
+
+
+@router.post("/webhooks")
+async def add_webhook(req: WebhookRequest):
+    """Register a webhook. Only hosts on this machine or the LAN are allowed;
+    others can be configured in EVENT_WEBHOOKS."""
+    try:
+        await asyncio.to_thread(check_webhook_host, req.url)
+        if bus_worker():
+            hook = await asyncio.to_thread(
+                bus_worker().command, "webhooks", "add", req.url, req.types
+            )
+        else:
+            hook = event_hub.webhooks[event_hub.add_webhook(req.url, req.types)]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "ok", "webhook": hook}
+
+
+@router.delete("/webhooks/{hook_id}")
+async def remove_webhook(hook_id: int):
+    try:
+        if bus_worker():
+            await asyncio.to_thread(bus_worker().command, "webhooks", "remove", hook_id)
+        else:
+            event_hub.remove_webhook(hook_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No webhook {hook_id}")
+    return {"status": "ok"}
+
+
+@router.get("/recordings")
+async def get_recordings():
+    return {"sessions": list_sessions()}
+
+
+@router.get("/recordings/{session_id}/gaps")
+async def get_recording_gaps(session_id: str):
+    try:
+        path = session_path(session_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"session": session_id, "gaps": await asyncio.to_thread(read_gaps, path)}
+
+
+@router.get("/recordings/{session_id}/events")
+async def get_recording_events(
+    session_id: str, types: Optional[str] = None, kiln_name: str = KILN_NAME
+):
+    """Logged events during a recording, with time_passed on the recording's
+    time axis so they can be drawn over its chart."""
+    try:
+        path = session_path(session_id)
+        start, end = await asyncio.to_thread(session_span, path)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError:
+        return {"session": session_id, "events": []}
+    if session_id == CURRENT_SESSION and is_recording():
+        end = time.time()
+
+    events = await asyncio.to_thread(
+        event_log.query,
+        kiln_name,
+        start - 1.0,
+        end + 1.0,
+        types.split(",") if types else None,
+        100000,
+    )
+    for event in events:
+        event["time_passed"] = round(event["ts"] - start, 3)
+    return {"session": session_id, "events": events}
+
+
+@router.get("/recordings/{session_id}/aggregate")
+async def aggregate_recording(
+    session_id: str,
+    bucket: str = "60s",
+    start: Optional[float] = Query(None, alias="from"),
+    end: Optional[float] = Query(None, alias="to"),
+    channels: Optional[str] = None,
+):
+    try:
+        path = session_path(session_id)
+        bucket_seconds = parse_duration(bucket)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    selected = channels.split(",") if channels else None
+
+    try:
+        return await asyncio.to_thread(
+            aggregates.query, path, bucket_seconds, start, end, selected
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/recordings/{session_id}/export")
+async def export_recording(
+    session_id: str,
+    format: str = "csv",
+    start: Optional[float] = Query(None, alias="from"),
+    end: Optional[float] = Query(None, alias="to"),
+    channels: Optional[str] = None,
+):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"format must be one of {EXPORT_FORMATS}"
+        )
+    try:
+        path = session_path(session_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    selected = channels.split(",") if channels else None
+
+    if format == "csv":
+        # Sync generators are iterated in the threadpool, off the event loop
+        return StreamingResponse(
+            iter_csv(path, start, end, selected),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{session_id}.csv"'},
+        )
+
+    tmp = tempfile.NamedTemporaryFile(suffix=".npz", delete=False)
+    tmp.close()
+    try:
+        await asyncio.to_thread(write_npz, path, tmp.name, start, end, selected)
     except Exception as e:
+        os.unlink(tmp.name)
         raise HTTPException(status_code=500, detail=str(e))
+    return FileResponse(
+        tmp.name,
+        media_type="application/octet-stream",
+        filename=f"{session_id}.npz",
+        background=BackgroundTask(os.unlink, tmp.name),
+    )
+
+
+@router.get("/eta")
+async def get_eta():
+    """Predicted program completion and per-step finish times."""
+    if bus_worker():
+        return await asyncio.to_thread(bus_worker().command, "eta")
+    return {
+        "program_loaded": eta.program is not None,
+        "prediction": eta.prediction,
+    }
+
+
+@router.get("/program")
+async def get_program(kiln: Any = Depends(get_kiln)):
+    """Pattern memory of all patterns, from the cache shared with /eta."""
+    program = await eta.get_program(kiln)
+    if program is None:
+        raise HTTPException(status_code=503, detail="Could not read the program")
+    return program.as_dict()
+
+
+async def _read_pid(kiln: Any) -> list:
+    if hasattr(kiln, "get_pid_p") and asyncio.iscoroutinefunction(kiln.get_pid_p):
+        return [await kiln.get_pid_p(), await kiln.get_pid_i(), await kiln.get_pid_d()]
+    return await asyncio.to_thread(
+        lambda: [
+            kiln.get_proportional_band(),
+            kiln.get_integral_time(),
+            kiln.get_derivative_time(),
+        ]
+    )
+
+
+@router.get("/simulation")
+async def simulate_firing(
+    pattern: int = 0,
+    start_temp: Optional[float] = None,
+    p: Optional[float] = None,
+    i: Optional[float] = None,
+    d: Optional[float] = None,
+    kiln_name: str = KILN_NAME,
+    period: float = 60.0,
+    kiln: Any = Depends(get_kiln),
+):
+    """Predicted firing of the stored program, as recording samples.
+
+    PID settings not given are read from the controller.
+    """
+    program = await eta.get_program(kiln)
+    if program is None:
+        raise HTTPException(status_code=503, detail="Could not read the program")
+    pid = [p, i, d]
+    if None in pid:
+        try:
+            current = await _read_pid(kiln)
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"Could not read PID: {e}")
+        pid = [
+            given if given is not None else read for given, read in zip(pid, current)
+        ]
+    if pid[0] <= 0 or period <= 0:
+        raise HTTPException(status_code=400, detail="P band and period must be > 0")
+
+    model = await asyncio.to_thread(load_model, kiln_name)
+    try:
+        return await asyncio.to_thread(
+            run_simulation, program, pattern, pid, start_temp, model, period
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/tuning/pid")
+async def tune_pid(
+    target: Optional[float] = None,
+    start_temp: Optional[float] = None,
+    kiln_name: str = KILN_NAME,
+    top: int = Query(5, ge=1, le=50),
+    kiln: Any = Depends(get_kiln),
+):
+    """Search P/I/D on the thermal model for a ramp to target and hold.
+
+    Target defaults to the current SV. Nothing is written to the controller;
+    `apply` lists the requests that would.
+    """
+    if target is None:
+        try:
+            if hasattr(kiln, "get_setpoint") and asyncio.iscoroutinefunction(
+                kiln.get_setpoint
+            ):
+                target = await kiln.get_setpoint()
+            else:
+                target = await asyncio.to_thread(kiln.get_setpoint)
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"Could not read SV: {e}")
+
+    model = await asyncio.to_thread(load_model, kiln_name)
+    candidates = await asyncio.to_thread(optimise, target, model, start_temp, None, top)
+    return {
+        "target": target,
+        "candidates": candidates,
+        "apply": apply_requests(candidates[0]),
+    }
+
+
+@router.get("/thermal-model")
+async def get_thermal_model(kiln_name: str = KILN_NAME):
+    model = await asyncio.to_thread(load_model, kiln_name)
+    if model is None:
+        raise HTTPException(status_code=404, detail=f"No model for {kiln_name}")
+    return {"kiln": kiln_name, "model": model}
+
+
+@router.post("/thermal-model/fit")
+async def fit_thermal_model(
+    kiln_name: str = KILN_NAME, sessions: Optional[str] = None, save: bool = True
+):
+    """Fit the thermal model to the given sessions (default: all archived)."""
+
+    def fit():
+        model = fit_sessions(sessions.split(",") if sessions else archived_sessions())
+        if save:
+            save_model(model, kiln_name)
+        return model
+
+    try:
+        model = await asyncio.to_thread(fit)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"kiln": kiln_name, "model": model}
 
 
 @router.get("/status")
 async def get_status():
     global recording_task
-    return {"is_recording": recording_task is not None and not recording_task.done()}
+    if bus_worker():
+        return await asyncio.to_thread(bus_worker().command, "status")
+    return {
+        "is_recording": recording_task is not None and not recording_task.done(),
+        "sampling": sampler.stats() if sampler else None,
+    }
 
 
 async def shutdown_monitoring():
-    global recording_task
-    if recording_task:
-        recording_task.cancel()
-        try:
-            await recording_task
-        except asyncio.CancelledError:
-            pass
+    global recording_task, monitor_task
+    for task in (recording_task, monitor_task):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    recording_task = monitor_task = None
+    if _relay_stop is not None:
+        _relay_stop.set()
+    await event_hub.shutdown()
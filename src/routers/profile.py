@@ -0,0 +1,87 @@
+# src/routers/profile.py
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Any
+from .monitoring import bus_worker, get_kiln
+from ..core.events import event_hub
+from ..core.models import ProfileRequest
+from ..core.profile_runner import runner
+
+router = APIRouter(prefix="/profile", tags=["profile"])
+
+
+FORWARDED_EVENTS = {"start": "profile_started", "stop": "profile_stopped"}
+
+
+async def _forward(action, *args):
+    # The bus worker runs the profile, so only one process writes SV
+    try:
+        status = await asyncio.to_thread(bus_worker().command, "profile", action, *args)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if action in FORWARDED_EVENTS:
+        event_hub.publish({"type": FORWARDED_EVENTS[action], **status})
+    return {"status": "ok", **status}
+
+
+@router.get("")
+async def get_profile_status():
+    if bus_worker():
+        return await asyncio.to_thread(bus_worker().command, "profile", "status")
+    return runner.status()
+
+
+@router.post("/start")
+async def start_profile(req: ProfileRequest, kiln: Any = Depends(get_kiln)):
+    segments = [s.model_dump() for s in req.segments]
+    if bus_worker():
+        return await _forward("start", segments, req.start_temp)
+    try:
+        await runner.start(kiln, segments, req.start_temp)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    event_hub.publish({"type": "profile_started", "segments": len(req.segments)})
+    return {"status": "ok", **runner.status()}
+
+
+def _control(action):
+    try:
+        action()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "ok", **runner.status()}
+
+
+@router.post("/pause")
+async def pause_profile():
+    if bus_worker():
+        return await _forward("pause")
+    return _control(runner.pause)
+
+
+@router.post("/resume")
+async def resume_profile():
+    if bus_worker():
+        return await _forward("resume")
+    return _control(runner.resume)
+
+
+@router.post("/skip")
+async def skip_profile():
+    if bus_worker():
+        return await _forward("skip")
+    return _control(runner.skip)
+
+
+@router.post("/stop")
+async def stop_profile():
+    if bus_worker():
+        return await _forward("stop")
+    await runner.stop()
+    event_hub.publish({"type": "profile_stopped", **runner.status()})
+    return {"status": "ok", **runner.status()}
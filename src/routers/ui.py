@@ -1,14 +1,19 @@
 # src/routers/ui.py
 import asyncio
+import secrets
 from fastapi import APIRouter, Request, HTTPException, Depends
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, Response
 
 from typing import Any
 
 # from ..core.kiln import kiln # Remove direct import
 from ..core.utils import calculate_color
 from ..core.config import TEMPLATES_DIR
+from ..core.telemetry import telemetry
+from ..core.eta import eta
+from ..core.events import event_hub
+from ..core.assets import assets
+from ..core.timing import TimedTemplates
 from ..core.models import PatternStepRequest
 from .monitoring import get_kiln
 from ..core.delta_2 import (
@@ -30,7 +35,8 @@ from ..core.delta_2 import (
 from . import monitoring
 
 router = APIRouter(tags=["ui"])
-templates = Jinja2Templates(directory=TEMPLATES_DIR)
+templates = TimedTemplates(directory=TEMPLATES_DIR)
+templates.env.globals["static_url"] = assets.static_url
 
 
 @router.get("/", response_class=HTMLResponse)
@@ -121,6 +127,9 @@ async def update_setting(name: str, request: Request, kiln: Any = Depends(get_ki
                 await kiln.set_sensor_type(val_int)
             else:
                 await kiln.set_setting(name.replace("_", "-"), val_int)
+            event_hub.publish(
+                {"type": "setting_changed", "setting": name, "value": val_int}
+            )
             return {"status": "ok"}
 
         # Direct access (sync)
@@ -143,76 +152,130 @@ async def update_setting(name: str, request: Request, kiln: Any = Depends(get_ki
                     await asyncio.to_thread(getattr(kiln, method_name), val_int)
                 else:
                     raise AttributeError(f"Kiln has no setter for {name}")
+        event_hub.publish(
+            {"type": "setting_changed", "setting": name, "value": val_int}
+        )
         return {"status": "ok"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
+async def _fetch_dashboard_values(kiln: Any) -> dict:
+    if hasattr(kiln, "get_pv") and asyncio.iscoroutinefunction(kiln.get_pv):
+        status = await kiln.get_executing_program_status()
+        data = {
+            "pv": await kiln.get_pv(),
+            "setpoint": await kiln.get_setpoint(),
+            "output1": await kiln.get_output1(),
+            "output2": await kiln.get_output2(),
+            "pattern": status.get("pattern"),
+            "step": status.get("step"),
+            "time_left_min": status.get("time_left_min"),
+            "time_left_sec": status.get("time_left_sec"),
+        }
+        data["actual_steps"] = await kiln.get_actual_steps(data["pattern"])
+        return data
+
+    def fetch():
+        data = {
+            "pv": kiln.get_pv(),
+            "setpoint": kiln.get_setpoint(),
+            "output1": kiln.get_output_1_value(),
+            "output2": kiln.get_output_2_value(),
+            "pattern": kiln.get_executing_pattern_number(),
+            "step": kiln.get_executing_step_number(),
+            "time_left_min": kiln.get_step_time_left_min(),
+            "time_left_sec": kiln.get_step_time_left_sec(),
+        }
+        data["actual_steps"] = kiln.get_actual_step_number_setting(data["pattern"])
+        return data
+
+    return await asyncio.to_thread(fetch)
+
+
+async def _sample_dashboard_values(kiln: Any, sample: dict) -> dict:
+    """Dashboard values from the bus worker's newest sample; actual steps
+    come from the cached program."""
+    minutes, seconds = divmod(sample["step_time_left"] or 0, 60)
+    data = {
+        "pv": sample["temperature"],
+        "setpoint": sample["setpoint"],
+        "output1": sample["output1"],
+        "output2": sample["output2"],
+        "pattern": sample["pattern"],
+        "step": sample["step"],
+        "time_left_min": minutes,
+        "time_left_sec": seconds,
+    }
+    program = await eta.get_program(kiln)
+    if program is not None and 0 <= data["pattern"] < len(program.patterns):
+        data["actual_steps"] = program.patterns[data["pattern"]]["actual_steps"]
+    else:
+        data["actual_steps"] = await asyncio.to_thread(
+            kiln.get_actual_step_number_setting, data["pattern"]
+        )
+    return data
+
+
+# Rendered dashboard fragment, shared by all clients until the snapshot changes
+_dashboard_fragment: dict = {"key": None, "etag": None, "html": None}
+# Telemetry versions restart at 0 with the process; the nonce keeps ETags
+# from a previous run from matching
+_boot_nonce = secrets.token_hex(4)
+
+
+def _program_end() -> str:
+    prediction = monitoring.current_prediction()
+    if not prediction or not prediction["completion"]:
+        return ""
+    return prediction["completion"][11:16] + ("*" if prediction["behind"] else "")
+
+
+def _render_dashboard(key: tuple, values: dict, is_recording: bool):
+    global _dashboard_fragment
+
+    if _dashboard_fragment["key"] != key:
+        html = templates.get_template("partials/dashboard.html").render(
+            pv=values["pv"],
+            setpoint=values["setpoint"],
+            output1=values["output1"],
+            output2=values["output2"],
+            pv_color=calculate_color(values["pv"], values["setpoint"]),
+            pattern=values["pattern"],
+            step=values["step"],
+            time_left=f"{values['time_left_min']}m {values['time_left_sec']}s",
+            actual_steps=values["actual_steps"],
+            is_recording=is_recording,
+            program_end=key[2],
+        )
+        _dashboard_fragment = {
+            "key": key,
+            "etag": '"dash-{}-{}-{}-{}"'.format(_boot_nonce, *key),
+            "html": html,
+        }
+    return _dashboard_fragment
+
+
 @router.get("/partials/dashboard", response_class=HTMLResponse)
 async def get_dashboard_partial(request: Request, kiln: Any = Depends(get_kiln)):
     try:
-        # Fetch values
-        if hasattr(kiln, "get_pv") and asyncio.iscoroutinefunction(kiln.get_pv):
-            pv = await kiln.get_pv()
-            setpoint = await kiln.get_setpoint()
-            output1 = await kiln.get_output1()
-            output2 = await kiln.get_output2()
-            status = await kiln.get_executing_program_status()
-            current_pattern = status.get("pattern")
-            current_step = status.get("step")
-            time_left_min = status.get("time_left_min")
-            time_left_sec = status.get("time_left_sec")
-            actual_steps = await kiln.get_actual_steps(current_pattern)
-        else:
-            data = await asyncio.to_thread(
-                lambda: {
-                    "pv": kiln.get_pv(),
-                    "setpoint": kiln.get_setpoint(),
-                    "output1": kiln.get_output_1_value(),
-                    "output2": kiln.get_output_2_value(),
-                    "pattern": kiln.get_executing_pattern_number(),
-                    "step": kiln.get_executing_step_number(),
-                    "time_left_min": kiln.get_step_time_left_min(),
-                    "time_left_sec": kiln.get_step_time_left_sec(),
-                }
+        # Multi-worker mode: from the bus worker's newest sample in shared memory
+        sample = monitoring.latest_sample()
+        version, values = await telemetry.refresh(
+            lambda: (
+                _fetch_dashboard_values(kiln)
+                if sample is None
+                else _sample_dashboard_values(kiln, sample)
             )
-            pv = data["pv"]
-            setpoint = data["setpoint"]
-            output1 = data["output1"]
-            output2 = data["output2"]
-            current_pattern = data["pattern"]
-            current_step = data["step"]
-            time_left_min = data["time_left_min"]
-            time_left_sec = data["time_left_sec"]
-            actual_steps = await asyncio.to_thread(
-                kiln.get_actual_step_number_setting, current_pattern
-            )
-
-        pv_color = calculate_color(pv, setpoint)
-        time_left = f"{time_left_min}m {time_left_sec}s"
-
-        # Recording status (imported from monitoring)
-        is_recording = (
-            monitoring.recording_task is not None
-            and not monitoring.recording_task.done()
-        )
-
-        return templates.TemplateResponse(
-            "partials/dashboard.html",
-            {
-                "request": request,
-                "pv": pv,
-                "setpoint": setpoint,
-                "output1": output1,
-                "output2": output2,
-                "pv_color": pv_color,
-                "pattern": current_pattern,
-                "step": current_step,
-                "time_left": time_left,
-                "actual_steps": actual_steps,
-                "is_recording": is_recording,
-            },
         )
+        is_recording = monitoring.is_recording()
+
+        key = (version, int(is_recording), _program_end())
+        fragment = _render_dashboard(key, values, is_recording)
+        headers = {"ETag": fragment["etag"], "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == fragment["etag"]:
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(fragment["html"], headers=headers)
     except Exception as e:
         print(f"Error fetching dashboard data: {e}")
         return HTMLResponse(
@@ -257,9 +320,23 @@ async def set_pattern_step_api(
         if hasattr(kiln, "set_pattern_step") and asyncio.iscoroutinefunction(
             kiln.set_pattern_step
         ):
-            return await kiln.set_pattern_step(id, step_id, req.temp, req.time)
-        await asyncio.to_thread(kiln.set_pattern_step, id, step_id, req.temp, req.time)
-        return {"status": "ok", "pattern": id, "step": step_id, "data": req}
+            result = await kiln.set_pattern_step(id, step_id, req.temp, req.time)
+        else:
+            await asyncio.to_thread(
+                kiln.set_pattern_step, id, step_id, req.temp, req.time
+            )
+            result = {"status": "ok", "pattern": id, "step": step_id, "data": req}
+        await monitoring.invalidate_program()
+        event_hub.publish(
+            {
+                "type": "pattern_changed",
+                "pattern": id,
+                "step": step_id,
+                "temp": req.temp,
+                "time": req.time,
+            }
+        )
+        return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -275,6 +352,10 @@ async def update_start_pattern(request: Request, kiln: Any = Depends(get_kiln)):
             await kiln.set_start_pattern(int(value))
         else:
             await asyncio.to_thread(kiln.set_start_pattern_number, int(value))
+        telemetry.invalidate()
+        event_hub.publish(
+            {"type": "setting_changed", "setting": "start_pattern", "value": int(value)}
+        )
     return await get_dashboard_partial(request, kiln=kiln)
 
 
@@ -289,12 +370,22 @@ async def update_actual_steps(id: int, request: Request, kiln: Any = Depends(get
             await kiln.set_actual_steps(id, int(value))
         else:
             await asyncio.to_thread(kiln.set_actual_step_number_setting, id, int(value))
+        telemetry.invalidate()
+        await monitoring.invalidate_program()
+        event_hub.publish(
+            {
+                "type": "pattern_changed",
+                "pattern": id,
+                "field": "actual_steps",
+                "value": int(value),
+            }
+        )
     return await get_dashboard_partial(request, kiln=kiln)
 
 
 @router.get("/api/recording")
-async def get_recording_api():
-    return await monitoring.get_current_recording()
+async def get_recording_api(format: str = "json"):
+    return await monitoring.get_current_recording(format=format)
 
 
 @router.post("/recording/start")
@@ -1,7 +1,24 @@
+// Marker colour per event type, for the event overlay of the recording
+const EVENT_COLORS = {
+    anomaly_raised: '#ef4444',
+    anomaly_cleared: '#9ca3af',
+    alarm_raised: '#ef4444',
+    alarm_cleared: '#9ca3af',
+    system_alarm_raised: '#ef4444',
+    system_alarm_cleared: '#9ca3af',
+    run_started: '#10b981',
+    run_stopped: '#f59e0b',
+    step_advanced: '#60a5fa',
+    autotune_started: '#a78bfa',
+    autotune_finished: '#a78bfa'
+};
+
 class PatternChart {
     constructor(canvasId) {
         this.ctx = document.getElementById(canvasId).getContext('2d');
         this.chart = null;
+        this.records = [];
+        this.events = [];
     }
 
     init(showCurrentTemp = false) {
@@ -43,6 +60,29 @@ class PatternChart {
                 fill: false,
                 order: 0
             });
+
+            datasets.push({
+                label: 'Simulated',
+                data: [],
+                borderColor: '#f59e0b', // Amber
+                borderWidth: 2,
+                pointRadius: 0,
+                borderDash: [2, 4],
+                fill: false,
+                order: 3
+            });
+
+            datasets.push({
+                label: 'Events',
+                data: [],
+                showLine: false,
+                pointStyle: 'triangle',
+                pointRadius: 6,
+                pointHoverRadius: 8,
+                pointBackgroundColor: [],
+                pointBorderColor: '#1e1e1e',
+                order: -1
+            });
         }
 
         this.chart = new Chart(this.ctx, {
@@ -59,13 +99,23 @@ class PatternChart {
                         display: false
                     },
                     tooltip: {
-                        mode: 'index',
+                        // Datasets have their own x values, so index mode
+                        // would pair unrelated points (and event markers)
+                        mode: 'nearest',
+                        axis: 'x',
                         intersect: false,
                         backgroundColor: 'rgba(17, 24, 39, 0.9)',
                         titleColor: '#fff',
                         bodyColor: '#9ca3af',
                         borderColor: '#374151',
-                        borderWidth: 1
+                        borderWidth: 1,
+                        callbacks: {
+                            label: (context) => {
+                                const event = context.raw && context.raw.event;
+                                if (!event) return `${context.dataset.label}: ${context.formattedValue}`;
+                                return `${event.type}${event.detector ? ' ' + event.detector : ''}${event.source ? ' ' + event.source : ''}`;
+                            }
+                        }
                     }
                 },
                 scales: {
@@ -140,6 +190,57 @@ class PatternChart {
         }));
 
         this.chart.data.datasets[2].data = points;
+        this.records = points;
+        this.drawEvents();
+        this.chart.update('none');
+    }
+
+    updateEvents(events) {
+        // events is the list of /recordings/{id}/events, time_passed in seconds
+        this.events = events;
+        this.drawEvents();
+        this.chart.update('none');
+    }
+
+    drawEvents() {
+        if (!this.chart || this.chart.data.datasets.length < 5) return;
+
+        // Each marker sits on the recorded temperature at its time
+        const dataset = this.chart.data.datasets[4];
+        dataset.data = this.events.map(event => ({
+            x: event.time_passed / 60.0,
+            y: this.temperatureAt(event.time_passed / 60.0),
+            event: event
+        }));
+        dataset.pointBackgroundColor = this.events.map(
+            event => EVENT_COLORS[event.type] || '#e5e7eb'
+        );
+    }
+
+    temperatureAt(x) {
+        // Last recorded point at or before x (records are in time order)
+        let lo = 0, hi = this.records.length - 1, y = null;
+        while (lo <= hi) {
+            const mid = (lo + hi) >> 1;
+            if (this.records[mid].x <= x) {
+                y = this.records[mid].y;
+                lo = mid + 1;
+            } else {
+                hi = mid - 1;
+            }
+        }
+        if (y === null && this.records.length) y = this.records[0].y;
+        return y;
+    }
+
+    updateSimulationData(records) {
+        if (!this.chart || this.chart.data.datasets.length < 4) return;
+
+        // Same format as the recording, predicted by /simulation
+        this.chart.data.datasets[3].data = records.map(r => ({
+            x: r.time_passed / 60.0,
+            y: r.temperature
+        }));
         this.chart.update('none');
     }
 }
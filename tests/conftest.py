@@ -0,0 +1,91 @@
+import minimalmodbus
+import pytest
+
+from src.core.config import DEFAULT_PORT_NAME
+
+
+class FakeSerial:
+    """Stands in for the serial port; the tests stub Instrument's bus calls."""
+
+    port = DEFAULT_PORT_NAME
+    timeout = 0.05
+    baudrate = 9600
+    is_open = True
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def write(self, data):
+        return len(data)
+
+    def read(self, size=1):
+        return b""
+
+    def reset_input_buffer(self):
+        pass
+
+    def reset_output_buffer(self):
+        pass
+
+
+# Before anything imports src.core.kiln, which opens the port
+minimalmodbus._serialports[DEFAULT_PORT_NAME] = FakeSerial()
+
+
+class FakeBus:
+    """Registers and bits of a controller, with a log of every bus access."""
+
+    def __init__(self, monkeypatch):
+        self.registers = {}
+        self.bits = {}
+        self.log = []
+        self.fail_reads = None  # exception raised by block reads
+        bus = self
+
+        def write_register(self, address, value, decimals=0, fc=6, signed=False):
+            bus.log.append(("register", address))
+            bus.registers[address] = round(value * 10**decimals) & 0xFFFF
+
+        def write_bit(self, address, value, fc=5):
+            bus.log.append(("bit", address))
+            bus.bits[address] = int(bool(value))
+
+        def read_registers(self, address, count, fc=3):
+            bus.log.append(("read_registers", address))
+            if bus.fail_reads is not None:
+                raise bus.fail_reads
+            return [bus.registers.get(address + k, 0) for k in range(count)]
+
+        def read_bits(self, address, count, fc=2):
+            bus.log.append(("read_bits", address))
+            if bus.fail_reads is not None:
+                raise bus.fail_reads
+            return [bus.bits.get(address + k, 0) for k in range(count)]
+
+        for name, stub in (
+            ("write_register", write_register),
+            ("write_bit", write_bit),
+            ("read_registers", read_registers),
+            ("read_bits", read_bits),
+        ):
+            monkeypatch.setattr(minimalmodbus.Instrument, name, stub)
+
+    def writes(self):
+        return [entry for entry in self.log if not entry[0].startswith("read")]
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    return FakeBus(monkeypatch)
+
+
+@pytest.fixture
+def kiln(bus):
+    from src.core.delta_2 import Delta2
+
+    kiln = Delta2(DEFAULT_PORT_NAME, 1)
+    kiln.writes.window = 0.01
+    return kiln
@@ -0,0 +1,208 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from multiprocessing.connection import Listener
+
+import pytest
+
+from src.core.bus import BusClient, SampleRing
+from src.routers import monitoring
+
+# SharedMemory(track=False) needs the Python the project requires
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 13), reason="needs Python 3.13")
+
+AUTHKEY = b"test-key"
+
+
+def _sample(k: int, timestamp: float = None) -> dict:
+    return {
+        "time_passed": float(k),
+        "timestamp": datetime.fromtimestamp(timestamp or time.time()).isoformat(),
+        "temperature": 20.0 + k,
+        "pattern": 0,
+        "step": k % 8,
+        "quality": "good",
+    }
+
+
+@pytest.fixture
+def ring_name():
+    return f"kiln_test_{os.getpid()}_{time.monotonic_ns()}"
+
+
+@pytest.fixture
+def ring(ring_name):
+    ring = SampleRing.create(ring_name, capacity=4)
+    yield ring
+    ring.close()
+
+
+def test_read_across_wraparound(ring, ring_name):
+    reader = SampleRing.attach(ring_name)
+    for k in range(6):
+        ring.append(_sample(k))
+    samples, head = reader.read(0)
+    # Samples 0 and 1 were overwritten by the second lap
+    assert [s["temperature"] for s in samples] == [22.0, 23.0, 24.0, 25.0]
+    assert head == 6
+    assert reader.read(head) == ([], 6)
+    reader.close()
+
+
+def test_read_skips_overwritten_slot(ring, ring_name):
+    reader = SampleRing.attach(ring_name)
+    for k in range(4):
+        ring.append(_sample(k))
+    # Sample 1's slot already holds a later lap, as if the writer had moved
+    # on between the reader's head check and its read
+    ring.seq[1] = 4
+    samples, head = reader.read(0)
+    assert [s["time_passed"] for s in samples] == [0.0, 2.0, 3.0]
+    assert head == 4
+    reader.close()
+
+
+def test_read_skips_torn_slot(ring, ring_name):
+    reader = SampleRing.attach(ring_name)
+    for k in range(2):
+        ring.append(_sample(k))
+    ring.seq[0] = 1  # being written
+    samples, _ = reader.read(0)
+    assert [s["time_passed"] for s in samples] == [1.0]
+    reader.close()
+
+
+def test_latest_sample_slot(ring, ring_name):
+    reader = SampleRing.attach(ring_name)
+    assert reader.latest() is None
+    ring.set_latest(_sample(7))
+    ring.set_latest(_sample(8))
+    assert reader.latest()["temperature"] == 28.0
+    # The latest slot is not part of the ring
+    assert reader.read(0) == ([], 0)
+    reader.close()
+
+
+def test_reattach_after_restart(ring_name):
+    first = SampleRing.create(ring_name, capacity=4)
+    bus = BusClient("unused", authkey=AUTHKEY, ring_name=ring_name)
+    old = bus.ring
+    assert not bus.reattach()  # same generation
+    first.close()
+    assert not bus.reattach()  # worker down: keep what we have
+    assert bus.ring is old
+
+    second = SampleRing.create(ring_name, capacity=4)
+    second.set_latest(_sample(1))
+    assert bus.reattach()
+    assert bus.ring.generation == second.generation != old.generation
+    assert bus.ring.latest()["temperature"] == 21.0
+    second.close()
+
+
+def test_latest_sample_is_fresh_or_none(ring, ring_name, monkeypatch):
+    bus = BusClient("unused", authkey=AUTHKEY, ring_name=ring_name)
+    monkeypatch.setattr(monitoring, "bus_worker", lambda: bus)
+    assert monitoring.latest_sample() is None
+    ring.set_latest(_sample(1))
+    assert monitoring.latest_sample()["temperature"] == 21.0
+    # A dead worker leaves its last sample behind
+    ring.set_latest(_sample(2, time.time() - monitoring.BUS_SAMPLE_MAX_AGE - 1))
+    assert monitoring.latest_sample() is None
+
+
+def test_latest_sample_follows_restarted_worker(ring_name, monkeypatch):
+    old = SampleRing.create(ring_name, capacity=4)
+    old.set_latest(_sample(1, time.time() - 3600))
+    bus = BusClient("unused", authkey=AUTHKEY, ring_name=ring_name)
+    monkeypatch.setattr(monitoring, "bus_worker", lambda: bus)
+    assert monitoring.latest_sample() is None
+    old.close()
+    new = SampleRing.create(ring_name, capacity=4)
+    new.set_latest(_sample(5))
+    assert monitoring.latest_sample()["temperature"] == 25.0
+    new.close()
+
+
+class FakeWorker:
+    """Accepts relay subscriptions and pushes the given messages."""
+
+    def __init__(self, address: str):
+        self.listener = Listener(address, authkey=AUTHKEY)
+        self.connections = []
+        self.subscribed = threading.Event()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                return
+            assert conn.recv()[0] == "subscribe"
+            self.connections.append(conn)
+            self.subscribed.set()
+
+    def push(self, *messages):
+        for message in messages:
+            self.connections[-1].send(message)
+
+    def drop(self):
+        self.subscribed.clear()
+        self.connections[-1].close()
+
+    def close(self):
+        self.listener.close()
+
+
+async def _until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_relay_mirrors_worker_and_reconnects(tmp_path, ring_name, monkeypatch):
+    monkeypatch.setattr(monitoring, "BUS_RELAY_RETRY", 0.05)
+    monkeypatch.setattr(monitoring, "bus_state", {"is_recording": False})
+    recent = monitoring.event_hub.recent
+    monkeypatch.setattr(monitoring.event_hub, "recent", type(recent)(maxlen=10))
+    worker = FakeWorker(str(tmp_path / "bus.sock"))
+    first = SampleRing.create(ring_name, capacity=4)
+    bus = BusClient(str(tmp_path / "bus.sock"), authkey=AUTHKEY, ring_name=ring_name)
+    old = bus.ring
+
+    async def run():
+        stop = threading.Event()
+        relay = threading.Thread(
+            target=monitoring._relay, args=(bus, asyncio.get_running_loop(), stop)
+        )
+        relay.start()
+        try:
+            await asyncio.to_thread(worker.subscribed.wait, 5)
+            event = {"id": 1, "type": "recording_started", "timestamp": "t"}
+            worker.push(("event", event), ("state", {"is_recording": True}))
+            await _until(lambda: monitoring.bus_state["is_recording"])
+            assert list(monitoring.event_hub.recent) == [event]
+
+            # The worker restarts with a new ring
+            worker.drop()
+            first.close()
+            second = SampleRing.create(ring_name, capacity=4)
+            await asyncio.to_thread(worker.subscribed.wait, 5)
+            worker.push(("state", {"is_recording": False}))
+            await _until(lambda: not monitoring.bus_state["is_recording"])
+            assert bus.ring is not old
+            assert bus.ring.generation == second.generation
+            second.close()
+        finally:
+            stop.set()
+            await asyncio.to_thread(relay.join)
+
+    try:
+        asyncio.run(run())
+    finally:
+        worker.close()
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core.profiler import Profiler
+from src.core.timing import route_timings
+from src.routers import debug
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(debug, "ADMIN_TOKEN", "secret")
+    app = FastAPI()
+    app.include_router(debug.router)
+    return TestClient(app)
+
+
+def test_clearing_timings_needs_admin(client, monkeypatch):
+    cleared = []
+    monkeypatch.setattr(route_timings, "clear", lambda: cleared.append(True))
+    assert client.delete("/debug/timings").status_code == 401
+    assert not cleared
+    response = client.delete(
+        "/debug/timings", headers={"Authorization": "Bearer secret"}
+    )
+    assert response.status_code == 200
+    assert cleared
+
+
+def test_profiler_samples_by_default():
+    async def run():
+        profiler = Profiler()
+        status = profiler.start(5)
+        profiler.stop()
+        return status
+
+    status = asyncio.run(run())
+    assert status["sampling"] and not status["cprofile"]
+
+
+def test_cprofile_sessions_are_short():
+    async def run():
+        profiler = Profiler()
+        with pytest.raises(ValueError):
+            profiler.start(60, cprofile=True)
+        assert profiler.session is None
+        profiler.start(60)  # the sampler may run longer
+        profiler.stop()
+
+    asyncio.run(run())
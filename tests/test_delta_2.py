@@ -0,0 +1,64 @@
+import minimalmodbus
+
+
+def test_verified_writes_keep_call_order(kiln, bus):
+    result = kiln.apply_settings(
+        [("setpoint", "set_setpoint", 500), ("run_stop", "set_run_stop_setting", 1)],
+        verify=True,
+    )
+    assert result["status"] == "ok"
+    # The kiln must not start before its new setpoint is written
+    assert bus.writes() == [("register", 0x1001), ("bit", 0x0814)]
+
+
+def test_verified_writes_order_around_rescaling_bits(kiln, bus):
+    kiln.apply_settings(
+        [
+            ("setpoint", "set_setpoint", 500),
+            ("temp_unit", "set_temp_unit_display", 0),
+            ("p", "set_proportional_band", 20),
+        ],
+        verify=True,
+    )
+    # The setpoint is in the old unit, the P band in the new one
+    writes = bus.writes()
+    assert writes[0] == ("register", 0x1001)
+    assert writes[1] == ("bit", 0x0811)
+    assert writes[2][0] == "register"
+
+
+def test_order_matches_unverified_writes(kiln, bus):
+    calls = [("setpoint", "set_setpoint", 500), ("run_stop", "set_run_stop_setting", 1)]
+    kiln.apply_settings(calls)
+    plain = bus.writes()
+    bus.log.clear()
+    kiln.apply_settings(calls, verify=True)
+    assert bus.writes() == plain
+
+
+def test_failed_read_back_is_unverified(kiln, bus):
+    bus.fail_reads = minimalmodbus.NoResponseError("No answer")
+    result = kiln.apply_settings(
+        [("setpoint", "set_setpoint", 500), ("run_stop", "set_run_stop_setting", 1)],
+        verify=True,
+    )
+    assert result["status"] == "unverified"
+    for field in ("setpoint", "run_stop"):
+        (entry,) = result["fields"][field]["registers"]
+        assert entry["unverified"] is True
+        assert entry["error"] == "No answer"
+        assert result["fields"][field]["ok"] is True
+
+
+def test_read_back_mismatch(kiln, bus, monkeypatch):
+    original = minimalmodbus.Instrument.read_registers
+    monkeypatch.setattr(
+        minimalmodbus.Instrument,
+        "read_registers",
+        lambda self, address, count, fc=3: [
+            v + 1 for v in original(self, address, count, fc)
+        ],
+    )
+    result = kiln.apply_settings([("setpoint", "set_setpoint", 500)], verify=True)
+    assert result["status"] == "mismatch"
+    assert result["fields"]["setpoint"]["ok"] is False
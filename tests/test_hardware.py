@@ -0,0 +1,50 @@
+import asyncio
+
+import minimalmodbus
+import pytest
+from fastapi import HTTPException
+
+from src.core.models import SettingsRequest
+from src.routers import hardware
+
+
+@pytest.fixture
+def events(monkeypatch):
+    published = []
+    monkeypatch.setattr(hardware.event_hub, "publish", published.append)
+    return published
+
+
+def test_settings_read_back_failure_is_reported(kiln, bus, events):
+    bus.fail_reads = minimalmodbus.InvalidResponseError("Bad CRC")
+    result = asyncio.run(
+        hardware.set_settings(
+            SettingsRequest(values={"setpoint": 500}), verify=True, kiln=kiln
+        )
+    )
+    assert result["status"] == "unverified"
+    assert result["fields"]["setpoint"]["registers"][0]["unverified"] is True
+    assert events == [
+        {
+            "type": "settings_changed",
+            "values": {"setpoint": 500},
+            "status": "unverified",
+        }
+    ]
+
+
+def test_settings_write_failure_still_publishes(kiln, bus, events, monkeypatch):
+    def fail(self, *args, **kwargs):
+        raise minimalmodbus.NoResponseError("No answer")
+
+    monkeypatch.setattr(minimalmodbus.Instrument, "write_bit", fail)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(
+            hardware.set_settings(
+                SettingsRequest(values={"setpoint": 500, "run_stop": 1}), kiln=kiln
+            )
+        )
+    assert error.value.status_code == 503
+    assert bus.writes() == [("register", 0x1001)]
+    assert events[0]["type"] == "settings_changed"
+    assert events[0]["status"] == "error"
@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from src.core.models import PatternStepRequest
+from src.routers import ui
+
+
+class AsyncKiln:
+    """The async client interface (KilnClient) of a standalone controller server."""
+
+    def __init__(self):
+        self.steps = []
+
+    async def set_pattern_step(self, pattern, step, temp, time):
+        self.steps.append((pattern, step, temp, time))
+        return {"status": "ok", "pattern": pattern, "step": step}
+
+
+@pytest.fixture
+def events(monkeypatch):
+    published = []
+    monkeypatch.setattr(ui.event_hub, "publish", published.append)
+    return published
+
+
+@pytest.mark.parametrize("async_client", [False, True])
+def test_pattern_step_edit_is_published(kiln, bus, events, async_client):
+    target = AsyncKiln() if async_client else kiln
+    req = PatternStepRequest(temp=600, time=30)
+    result = asyncio.run(ui.set_pattern_step_api(1, 2, req, kiln=target))
+    assert result["status"] == "ok"
+    assert events == [
+        {"type": "pattern_changed", "pattern": 1, "step": 2, "temp": 600, "time": 30}
+    ]